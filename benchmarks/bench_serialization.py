@@ -0,0 +1,77 @@
+"""Compare the validated and trusted serialization paths for a thread context.
+
+Run with: python -m benchmarks.bench_serialization
+"""
+import random
+import timeit
+from datetime import datetime, timezone
+from typing import List
+from uuid import uuid4
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from src.models.message import Message
+from src.api.responses import FastJSONResponse
+
+MESSAGES = 50
+DIMENSIONS = 1536
+ROUNDS = 50
+
+# How FastAPI validates and serializes a List[Message] response_model
+MessageList = TypeAdapter(List[Message])
+
+
+class DriverDateTime:
+    """Stand-in for neo4j.time.DateTime"""
+
+    def __init__(self, value: datetime):
+        self.value = value
+
+    def to_native(self) -> datetime:
+        return self.value
+
+
+def make_records(count: int, dimensions: int) -> List[dict]:
+    thread_id = str(uuid4())
+    return [
+        {
+            "id": str(uuid4()),
+            "content": f"message {i} " * 20,
+            "role": "user" if i % 2 else "assistant",
+            "created_at": DriverDateTime(datetime.now(timezone.utc)),
+            "thread_id": thread_id,
+            "embedding": [random.random() for _ in range(dimensions)],
+            "metadata": {}
+        }
+        for i in range(count)
+    ]
+
+
+def validated_path(records: List[dict]) -> bytes:
+    """Per-record model_validate, then FastAPI's response_model round trip"""
+    messages = [
+        Message.model_validate({**r, "created_at": r["created_at"].to_native()})
+        for r in records
+    ]
+    # What FastAPI does with a response_model: dump, re-validate, dump to JSON types
+    prepared = [m.model_dump() for m in messages]
+    revalidated = MessageList.validate_python(prepared)
+    return JSONResponse(MessageList.dump_python(revalidated, mode="json")).body
+
+
+def trusted_path(records: List[dict]) -> bytes:
+    """Trusted construction rendered straight to JSON with orjson"""
+    return FastJSONResponse([Message.from_record(r) for r in records]).body
+
+
+def main() -> None:
+    records = make_records(MESSAGES, DIMENSIONS)
+    print(f"{MESSAGES} messages x {DIMENSIONS} dims, best of 5 x {ROUNDS} rounds")
+    baseline = None
+    for name, path in (("validated", validated_path), ("trusted", trusted_path)):
+        best = min(timeit.repeat(lambda: path(records), number=ROUNDS, repeat=5)) / ROUNDS
+        baseline = baseline or best
+        print(f"{name:>10}: {best * 1000:8.2f} ms/request  ({baseline / best:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Offline microbenchmarks for the message, thread and analysis services.
+
+The services run unchanged against an in-memory Neo4j stand-in, hashing
+embeddings and deterministic completions (see benchmarks.standins), so no
+database, network or API key is needed. Results are written as JSON; pass a
+previous run with --compare to flag regressions.
+
+Run with: python -m benchmarks.bench_services [--output bench.json] [--compare old.json]
+
+The 1M-vector similarity case holds a 1M x --dimensions float32 matrix in
+memory (about 512 MB at the default 128 dimensions).
+"""
+import os
+
+# Settings are required at import time but nothing here connects to them
+for _key, _value in {
+    "NEO4J_URI": "bolt://localhost:7687",
+    "NEO4J_USER": "neo4j",
+    "NEO4J_PASSWORD": "offline",
+    "OPENAI_API_KEY": "offline"
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+import numpy as np
+from src.core.fingerprint import content_hash, simhash, simhash_bands
+from src.db.neo4j_repository import Neo4jRepository
+from src.models.message import MessageCreate
+from src.services.analysis_service import AnalysisService
+from src.services.embeddings import HashingEmbeddingProvider
+from src.services.message_service import MessageService
+from src.services.thread_service import ThreadService
+from .standins import DriverDateTime, MemoryGraph, MemoryNeo4jService, OfflineOpenAIService
+
+DEFAULT_SIZES = "10000,100000,1000000"
+REGRESSION_THRESHOLD = 0.10
+
+TOPICS = [
+    "billing invoice payment refund subscription",
+    "deployment kubernetes cluster rollout helm",
+    "database migration schema index postgres",
+    "authentication password token session login",
+    "performance latency cache throughput profiling"
+]
+
+
+def _content(i: int) -> str:
+    return f"Question {i} about {TOPICS[i % len(TOPICS)]} and how to handle it in production"
+
+
+class Harness:
+    """Services wired to one MemoryGraph and one offline OpenAI service"""
+
+    def __init__(self, dimensions: int, thread_messages: int, seed: int):
+        self.graph = MemoryGraph(dimensions)
+        self.rng = np.random.default_rng(seed)
+        repository = Neo4jRepository(MemoryNeo4jService(self.graph))
+        openai = OfflineOpenAIService()
+        openai.embeddings = HashingEmbeddingProvider(dimensions)
+        openai.completion_cache = None
+
+        self.messages = MessageService()
+        self.threads = ThreadService()
+        self.analysis = AnalysisService()
+        for service in (self.messages, self.threads, self.analysis):
+            service.repository = repository
+            service.openai = openai
+
+        self.thread_id = uuid4()
+        self.graph.add_thread(str(self.thread_id))
+        self.message_ids = self._fill_thread(self.thread_id, thread_messages)
+
+    def _fill_thread(self, thread_id: UUID, count: int) -> List[str]:
+        """Write a conversation spread over a few minutes per message"""
+        start = datetime.now(timezone.utc) - timedelta(minutes=count)
+        embeddings = asyncio.run(
+            self.messages.openai.generate_embeddings([_content(i) for i in range(count)])
+        )
+        ids = []
+        for i, embedding in enumerate(embeddings):
+            message_id = str(uuid4())
+            fingerprint = simhash(_content(i))
+            self.graph.add_message(
+                str(thread_id), message_id, _content(i), "user" if i % 2 == 0 else "assistant",
+                DriverDateTime(start + timedelta(minutes=i)), embedding,
+                content_hash(_content(i)), fingerprint, simhash_bands(fingerprint)
+            )
+            ids.append(message_id)
+        return ids
+
+    def new_thread(self) -> UUID:
+        thread_id = uuid4()
+        self.graph.add_thread(str(thread_id))
+        return thread_id
+
+
+def measure(call: Callable[[], Awaitable[Any]], repeat: int, warmup: int, ops: int = 1) -> Dict[str, float]:
+    """Time ``repeat`` awaited calls; ``ops`` is the number of items each call handles"""
+    async def run() -> List[float]:
+        for _ in range(warmup):
+            await call()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await call()
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    timings = sorted(asyncio.run(run()))
+    median = statistics.median(timings)
+    return {
+        "repeat": repeat,
+        "min_ms": timings[0] * 1000,
+        "median_ms": median * 1000,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p95_ms": timings[min(int(len(timings) * 0.95), len(timings) - 1)] * 1000,
+        "ops_per_second": ops / median if median else float("inf")
+    }
+
+
+def run_suite(
+    sizes: List[int],
+    dimensions: int = 128,
+    repeat: int = 20,
+    warmup: int = 2,
+    thread_messages: int = 200,
+    batch_size: int = 64,
+    seed: int = 0,
+    log: Optional[Callable[[str], None]] = None
+) -> Dict[str, Dict[str, float]]:
+    """Run every benchmark and return results keyed by benchmark name"""
+    harness = Harness(dimensions, thread_messages, seed)
+    results: Dict[str, Dict[str, float]] = {}
+    counter = iter(range(10 ** 9))
+
+    def bench(name: str, call: Callable[[], Awaitable[Any]], ops: int = 1, times: int = repeat) -> None:
+        results[name] = measure(call, times, warmup, ops)
+        if log:
+            log(f"{name:<48} median {results[name]['median_ms']:10.3f} ms")
+
+    ingest_thread = harness.new_thread()
+    bench("message.create_message", lambda: harness.messages.create_message(
+        MessageCreate(thread_id=ingest_thread, content=f"Unique message {next(counter)}", role="user")
+    ))
+    bench("message.create_message.duplicate", lambda: harness.messages.create_message(
+        MessageCreate(thread_id=ingest_thread, content=_content(0), role="user")
+    ))
+    bench(f"message.create_messages_batch.{batch_size}", lambda: harness.messages.create_messages_batch(
+        ingest_thread,
+        [
+            MessageCreate(thread_id=ingest_thread, content=f"Batched message {next(counter)}", role="user")
+            for _ in range(batch_size)
+        ]
+    ), ops=batch_size)
+
+    middle = UUID(harness.message_ids[len(harness.message_ids) // 2])
+    bench("message.get_thread_context.recent", lambda: harness.messages.get_thread_context(harness.thread_id))
+    bench("message.get_thread_context.around", lambda: harness.messages.get_thread_context(
+        harness.thread_id, message_id=middle
+    ))
+
+    bench("thread.get_thread_summary", lambda: harness.threads.get_thread_summary(harness.thread_id))
+    bench("thread.get_thread_analytics", lambda: harness.threads.get_thread_analytics(harness.thread_id))
+    bench("thread.find_similar_threads", lambda: harness.threads.find_similar_threads(_content(1)))
+
+    bench("analysis.get_thread_analytics", lambda: harness.analysis.get_thread_analytics(harness.thread_id))
+    bench("analysis.analyze_conversation_patterns", lambda: harness.analysis.analyze_conversation_patterns(
+        harness.thread_id
+    ))
+    bench("analysis.get_topic_evolution", lambda: harness.analysis.get_topic_evolution(harness.thread_id))
+
+    # Largest last: seeding only ever grows the index
+    seeded_thread = harness.new_thread()
+    for size in sorted(sizes):
+        harness.graph.seed_vectors(str(seeded_thread), size, harness.rng)
+        bench(f"message.get_similar_messages.{size}", lambda: harness.messages.get_similar_messages(
+            _content(2), limit=10
+        ), times=max(3, repeat // 4) if size >= 1_000_000 else repeat)
+
+    return results
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> List[str]:
+    """Print median ratios against a baseline run and return the regressed names"""
+    regressions = []
+    for name, result in current.items():
+        if name not in baseline:
+            print(f"{name:<48} new")
+            continue
+        ratio = result["median_ms"] / baseline[name]["median_ms"]
+        flag = ""
+        if ratio > 1 + REGRESSION_THRESHOLD:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<48} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="similarity search index sizes")
+    parser.add_argument("--dimensions", type=int, default=128)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--thread-messages", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_services.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+    # The services log every write at DEBUG, which would dominate the timings
+    logging.disable(logging.INFO)
+    try:
+        results = run_suite(
+            sizes=[int(size) for size in args.sizes.split(",") if size],
+            dimensions=args.dimensions,
+            repeat=args.repeat,
+            warmup=args.warmup,
+            thread_messages=args.thread_messages,
+            batch_size=args.batch_size,
+            seed=args.seed,
+            log=print
+        )
+    finally:
+        logging.disable(logging.NOTSET)
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "args": vars(args)
+        },
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
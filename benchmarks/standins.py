@@ -0,0 +1,453 @@
+"""Offline stand-ins for Neo4j and OpenAI used by the benchmark suite.
+
+MemoryGraph answers the named Cypher constants in src.db.queries with
+Python implementations over dicts and a numpy vector matrix, so the real
+services run unchanged against it through the Neo4j repository. OfflineOpenAIService answers completions
+deterministically; embeddings come from the hashing provider.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+from uuid import UUID
+import numpy as np
+from src.db.neo4j import Neo4jService
+from src.db.queries import query_name
+from src.services.openai_service import OpenAIService
+
+
+class DriverDateTime:
+    """Stand-in for neo4j.time.DateTime"""
+
+    def __init__(self, value: datetime):
+        self.value = value
+
+    def to_native(self) -> datetime:
+        return self.value
+
+    @property
+    def epochMillis(self) -> int:
+        return int(self.value.timestamp() * 1000)
+
+    def __str__(self) -> str:
+        return self.value.isoformat()
+
+
+def now() -> DriverDateTime:
+    return DriverDateTime(datetime.now(timezone.utc))
+
+
+class MemoryRecord:
+    """Subset of neo4j.Record: lookup by key or position"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+        self._values = list(data.values())
+
+    def __getitem__(self, key):
+        return self._values[key] if isinstance(key, int) else self._data[key]
+
+    def keys(self) -> List[str]:
+        return list(self._data)
+
+    def data(self) -> Dict[str, Any]:
+        return dict(self._data)
+
+
+class MemoryResult:
+    """Subset of neo4j.Result over precomputed rows"""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self._records = [MemoryRecord(row) for row in rows]
+
+    def __iter__(self) -> Iterator[MemoryRecord]:
+        return iter(self._records)
+
+    def single(self) -> Optional[MemoryRecord]:
+        return self._records[0] if self._records else None
+
+    def values(self) -> List[List[Any]]:
+        return [record._values for record in self._records]
+
+    def data(self) -> List[Dict[str, Any]]:
+        return [record.data() for record in self._records]
+
+    def consume(self) -> None:
+        return None
+
+
+class VectorMatrix:
+    """Growable float32 matrix of unit vectors with their message ids"""
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.matrix = np.zeros((1024, dimensions), dtype=np.float32)
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def reserve(self, rows: int) -> None:
+        if rows > len(self.matrix):
+            grown = np.zeros((rows, self.dimensions), dtype=np.float32)
+            grown[:len(self.ids)] = self.matrix[:len(self.ids)]
+            self.matrix = grown
+
+    def add(self, ids: List[str], vectors: np.ndarray) -> None:
+        needed = len(self.ids) + len(ids)
+        if needed > len(self.matrix):
+            self.reserve(max(needed, 2 * len(self.matrix)))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.matrix[len(self.ids):needed] = vectors / np.where(norms == 0, 1, norms)
+        self.ids.extend(ids)
+
+    def search(self, embedding: List[float], threshold: float, limit: int) -> List[tuple]:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if not self.ids or norm == 0:
+            return []
+        scores = self.matrix[:len(self.ids)] @ (query / norm)
+        hits = np.flatnonzero(scores >= threshold)
+        if len(hits) > limit:
+            hits = hits[np.argpartition(-scores[hits], limit)[:limit]]
+        hits = hits[np.argsort(-scores[hits])]
+        return [(self.ids[i], float(scores[i])) for i in hits]
+
+
+class MemoryGraph:
+    """In-memory answers to the repository's named Cypher queries"""
+
+    def __init__(self, dimensions: int):
+        self.threads: Dict[str, Dict[str, Any]] = {}
+        self.messages: Dict[str, Dict[str, Any]] = {}
+        self.thread_messages: Dict[str, List[str]] = {}
+        self.by_hash: Dict[str, List[str]] = {}
+        self.by_band: List[Dict[int, List[str]]] = [{} for _ in range(4)]
+        self.vectors = VectorMatrix(dimensions)
+        self._seeded_thread: Optional[str] = None
+        self.handlers: Dict[str, Callable[..., List[Dict[str, Any]]]] = {
+            "ThreadQueries.CREATE_THREAD": self._create_thread,
+            "ThreadQueries.GET_THREAD_VERSION": self._get_thread_version,
+            "ThreadQueries.GET_THREAD_ANALYTICS": self._get_thread_analytics,
+            "ThreadQueries.FIND_SIMILAR_THREADS": self._find_similar_threads,
+            "MessageQueries.THREAD_EXISTS": self._thread_exists,
+            "MessageQueries.FIND_DUPLICATE_CANDIDATES": self._find_duplicate_candidates,
+            "MessageQueries.FIND_DUPLICATE_CANDIDATES_BATCH": self._find_duplicate_candidates_batch,
+            "MessageQueries.CREATE_MESSAGE": self._create_message,
+            "MessageQueries.CREATE_DUPLICATE_MESSAGE": self._create_duplicate_message,
+            "MessageQueries.CREATE_MESSAGES_BATCH": self._create_messages_batch,
+            "MessageQueries.GET_RECENT_CONTEXT": self._get_recent_context,
+            "MessageQueries.GET_CONTEXT_AROUND_MESSAGE": self._get_context_around_message,
+            "MessageQueries.FIND_SIMILAR_MESSAGES": self._find_similar_messages,
+            "MessageQueries.GET_THREAD_MESSAGES": self._get_thread_messages,
+            "AnalysisQueries.THREAD_STATISTICS": self._thread_statistics,
+            "AnalysisQueries.THREAD_MESSAGES": self._analysis_thread_messages,
+        }
+
+    def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> MemoryResult:
+        name = query_name(query)
+        handler = self.handlers.get(name)
+        if handler is None:
+            raise NotImplementedError(f"MemoryGraph does not implement {name}")
+        return MemoryResult(handler(**{**(parameters or {}), **kwargs}))
+
+    # Seeding helpers
+
+    def add_thread(self, thread_id: str) -> None:
+        self.threads[thread_id] = {
+            "id": thread_id, "status": "active", "version": 0,
+            "created_at": now(), "updated_at": now()
+        }
+        self.thread_messages[thread_id] = []
+
+    def add_message(
+        self,
+        thread_id: str,
+        message_id: str,
+        content: str,
+        role: str,
+        created_at: DriverDateTime,
+        embedding: Optional[List[float]] = None,
+        content_hash: Optional[str] = None,
+        simhash: Optional[int] = None,
+        bands: Optional[List[int]] = None,
+        duplicate_of: Optional[str] = None,
+        distance: Optional[int] = None
+    ) -> None:
+        self.messages[message_id] = {
+            "id": message_id, "content": content, "role": role, "created_at": created_at,
+            "thread_id": thread_id, "embedding": embedding, "content_hash": content_hash,
+            "simhash": simhash, "duplicate_of": duplicate_of, "distance": distance
+        }
+        self.thread_messages[thread_id].append(message_id)
+        if embedding is not None:
+            self.vectors.add([message_id], np.asarray([embedding], dtype=np.float32))
+            self.by_hash.setdefault(content_hash, []).append(message_id)
+            for band, value in enumerate(bands or []):
+                self.by_band[band].setdefault(value, []).append(message_id)
+
+    def seed_vectors(self, thread_id: str, total: int, rng: np.random.Generator) -> None:
+        """Grow the vector index to ``total`` rows with random unit vectors.
+
+        Seeded rows get no message node up front; one is materialised under
+        ``thread_id`` if a search returns it.
+        """
+        self._seeded_thread = thread_id
+        start = len(self.vectors)
+        self.vectors.reserve(total)
+        for offset in range(start, total, 100_000):
+            end = min(offset + 100_000, total)
+            self.vectors.add(
+                [str(UUID(int=i + 1)) for i in range(offset, end)],
+                rng.standard_normal((end - offset, self.vectors.dimensions), dtype=np.float32)
+            )
+
+    def _message(self, message_id: str) -> Dict[str, Any]:
+        message = self.messages.get(message_id)
+        if message is None:
+            message = {
+                "id": message_id, "content": f"seeded message {message_id}", "role": "user",
+                "created_at": now(), "thread_id": self._seeded_thread, "embedding": None,
+                "duplicate_of": None
+            }
+        return message
+
+    def _bump(self, thread_id: str, count: int) -> int:
+        thread = self.threads[thread_id]
+        thread["version"] += count
+        thread["updated_at"] = now()
+        return thread["version"]
+
+    def _projection(self, message: Dict[str, Any], include_embedding: bool = False) -> Dict[str, Any]:
+        canonical = self.messages.get(message["duplicate_of"]) if message["duplicate_of"] else None
+        return {
+            "id": message["id"],
+            "content": message["content"],
+            "role": message["role"],
+            "created_at": message["created_at"],
+            "thread_id": message["thread_id"],
+            "embedding": (canonical or message)["embedding"] if include_embedding else None,
+            "metadata": {}
+        }
+
+    # Thread queries
+
+    def _create_thread(self, id: str, status: str) -> List[Dict[str, Any]]:
+        self.add_thread(id)
+        self.threads[id]["status"] = status
+        return [{"id": id}]
+
+    def _get_thread_version(self, thread_id: str) -> List[Dict[str, Any]]:
+        thread = self.threads.get(thread_id)
+        if thread is None:
+            return []
+        return [{
+            "version": thread["version"],
+            "updated_at": thread["updated_at"].epochMillis,
+            "message_count": len(self.thread_messages[thread_id])
+        }]
+
+    def _get_thread_analytics(self, thread_id: str) -> List[Dict[str, Any]]:
+        roles = [self.messages[m]["role"] for m in self.thread_messages.get(thread_id, [])]
+        return [{
+            "message_count": len(roles),
+            "user_messages": roles.count("user"),
+            "assistant_messages": roles.count("assistant"),
+            # No :NEXT relationships are ever written
+            "avg_response_time": None
+        }]
+
+    def _find_similar_threads(self, embedding, threshold: float, limit: int) -> List[Dict[str, Any]]:
+        seen: Dict[str, None] = {}
+        for message_id, _ in self.vectors.search(embedding, threshold, len(self.vectors)):
+            seen.setdefault(self._message(message_id)["thread_id"])
+            if len(seen) == limit:
+                break
+        return [{"id": thread_id} for thread_id in seen]
+
+    # Message queries
+
+    def _thread_exists(self, thread_id: str) -> List[Dict[str, Any]]:
+        return [{"count": int(thread_id in self.threads)}]
+
+    def _find_duplicate_candidates(self, content_hash, b0, b1, b2, b3, limit) -> List[Dict[str, Any]]:
+        candidates: Dict[str, None] = {}
+        for message_id in self.by_hash.get(content_hash, []):
+            candidates.setdefault(message_id)
+        for band, value in enumerate((b0, b1, b2, b3)):
+            for message_id in self.by_band[band].get(value, []):
+                candidates.setdefault(message_id)
+        return [
+            {
+                "id": message_id,
+                "content_hash": self.messages[message_id]["content_hash"],
+                "simhash": self.messages[message_id]["simhash"]
+            }
+            for message_id in list(candidates)[:limit]
+        ]
+
+    def _find_duplicate_candidates_batch(self, keys, limit) -> List[Dict[str, Any]]:
+        rows = []
+        for index, key in enumerate(keys):
+            candidates = self._find_duplicate_candidates(key["content_hash"], *key["bands"], limit)
+            if candidates:
+                rows.append({"index": index, "candidates": candidates})
+        return rows
+
+    def _previous(self, thread_id: str) -> Dict[str, Any]:
+        ids = self.thread_messages[thread_id]
+        last = self.messages[ids[-1]] if ids else None
+        return {
+            "previous_at": last["created_at"] if last else None,
+            "previous_role": last["role"] if last else None
+        }
+
+    def _create_message(self, id, content, role, thread_id, embedding, content_hash, simhash, bands) -> List[Dict[str, Any]]:
+        if thread_id not in self.threads:
+            return []
+        previous = self._previous(thread_id)
+        created_at = now()
+        self.add_message(thread_id, id, content, role, created_at, embedding, content_hash, simhash, bands)
+        return [{"id": id, "version": self._bump(thread_id, 1), "created_at": created_at, **previous}]
+
+    def _create_duplicate_message(self, id, content, role, thread_id, canonical_id, distance, include_embedding) -> List[Dict[str, Any]]:
+        if thread_id not in self.threads or canonical_id not in self.messages:
+            return []
+        previous = self._previous(thread_id)
+        created_at = now()
+        self.add_message(thread_id, id, content, role, created_at, duplicate_of=canonical_id, distance=distance)
+        embedding = self.messages[canonical_id]["embedding"] if include_embedding else None
+        return [{"embedding": embedding, "version": self._bump(thread_id, 1), "created_at": created_at, **previous}]
+
+    def _create_messages_batch(self, thread_id, canonical, duplicates) -> List[Dict[str, Any]]:
+        if thread_id not in self.threads:
+            return []
+        previous = self._previous(thread_id)
+        for row in canonical:
+            self.add_message(
+                thread_id, row["id"], row["content"], row["role"],
+                DriverDateTime(datetime.fromisoformat(row["created_at"])),
+                row["embedding"], row["content_hash"], row["simhash"], row["bands"]
+            )
+        # Like the MATCH on the canonical, skip duplicates whose canonical is gone
+        duplicates = [row for row in duplicates if row["canonical_id"] in self.messages]
+        for row in duplicates:
+            self.add_message(
+                thread_id, row["id"], row["content"], row["role"],
+                DriverDateTime(datetime.fromisoformat(row["created_at"])),
+                duplicate_of=row["canonical_id"], distance=row["distance"]
+            )
+        ids = [row["id"] for row in canonical + duplicates]
+        return [{"count": len(ids), "ids": ids, "version": self._bump(thread_id, len(ids)), **previous}]
+
+    def _get_recent_context(self, thread_id, limit, include_embedding) -> List[Dict[str, Any]]:
+        recent = self.thread_messages.get(thread_id, [])[-limit:]
+        return [
+            {"m": self._projection(self.messages[m], include_embedding)}
+            for m in reversed(recent)
+        ]
+
+    def _get_context_around_message(self, message_id, thread_id, window_seconds, include_embedding) -> List[Dict[str, Any]]:
+        center = self.messages.get(message_id)
+        if center is None or center["thread_id"] != thread_id:
+            return []
+        at = center["created_at"].value
+        return [
+            {"context": self._projection(self.messages[m], include_embedding)}
+            for m in self.thread_messages[thread_id]
+            if abs((self.messages[m]["created_at"].value - at).total_seconds()) <= window_seconds
+        ]
+
+    def _find_similar_messages(self, embedding, threshold, limit, include_embedding) -> List[Dict[str, Any]]:
+        return [
+            {"m": self._projection(self._message(message_id), include_embedding)}
+            for message_id, _ in self.vectors.search(embedding, threshold, limit)
+        ]
+
+    def _get_thread_messages(self, thread_id) -> List[Dict[str, Any]]:
+        return [
+            {"m": {key: value for key, value in self._projection(self.messages[m]).items()
+                   if key in ("id", "content", "role", "created_at", "thread_id")}}
+            for m in self.thread_messages.get(thread_id, [])
+        ]
+
+    # Analysis queries
+
+    def _thread_statistics(self, thread_id) -> List[Dict[str, Any]]:
+        messages = [self.messages[m] for m in self.thread_messages.get(thread_id, [])]
+        if not messages:
+            return []
+        roles = [m["role"] for m in messages]
+        return [{"stats": {
+            "message_count": len(messages),
+            "user_messages": roles.count("user"),
+            "assistant_messages": roles.count("assistant"),
+            "first_message_time": messages[0]["created_at"],
+            "last_message_time": messages[-1]["created_at"]
+        }}]
+
+    def _analysis_thread_messages(self, thread_id) -> List[Dict[str, Any]]:
+        return [
+            {"m": {
+                "role": self.messages[m]["role"],
+                "content": self.messages[m]["content"],
+                "created_at": self.messages[m]["created_at"]
+            }}
+            for m in self.thread_messages.get(thread_id, [])
+        ]
+
+
+class MemorySession:
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+
+    def execute_read(self, work, *args, **kwargs):
+        return work(self, *args, **kwargs)
+
+    execute_write = execute_read
+
+    def run(self, query, parameters=None, **kwargs) -> MemoryResult:
+        return self.graph.run(query, parameters, **kwargs)
+
+    def close(self) -> None:
+        return None
+
+
+class MemoryNeo4jService(Neo4jService):
+    """Neo4jService whose sessions are served by a MemoryGraph"""
+
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+
+    @contextmanager
+    def get_session(self, **config):
+        yield MemorySession(self.graph)
+
+    def close(self) -> None:
+        return None
+
+    def init_constraints(self, embedding_dimensions: Optional[int] = None) -> None:
+        return None
+
+
+class OfflineOpenAIService(OpenAIService):
+    """OpenAIService with deterministic local completions.
+
+    Topics are the most frequent longer words of the prompt and summaries a
+    fixed-length digest of it, so analysis output is stable between runs.
+    Embeddings are whatever EMBEDDING_MODEL selects; the suite uses hashing.
+    """
+
+    @staticmethod
+    def _answer(template: str, prompt: str) -> str:
+        words = Counter(word.strip(".,:;!?").lower() for word in prompt.split() if len(word) > 5)
+        if template == "topics":
+            return ", ".join(word for word, _ in words.most_common(3)) or "general"
+        return "Conversation about " + ", ".join(word for word, _ in words.most_common(8)) + "."
+
+    async def _complete(self, template: str, prompt: str, temperature: float, max_tokens: int, priority: str) -> str:
+        return self._answer(template, prompt)
+
+    async def _cached_stream(self, template: str, prompt: str, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        for delta in self._answer(template, prompt).split(" "):
+            yield delta + " "
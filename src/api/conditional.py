@@ -0,0 +1,33 @@
+import hashlib
+from typing import Any, Optional
+from fastapi import Request, Response, status
+from ..core.config import get_settings
+
+settings = get_settings()
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from version stamps and request parameters"""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match using weak comparison"""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in header.split(",")
+    )
+
+def cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": settings.THREAD_CACHE_CONTROL
+    }
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
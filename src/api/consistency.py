@@ -0,0 +1,34 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..core import consistency
+
+
+class BookmarkMiddleware:
+    """Carry Neo4j bookmarks between the client and the request's sessions.
+
+    Bookmarks sent in ``header`` (comma-separated or repeated) make this
+    request's reads wait until a follower has caught up with them. When the
+    request writes, the resulting bookmark is sent back in the same header
+    for the client to pass on its next read.
+    """
+
+    def __init__(self, app: ASGIApp, header: str):
+        self.app = app
+        self.header = header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        values = Headers(scope=scope).getlist(self.header)
+        state = consistency.start_request(
+            bookmark.strip() for value in values for bookmark in value.split(",") if bookmark.strip()
+        )
+
+        async def send_with_bookmark(message: Message) -> None:
+            if message["type"] == "http.response.start" and state.written:
+                MutableHeaders(scope=message)[self.header] = ",".join(state.bookmarks)
+            await send(message)
+
+        await self.app(scope, receive, send_with_bookmark)
@@ -1,8 +1,13 @@
-from typing import Generator
+from typing import Generator, Optional, Set
+from fastapi import HTTPException, Query
 from ..services.message_service import MessageService
 from ..services.thread_service import ThreadService
 from ..services.openai_service import OpenAIService
+from ..services.analysis_service import AnalysisService
+from ..services.job_service import JobQueue, get_job_queue as _get_job_queue
+from ..services.export_service import ExportService
 from ..db.neo4j import Neo4jService
+from ..core import consistency
 
 def get_neo4j_service() -> Generator[Neo4jService, None, None]:
     service = Neo4jService()
@@ -18,4 +23,33 @@ def get_thread_service() -> ThreadService:
     return ThreadService()
 
 def get_openai_service() -> OpenAIService:
-    return OpenAIService()
\ No newline at end of file
+    return OpenAIService()
+
+def get_analysis_service() -> AnalysisService:
+    return AnalysisService()
+
+def get_job_queue() -> JobQueue:
+    return _get_job_queue()
+
+def get_export_service() -> ExportService:
+    return ExportService()
+
+async def eventual_reads() -> None:
+    """Route dependency: reads may lag the client's bookmarks, sparing followers the wait"""
+    consistency.prefer_eventual()
+
+OPTIONAL_FIELDS = {"embedding"}
+
+def get_include_fields(
+    include: Optional[str] = Query(
+        default=None,
+        description="Comma-separated optional fields to return, e.g. 'embedding'"
+    )
+) -> Set[str]:
+    if not include:
+        return set()
+    fields = {field.strip() for field in include.split(",") if field.strip()}
+    unknown = fields - OPTIONAL_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include fields: {', '.join(sorted(unknown))}")
+    return fields
\ No newline at end of file
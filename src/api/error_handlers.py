@@ -5,7 +5,10 @@ from ..core.exceptions import (
     DatabaseConnectionError,
     EmbeddingGenerationError,
     ThreadNotFoundError,
-    MessageNotFoundError
+    MessageNotFoundError,
+    JobNotFoundError,
+    JobQueueFullError,
+    ProviderUnavailableError
 )
 
 async def context_manager_exception_handler(
@@ -29,6 +32,18 @@ async def context_manager_exception_handler(
         MessageNotFoundError: {
             "status_code": status.HTTP_404_NOT_FOUND,
             "message": "Message not found"
+        },
+        JobNotFoundError: {
+            "status_code": status.HTTP_404_NOT_FOUND,
+            "message": "Job not found"
+        },
+        JobQueueFullError: {
+            "status_code": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "message": "Job queue is full"
+        },
+        ProviderUnavailableError: {
+            "status_code": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "message": "Language model provider unavailable"
         }
     }
     
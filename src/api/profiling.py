@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+from uuid import uuid4
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+    return f"{module}.{name}".replace(";", ":").replace(" ", "_")
+
+
+class StackSampler:
+    """Sample one thread's Python stack on a timer into folded-stack counts.
+
+    The folded format (``outer;inner;leaf count`` per line) is what
+    flamegraph.pl, speedscope and inferno read.
+    """
+
+    def __init__(self, thread_id: int, interval_seconds: float):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.counts
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.counts[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+class ProfilingMiddleware:
+    """Profile a sample of requests, or any carrying PROFILE_HEADER.
+
+    Samples the event loop thread, so concurrent requests on the same worker
+    show up in the profile too; work pushed to other threads does not.
+    Profiles are written to PROFILE_DIR as
+    ``<time>-<route>-<thread id>-<profile id>.folded``, keeping the newest
+    PROFILE_MAX_FILES. Only installed when PROFILE_ENABLED is set.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.settings = get_settings()
+        self.header = self.settings.PROFILE_HEADER.lower().encode("latin-1")
+
+    def _wanted(self, scope: Scope) -> bool:
+        if any(name == self.header for name, _ in scope["headers"]):
+            return True
+        return random.random() < self.settings.PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex[:12]
+        sampler = StackSampler(threading.get_ident(), self.settings.PROFILE_INTERVAL_MS / 1000)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            await asyncio.to_thread(self._write, scope, profile_id, sampler)
+
+    def _write(self, scope: Scope, profile_id: str, sampler: StackSampler) -> None:
+        route = getattr(scope.get("route"), "path", "unmatched")
+        route_tag = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        thread_id = scope.get("path_params", {}).get("thread_id") or "-"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{route_tag}-{thread_id}-{profile_id}.folded"
+        directory = self.settings.PROFILE_DIR
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, name), "w") as f:
+                f.write(sampler.folded())
+            self._rotate(directory)
+        except OSError as e:
+            logger.warning(f"Failed to write profile {name}: {str(e)}")
+
+    def _rotate(self, directory: str) -> None:
+        profiles = sorted(
+            (entry for entry in os.scandir(directory) if entry.name.endswith(".folded")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in profiles[:max(len(profiles) - self.settings.PROFILE_MAX_FILES, 0)]:
+            os.remove(entry.path)
@@ -0,0 +1,29 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Serialize API content, including our models, with orjson"""
+    return orjson.dumps(
+        content,
+        default=_default,
+        option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    )
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by orjson straight from model attributes.
+
+    Return it directly from a route to bypass FastAPI's response_model
+    re-validation. Only use it for models built by our own services; the
+    response_model on the route is kept for the OpenAPI schema.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
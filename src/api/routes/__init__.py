@@ -1,5 +1,9 @@
 from .messages import router as messages_router
 from .threads import router as threads_router
+from .analysis import router as analysis_router
+from .jobs import router as jobs_router
 
 messages = messages_router
-threads = threads_router
\ No newline at end of file
+threads = threads_router
+analysis = analysis_router
+jobs = jobs_router
\ No newline at end of file
@@ -1,41 +1,175 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import JSONResponse
+from typing import List, Dict, Any, Awaitable, Callable, Optional
 from uuid import UUID
+from ...models.job import JobAccepted
 from ...services.analysis_service import AnalysisService
-from ...core.exceptions import ContextManagerException
-from ..deps import get_analysis_service
+from ...services.thread_service import ThreadService
+from ...services.job_service import JobQueue
+from ...services.analytics_cache import MISSING, get_analytics_cache, get_thread_versions
+from ...core.config import get_settings
+from ...core.constants import JobStatus
+from ...core.exceptions import ContextManagerException, JobQueueFullError
+from ..deps import eventual_reads, get_analysis_service, get_thread_service, get_job_queue
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
-@router.get("/thread/{thread_id}/stats")
+settings = get_settings()
+
+ACCEPTED_RESPONSE = {status.HTTP_202_ACCEPTED: {"model": JobAccepted}}
+
+async def _serve(
+    kind: str,
+    thread_id: UUID,
+    thread_service: ThreadService,
+    job_queue: JobQueue,
+    inline: Optional[Callable[[], Awaitable[Any]]] = None,
+    always_inline: bool = False
+) -> Any:
+    """Serve an analysis result for the current thread version.
+
+    Results are cached per (kind, thread id, thread version); a repeat request
+    for an unchanged thread is answered from memory. On a miss, cheap work runs
+    inline and expensive work goes to the job queue with a 202 response.
+    """
+    versions = get_thread_versions()
+    cache = get_analytics_cache()
+
+    info = None
+    version = versions.get(thread_id)
+    if version is None:
+        info = await thread_service.get_thread_version(thread_id)
+        version = info["version"]
+        versions.set(thread_id, version)
+
+    key = (kind, str(thread_id), version)
+    cached = cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    if inline is not None:
+        if not always_inline and info is None:
+            info = await thread_service.get_thread_version(thread_id)
+        if always_inline or info["message_count"] <= settings.ANALYSIS_ASYNC_MESSAGE_THRESHOLD:
+            result = await inline()
+            cache.set(key, result)
+            return result
+
+    job = job_queue.submit(kind, thread_id, version)
+    if job.status == JobStatus.COMPLETED:
+        cache.set(key, job.result)
+        return job.result
+
+    status_url = f"{settings.API_V1_STR}/jobs/{job.id}"
+    accepted = JobAccepted(job_id=job.id, status=job.status, status_url=status_url)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=accepted.model_dump(mode="json"),
+        headers={"Location": status_url}
+    )
+
+@router.get("/thread/{thread_id}/stats", dependencies=[Depends(eventual_reads)])
 async def get_thread_statistics(
     thread_id: UUID,
-    analysis_service: AnalysisService = Depends(get_analysis_service)
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+    thread_service: ThreadService = Depends(get_thread_service),
+    job_queue: JobQueue = Depends(get_job_queue)
 ) -> Dict[str, Any]:
     """Get comprehensive statistics for a thread"""
     try:
-        return await analysis_service.get_thread_analytics(thread_id)
+        return await _serve(
+            "thread_statistics",
+            thread_id,
+            thread_service,
+            job_queue,
+            inline=lambda: analysis_service.get_thread_analytics(thread_id),
+            always_inline=True
+        )
     except ContextManagerException as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/thread/{thread_id}/patterns")
+@router.get("/thread/{thread_id}/patterns", responses=ACCEPTED_RESPONSE, dependencies=[Depends(eventual_reads)])
 async def analyze_conversation_patterns(
     thread_id: UUID,
-    analysis_service: AnalysisService = Depends(get_analysis_service)
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+    thread_service: ThreadService = Depends(get_thread_service),
+    job_queue: JobQueue = Depends(get_job_queue)
 ) -> Dict[str, Any]:
     """Analyze conversation patterns and dynamics"""
     try:
-        return await analysis_service.analyze_conversation_patterns(thread_id)
+        return await _serve(
+            "conversation_patterns",
+            thread_id,
+            thread_service,
+            job_queue,
+            inline=lambda: analysis_service.analyze_conversation_patterns(thread_id)
+        )
+    except JobQueueFullError:
+        raise
     except ContextManagerException as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/thread/{thread_id}/topics")
+@router.get("/thread/{thread_id}/topics", responses=ACCEPTED_RESPONSE)
 async def get_topic_evolution(
     thread_id: UUID,
-    analysis_service: AnalysisService = Depends(get_analysis_service)
+    thread_service: ThreadService = Depends(get_thread_service),
+    job_queue: JobQueue = Depends(get_job_queue)
 ) -> List[Dict[str, Any]]:
     """Analyze how topics evolve throughout the conversation"""
     try:
-        return await analysis_service.get_topic_evolution(thread_id)
+        return await _serve("topic_evolution", thread_id, thread_service, job_queue)
+    except JobQueueFullError:
+        raise
+    except ContextManagerException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/thread/{thread_id}/summary", responses=ACCEPTED_RESPONSE)
+async def get_thread_summary(
+    thread_id: UUID,
+    thread_service: ThreadService = Depends(get_thread_service),
+    job_queue: JobQueue = Depends(get_job_queue)
+) -> Dict[str, Any]:
+    """Summarize a thread and extract its topics"""
+    try:
+        return await _serve("thread_summary", thread_id, thread_service, job_queue)
+    except JobQueueFullError:
+        raise
     except ContextManagerException as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/global/summary", dependencies=[Depends(eventual_reads)])
+async def get_global_summary(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: str = "day",
+    analysis_service: AnalysisService = Depends(get_analysis_service)
+) -> Dict[str, Any]:
+    """Corpus-wide totals read from the hourly or daily rollups"""
+    try:
+        return await analysis_service.get_global_summary(start, end, granularity)
+    except ContextManagerException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/global/rebuild")
+async def rebuild_global_rollups(
+    analysis_service: AnalysisService = Depends(get_analysis_service)
+) -> Dict[str, Any]:
+    """Recompute the rollups from stored messages, e.g. after an import"""
+    try:
+        return await analysis_service.rebuild_global_rollups()
+    except ContextManagerException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/global/{granularity}", dependencies=[Depends(eventual_reads)])
+async def get_global_buckets(
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    analysis_service: AnalysisService = Depends(get_analysis_service)
+) -> List[Dict[str, Any]]:
+    """Corpus-wide activity per hour or day bucket"""
+    try:
+        return await analysis_service.get_global_buckets(granularity, start, end)
+    except ContextManagerException as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from uuid import UUID
+from ...models.job import Job
+from ...services.job_service import JobQueue
+from ..deps import get_job_queue
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/{job_id}", response_model=Job, operation_id="get_job_status")
+async def get_job(
+    job_id: UUID,
+    job_queue: JobQueue = Depends(get_job_queue)
+) -> Job:
+    """Poll the status and result of a background job"""
+    return job_queue.get(job_id)
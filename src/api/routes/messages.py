@@ -1,48 +1,124 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from typing import List, Dict, Any, Set
 from uuid import UUID
 from ...models.message import Message, MessageCreate
 from ...services.message_service import MessageService
-from ...core.exceptions import ContextManagerException
-from ..deps import get_message_service
+from ...services.thread_service import ThreadService
+from ...services.ingest_service import IngestSession
+from ...core.exceptions import ContextManagerException, ThreadNotFoundError
+from ..deps import eventual_reads, get_message_service, get_thread_service, get_include_fields
+from ..responses import FastJSONResponse
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
 @router.post("/", response_model=Message, operation_id="create_new_message")
 async def create_message(
     message: MessageCreate,
+    include: Set[str] = Depends(get_include_fields),
     message_service: MessageService = Depends(get_message_service)
 ) -> Message:
     """Create a new message in a thread"""
     try:
-        return await message_service.create_message(message)
+        return FastJSONResponse(await message_service.create_message(
+            message,
+            include_embedding="embedding" in include
+        ))
     except ContextManagerException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create message: {str(e)}")
 
+@router.websocket("/ws/{thread_id}")
+async def ingest_messages(
+    websocket: WebSocket,
+    thread_id: UUID,
+    message_service: MessageService = Depends(get_message_service),
+    thread_service: ThreadService = Depends(get_thread_service)
+):
+    """Accept a continuous stream of messages for a thread and ack them in batches"""
+    await websocket.accept()
+    try:
+        await thread_service.get_thread_version(thread_id)
+    except ThreadNotFoundError as e:
+        await websocket.close(code=4404, reason=str(e))
+        return
+
+    session = IngestSession(thread_id, message_service, websocket.send_json)
+    session.start()
+    try:
+        while True:
+            received = await websocket.receive()
+            if received["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(received.get("code", 1000), received.get("reason"))
+            try:
+                # Binary frames carry the same UTF-8 JSON as text frames
+                text = received.get("text")
+                frame = orjson.loads(text if text is not None else received.get("bytes") or b"")
+            except orjson.JSONDecodeError as e:
+                await websocket.send_json({"type": "error", "ref": None, "detail": str(e)})
+                continue
+            ref = frame.get("ref") if isinstance(frame, dict) else None
+            try:
+                message = MessageCreate.model_validate({**frame, "thread_id": thread_id})
+            except (TypeError, ValidationError) as e:
+                await websocket.send_json({"type": "error", "ref": ref, "detail": str(e)})
+                continue
+            await session.push(ref, message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await session.close()
+
+@router.get("/dedup/report", operation_id="get_dedup_report", dependencies=[Depends(eventual_reads)])
+async def get_dedup_report(
+    message_service: MessageService = Depends(get_message_service)
+) -> Dict[str, Any]:
+    """Report embedding calls and vector storage saved by duplicate detection"""
+    try:
+        return await message_service.get_dedup_report()
+    except ContextManagerException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/{message_id}", response_model=Message, operation_id="get_message_by_id")
 async def get_message(
     message_id: UUID,
+    include: Set[str] = Depends(get_include_fields),
     message_service: MessageService = Depends(get_message_service)
 ) -> Message:
     """Get a specific message by ID"""
     try:
-        message = await message_service.get_message(message_id)
+        message = await message_service.get_message(
+            message_id,
+            include_embedding="embedding" in include
+        )
         if not message:
             raise HTTPException(status_code=404, detail="Message not found")
-        return message
+        return FastJSONResponse(message)
     except ContextManagerException as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/similar/", response_model=List[Message], operation_id="find_similar_messages_content")
+@router.get(
+    "/similar/",
+    response_model=List[Message],
+    operation_id="find_similar_messages_content",
+    dependencies=[Depends(eventual_reads)]
+)
 async def find_similar_messages(
     content: str = Query(..., description="Content to find similar messages for"),
     limit: int = Query(default=5, le=20),
+    include_archived: bool = Query(default=False, description="Also scan archived threads in the cold tier"),
+    include: Set[str] = Depends(get_include_fields),
     message_service: MessageService = Depends(get_message_service)
 ) -> List[Message]:
     """Find messages similar to the provided content"""
     try:
-        return await message_service.get_similar_messages(content, limit)
+        return FastJSONResponse(await message_service.get_similar_messages(
+            content,
+            limit,
+            include_embedding="embedding" in include,
+            include_archived=include_archived
+        ))
     except ContextManagerException as e:
         raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
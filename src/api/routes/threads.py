@@ -1,12 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional, Set
 from uuid import UUID
-from ...models.thread import Thread, ThreadCreate, ThreadSummary
+from ...models.thread import Thread, ThreadCreate, ThreadStatusUpdate, ThreadSummary
 from ...models.message import Message
 from ...services.thread_service import ThreadService
 from ...services.message_service import MessageService
-from ...core.exceptions import ContextManagerException
-from ..deps import get_thread_service, get_message_service
+from ...services.export_service import ExportService
+from ...core.exceptions import ContextManagerException, ThreadNotFoundError
+from ..deps import eventual_reads, get_thread_service, get_message_service, get_export_service, get_include_fields
+from ..conditional import make_etag, etag_matches, cache_headers, not_modified
+from ..responses import FastJSONResponse
+from ..sse import EventSourceResponse, sse_event
 
 router = APIRouter(prefix="/threads", tags=["threads"])
 
@@ -21,30 +26,150 @@ async def create_thread(
     except ContextManagerException as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+NDJSON = "application/x-ndjson"
+
+@router.get(
+    "/export",
+    operation_id="export_all_threads",
+    response_class=StreamingResponse,
+    dependencies=[Depends(eventual_reads)]
+)
+async def export_all_threads(
+    include: Set[str] = Depends(get_include_fields),
+    export_service: ExportService = Depends(get_export_service)
+) -> StreamingResponse:
+    """Stream every thread and message as NDJSON"""
+    return StreamingResponse(
+        export_service.export_all(include_embedding="embedding" in include),
+        media_type=NDJSON
+    )
+
+@router.post("/import", operation_id="import_threads")
+async def import_threads(
+    request: Request,
+    export_service: ExportService = Depends(get_export_service)
+) -> Dict[str, Any]:
+    """Import threads and messages from a streamed NDJSON export"""
+    try:
+        return await export_service.import_stream(request.stream())
+    except ContextManagerException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{thread_id}/export", operation_id="export_thread", response_class=StreamingResponse)
+async def export_thread(
+    thread_id: UUID,
+    include: Set[str] = Depends(get_include_fields),
+    export_service: ExportService = Depends(get_export_service)
+) -> StreamingResponse:
+    """Stream a thread and its messages as NDJSON"""
+    try:
+        lines = export_service.export_thread(thread_id, include_embedding="embedding" in include)
+    except ContextManagerException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(lines, media_type=NDJSON)
+
+@router.get("/{thread_id}/summary/stream", operation_id="stream_thread_summary")
+async def stream_thread_summary(
+    thread_id: UUID,
+    thread_service: ThreadService = Depends(get_thread_service)
+) -> EventSourceResponse:
+    """Stream a thread summary and its topics as server-sent events"""
+    async def events():
+        try:
+            async for event, data in thread_service.stream_thread_summary(thread_id):
+                yield sse_event(event, data)
+        except ContextManagerException as e:
+            yield sse_event("error", {"detail": str(e)})
+
+    return EventSourceResponse(events())
+
+@router.get("/{thread_id}/context/stream", operation_id="stream_thread_context")
+async def stream_thread_context(
+    thread_id: UUID,
+    message_id: Optional[UUID] = None,
+    window_size: Optional[int] = Query(default=None, le=50),
+    include: Set[str] = Depends(get_include_fields),
+    message_service: MessageService = Depends(get_message_service)
+) -> EventSourceResponse:
+    """Stream thread context messages as server-sent events"""
+    def events():
+        count = 0
+        for message in message_service.stream_thread_context(
+            thread_id,
+            message_id,
+            window_size,
+            include_embedding="embedding" in include
+        ):
+            count += 1
+            yield sse_event("message", message)
+        yield sse_event("done", {"count": count})
+
+    return EventSourceResponse(events())
+
 @router.get("/{thread_id}/context", response_model=List[Message], operation_id="get_thread_context")
 async def get_thread_context(
     thread_id: UUID,
+    request: Request,
     message_id: Optional[UUID] = None,
     window_size: Optional[int] = Query(default=None, le=50),
-    message_service: MessageService = Depends(get_message_service)
+    include: Set[str] = Depends(get_include_fields),
+    message_service: MessageService = Depends(get_message_service),
+    thread_service: ThreadService = Depends(get_thread_service)
 ) -> List[Message]:
     """Get context from a thread, optionally around a specific message"""
     try:
-        return await message_service.get_thread_context(
+        # An unknown thread has no version to validate against; it answers
+        # from the read path like before, without a validator
+        etag = None
+        try:
+            stamp = await thread_service.get_thread_version(thread_id)
+        except ThreadNotFoundError:
+            stamp = None
+        if stamp is not None:
+            etag = make_etag(
+                "context", thread_id, stamp["version"], stamp["updated_at"],
+                message_id, window_size, sorted(include)
+            )
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+        messages = await message_service.get_thread_context(
             thread_id,
             message_id,
-            window_size
+            window_size,
+            include_embedding="embedding" in include
         )
+        return FastJSONResponse(messages, headers=cache_headers(etag) if etag else None)
+    except ContextManagerException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.patch("/{thread_id}/status", response_model=Thread, operation_id="update_thread_status")
+async def update_thread_status(
+    thread_id: UUID,
+    update: ThreadStatusUpdate,
+    thread_service: ThreadService = Depends(get_thread_service)
+) -> Thread:
+    """Archive a thread into the cold tier, or reactivate and rehydrate it"""
+    try:
+        return await thread_service.update_thread_status(thread_id, update.status)
     except ContextManagerException as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{thread_id}", response_model=Thread, operation_id="get_thread_by_id")
 async def get_thread(
     thread_id: UUID,
+    request: Request,
+    response: Response,
     thread_service: ThreadService = Depends(get_thread_service)
 ) -> Thread:
     """Get thread details"""
     try:
+        stamp = await thread_service.get_thread_version(thread_id)
+        etag = make_etag("thread", thread_id, stamp["version"], stamp["updated_at"])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response.headers.update(cache_headers(etag))
         return await thread_service.get_thread(thread_id)
     except ContextManagerException as e:
         raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
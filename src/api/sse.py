@@ -0,0 +1,23 @@
+from typing import Any, AsyncIterator, Iterator, Union
+from fastapi.responses import StreamingResponse
+from .responses import dumps
+
+def sse_event(event: str, data: Any) -> bytes:
+    """Format one server-sent event with a JSON payload"""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+
+class EventSourceResponse(StreamingResponse):
+    """Streaming response for server-sent events.
+
+    Disables proxy buffering so each event reaches the client as soon as it
+    is yielded.
+    """
+    media_type = "text/event-stream"
+
+    def __init__(self, content: Union[Iterator[bytes], AsyncIterator[bytes]], **kwargs):
+        headers = {
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            **kwargs.pop("headers", {})
+        }
+        super().__init__(content, headers=headers, **kwargs)
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     # API Config
@@ -10,15 +11,104 @@ class Settings(BaseSettings):
     NEO4J_URI: str
     NEO4J_USER: str
     NEO4J_PASSWORD: str
+    # Reads wait for client bookmarks ("causal") or may lag the leader ("eventual")
+    NEO4J_READ_CONSISTENCY: str = "causal"
+    NEO4J_BOOKMARK_HEADER: str = "X-Neo4j-Bookmark"
+    
+    # Storage Config
+    # STORAGE_BACKEND is "neo4j" or "embedded" (in-process, single worker only)
+    STORAGE_BACKEND: str = "neo4j"
+    EMBEDDED_DATA_DIR: str = ".data/embedded"
+    EMBEDDED_FSYNC: bool = True
+    EMBEDDED_CHECKPOINT_BYTES: int = 67108864
     
     # OpenAI Config
-    OPENAI_API_KEY: str
+    # Optional with a local EMBEDDING_MODEL; topics and summaries still need it
+    OPENAI_API_KEY: Optional[str] = None
     EMBEDDING_MODEL: str = "text-embedding-ada-002"
     COMPLETION_MODEL: str = "gpt-3.5-turbo"
+
+    # Embedding Config
+    # EMBEDDING_MODEL may also be "hashing" or "local:<sentence-transformers model>"
+    EMBEDDING_DIMENSIONS: Optional[int] = None
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_THREADS: int = 2
     
     # Performance Config
     SIMILARITY_THRESHOLD: float = 0.8
     CONTEXT_WINDOW_SIZE: int = 10
+
+    # Dedup Config
+    DEDUP_ENABLED: bool = True
+    DEDUP_MAX_HAMMING_DISTANCE: int = 3
+    DEDUP_MAX_CANDIDATES: int = 50
+
+    # Background Job Config
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_SIZE: int = 100
+    JOB_RETENTION: int = 1000
+    ANALYSIS_ASYNC_MESSAGE_THRESHOLD: int = 100
+
+    # Analytics Cache Config
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 1024
+    ANALYSIS_CACHE_TTL_SECONDS: float = 3600
+    THREAD_VERSION_TTL_SECONDS: float = 5
+
+    # HTTP Caching Config
+    THREAD_CACHE_CONTROL: str = "private, no-cache"
+
+    # Export/Import Config
+    EXPORT_PAGE_SIZE: int = 500
+    IMPORT_CHUNK_SIZE: int = 500
+
+    # Cold Tier Config
+    # Archived threads move out of hot storage into compressed segment files
+    COLD_TIER_ENABLED: bool = True
+    COLD_TIER_DIR: str = ".data/cold"
+    COLD_TIER_COMPRESS_LEVEL: int = 6
+
+    # Streaming Config
+    STREAM_FETCH_SIZE: int = 50
+
+    # WebSocket Ingest Config
+    INGEST_BATCH_SIZE: int = 64
+    INGEST_BATCH_MAX_WAIT_MS: int = 50
+    INGEST_MAX_PENDING: int = 256
+
+    # OpenAI Scheduler Config
+    OPENAI_SCHEDULER_ENABLED: bool = True
+    OPENAI_EMBEDDING_RPM: int = 3000
+    OPENAI_EMBEDDING_TPM: int = 1000000
+    OPENAI_COMPLETION_RPM: int = 3500
+    OPENAI_COMPLETION_TPM: int = 90000
+    OPENAI_MAX_RETRIES: int = 3
+    OPENAI_QUEUE_TIMEOUT_SECONDS: float = 30
+    OPENAI_BREAKER_FAILURE_THRESHOLD: int = 5
+    OPENAI_BREAKER_RESET_SECONDS: float = 30
+
+    # Completion Cache Config
+    COMPLETION_CACHE_ENABLED: bool = True
+    COMPLETION_CACHE_MAX_ENTRIES: int = 2048
+    COMPLETION_CACHE_TTL_SECONDS: float = 604800
+    COMPLETION_CACHE_PATH: str = ".cache/completions.sqlite3"
+
+    # Metrics Config
+    METRICS_ENABLED: bool = True
+
+    # Profiling Config
+    PROFILE_ENABLED: bool = False
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_HEADER: str = "X-Profile"
+    PROFILE_INTERVAL_MS: float = 5
+    PROFILE_DIR: str = ".cache/profiles"
+    PROFILE_MAX_FILES: int = 200
+
+    # Rollup Config
+    # Hourly and daily corpus-wide aggregates behind /analysis/global
+    ROLLUPS_ENABLED: bool = True
+    ROLLUP_FLUSH_SECONDS: float = 10
+    ROLLUP_PROCESSES: int = 0
+    ROLLUP_SCAN_CHUNK: int = 50000
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,60 @@
+from contextvars import ContextVar
+from typing import Iterable, List, Optional
+from .config import get_settings
+
+CAUSAL = "causal"
+EVENTUAL = "eventual"
+
+
+class RequestConsistency:
+    """Bookmarks and read consistency for one request.
+
+    Reads wait for the bookmarks the client sent, or for writes made
+    earlier in the same request, unless the route opted into eventual
+    consistency. Writes always chain after the known bookmarks and
+    replace them with the bookmark they produce.
+    """
+
+    def __init__(self, bookmarks: List[str], mode: str):
+        self.bookmarks = bookmarks
+        self.mode = mode
+        self.written = False
+
+
+# Shared by reference so sessions opened on worker threads update the same state
+_current: ContextVar[Optional[RequestConsistency]] = ContextVar("consistency", default=None)
+
+
+def start_request(bookmarks: Iterable[str]) -> RequestConsistency:
+    """Begin tracking bookmarks for the current request"""
+    state = RequestConsistency(sorted(set(bookmarks)), get_settings().NEO4J_READ_CONSISTENCY)
+    _current.set(state)
+    return state
+
+
+def prefer_eventual() -> None:
+    """Let this request's reads skip waiting for bookmarks"""
+    state = _current.get()
+    if state is not None:
+        state.mode = EVENTUAL
+
+
+def read_bookmarks() -> List[str]:
+    state = _current.get()
+    if state is None or state.mode == EVENTUAL:
+        return []
+    return state.bookmarks
+
+
+def write_bookmarks() -> List[str]:
+    state = _current.get()
+    return state.bookmarks if state is not None else []
+
+
+def note_write(bookmarks: Iterable[str]) -> None:
+    """Remember the bookmark of a write session; it supersedes the ones it started from"""
+    bookmarks = sorted(bookmarks)
+    state = _current.get()
+    if state is not None and bookmarks:
+        state.bookmarks = bookmarks
+        state.written = True
@@ -4,4 +4,14 @@ class MessageRole:
 
 class ThreadStatus:
     ACTIVE = "active"
-    ARCHIVED = "archived"
\ No newline at end of file
+    ARCHIVED = "archived"
+
+class JobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class RequestPriority:
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
\ No newline at end of file
@@ -16,4 +16,16 @@ class ThreadNotFoundError(ContextManagerException):
 
 class MessageNotFoundError(ContextManagerException):
     """Raised when a message cannot be found"""
+    pass
+
+class JobNotFoundError(ContextManagerException):
+    """Raised when a background job cannot be found"""
+    pass
+
+class JobQueueFullError(ContextManagerException):
+    """Raised when the background job queue is at capacity"""
+    pass
+
+class ProviderUnavailableError(ContextManagerException):
+    """Raised when OpenAI is failing or its rate limit budget cannot be met in time"""
     pass
\ No newline at end of file
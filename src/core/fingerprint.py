@@ -0,0 +1,55 @@
+import hashlib
+import re
+from typing import List
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_content(text: str) -> str:
+    """Lowercase and collapse whitespace so trivial variations hash the same"""
+    return " ".join(text.lower().split())
+
+
+def content_hash(text: str) -> str:
+    """Exact fingerprint of normalized content"""
+    return hashlib.sha256(normalize_content(text).encode("utf-8")).hexdigest()
+
+
+def _shingles(text: str, size: int = 3) -> List[str]:
+    tokens = _TOKEN_RE.findall(normalize_content(text))
+    if len(tokens) <= size:
+        return tokens or [normalize_content(text)]
+    return [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word 3-shingles, returned as a signed int64 for Neo4j"""
+    weights = [0] * SIMHASH_BITS
+    for shingle in _shingles(text):
+        digest = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if digest >> bit & 1 else -1
+
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def simhash_bands(value: int) -> List[int]:
+    """Split a SimHash into bands; any two hashes within
+    SIMHASH_BANDS - 1 bits of each other share at least one band"""
+    unsigned = value & ((1 << SIMHASH_BITS) - 1)
+    mask = (1 << _BAND_BITS) - 1
+    return [(unsigned >> (i * _BAND_BITS)) & mask for i in range(SIMHASH_BANDS)]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two SimHashes"""
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count("1")
@@ -0,0 +1,88 @@
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+from prometheus_client import Histogram
+from .config import get_settings
+
+# Stages recorded while serving the current request: (kind, name, seconds)
+_stages: ContextVar[Optional[List[Tuple[str, str, float]]]] = ContextVar("stages", default=None)
+_NOOP = nullcontext()
+
+enabled = get_settings().METRICS_ENABLED
+
+NEO4J_SECONDS = Histogram(
+    "comagraph_neo4j_query_seconds",
+    "Neo4j transaction latency by query",
+    ["query"]
+)
+OPENAI_SECONDS = Histogram(
+    "comagraph_openai_request_seconds",
+    "Embedding and completion request latency by model",
+    ["model", "operation"]
+)
+OPENAI_QUEUE_WAIT_SECONDS = Histogram(
+    "comagraph_openai_queue_wait_seconds",
+    "Time OpenAI calls wait for rate limit budget",
+    ["model", "priority"]
+)
+EMBEDDED_SECONDS = Histogram(
+    "comagraph_embedded_op_seconds",
+    "Embedded storage backend latency by repository operation",
+    ["operation"]
+)
+HTTP_SECONDS = Histogram(
+    "comagraph_http_request_seconds",
+    "Request latency by route",
+    ["method", "route", "status"]
+)
+
+_HISTOGRAMS = {"neo4j": NEO4J_SECONDS, "embedded": EMBEDDED_SECONDS, "openai": OPENAI_SECONDS}
+
+
+def start_request() -> List[Tuple[str, str, float]]:
+    """Begin collecting stages for Server-Timing in the current context"""
+    stages: List[Tuple[str, str, float]] = []
+    _stages.set(stages)
+    return stages
+
+
+def record(kind: str, labels: Tuple[str, ...], seconds: float) -> None:
+    _HISTOGRAMS[kind].labels(*labels).observe(seconds)
+    stages = _stages.get()
+    if stages is not None:
+        stages.append((kind, labels[0], seconds))
+
+
+@contextmanager
+def _timed(kind: str, labels: Tuple[str, ...]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(kind, labels, time.perf_counter() - start)
+
+
+def stage(kind: str, *labels: str):
+    """Time a block as a storage or OpenAI stage; a shared no-op when metrics are off"""
+    if not enabled:
+        return _NOOP
+    return _timed(kind, labels)
+
+
+def observe_queue_wait(model: str, priority: str, seconds: float) -> None:
+    if enabled:
+        OPENAI_QUEUE_WAIT_SECONDS.labels(model, priority).observe(seconds)
+
+
+def server_timing(stages: List[Tuple[str, str, float]], total: float) -> str:
+    """Format stages as a Server-Timing header value, in milliseconds"""
+    entries = []
+    spent = 0.0
+    for kind, name, seconds in stages:
+        spent += seconds
+        entries.append(f'{kind};desc="{name}";dur={seconds * 1000:.1f}')
+    # Whatever is not storage or OpenAI: validation, serialization, Python
+    entries.append(f"app;dur={max(total - spent, 0) * 1000:.1f}")
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
@@ -0,0 +1,974 @@
+import fcntl
+import functools
+import logging
+import os
+import shutil
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import orjson
+from ..core import metrics
+from ..core.exceptions import DatabaseConnectionError
+from ..core.fingerprint import SIMHASH_BANDS, simhash_bands
+from .repository import EMBEDDED_BACKEND, Repository
+
+logger = logging.getLogger(__name__)
+
+WAL_FILE = "wal.log"
+# The log being folded into a snapshot by a checkpoint
+ROTATED_WAL_FILE = "wal.log.1"
+SNAPSHOT_FILE = "snapshot.json"
+VECTOR_FILE = "embeddings.f32"
+VECTOR_META_FILE = "embeddings.json"
+LOCK_FILE = "LOCK"
+
+# Message columns, in EmbeddedStore._append_row argument order
+COLUMNS = (
+    "id", "content", "role", "thread_id", "created_at",
+    "vector", "content_hash", "simhash", "duplicate_of", "distance"
+)
+
+
+def _timestamp(value: Any) -> float:
+    """Epoch seconds from a datetime, driver DateTime or ISO string; naive means UTC"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+class VectorFile:
+    """Float32 embedding matrix in a memory-mapped file, grown by doubling.
+
+    Rows are only ever appended. The owning store decides how many rows are
+    live from its log, so rows written ahead of a crash are simply reused.
+    """
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, VECTOR_FILE)
+        self.meta_path = os.path.join(directory, VECTOR_META_FILE)
+        self.dimensions: Optional[int] = None
+        self.count = 0
+        self.matrix: Optional[np.memmap] = None
+        self.norms = np.zeros(0, dtype=np.float32)
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "rb") as f:
+                self.dimensions = orjson.loads(f.read())["dimensions"]
+            self._map(os.path.getsize(self.path) // (4 * self.dimensions))
+
+    def _map(self, capacity: int) -> None:
+        self.matrix = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dimensions))
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self.matrix is None else self.matrix.shape[0]
+
+    def load(self, count: int) -> None:
+        """Adopt ``count`` live rows after recovery and compute their norms"""
+        self.count = count
+        self.norms = np.zeros(max(count, 1024), dtype=np.float32)
+        for start in range(0, count, 100_000):
+            end = min(start + 100_000, count)
+            self.norms[start:end] = np.linalg.norm(self.matrix[start:end], axis=1)
+
+    def _reserve(self, rows: int) -> None:
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, 2 * self.capacity, 1024)
+        if self.matrix is not None:
+            self.matrix.flush()
+        with open(self.path, "ab") as f:
+            f.truncate(capacity * self.dimensions * 4)
+        self._map(capacity)
+        if capacity > len(self.norms):
+            norms = np.zeros(capacity, dtype=np.float32)
+            norms[:self.count] = self.norms[:self.count]
+            self.norms = norms
+
+    def write(self, vectors: np.ndarray) -> int:
+        """Write rows after the live ones without publishing them; returns the first row"""
+        if self.dimensions is None:
+            self.dimensions = vectors.shape[1]
+            with open(self.path, "wb"):
+                pass
+            with open(self.meta_path, "wb") as f:
+                f.write(orjson.dumps({"dimensions": self.dimensions}))
+        elif vectors.shape[1] != self.dimensions:
+            raise ValueError(f"Embedding has {vectors.shape[1]} dimensions, the store holds {self.dimensions}")
+        start = self.count
+        self._reserve(start + len(vectors))
+        self.matrix[start:start + len(vectors)] = vectors
+        return start
+
+    def publish(self, end: int) -> None:
+        """Make rows up to ``end`` live once their log record is durable"""
+        if end > self.count:
+            self.norms[self.count:end] = np.linalg.norm(self.matrix[self.count:end], axis=1)
+            self.count = end
+
+    def flush(self) -> None:
+        if self.matrix is not None:
+            self.matrix.flush()
+
+    def get(self, row: int) -> List[float]:
+        return self.matrix[row].astype(float).tolist()
+
+    def scores(self, embedding: List[float]) -> np.ndarray:
+        """Cosine similarity of every live row to ``embedding``"""
+        count = self.count
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if count == 0 or norm == 0 or len(query) != self.dimensions:
+            return np.zeros(0, dtype=np.float32)
+        norms = self.norms[:count]
+        return (self.matrix[:count] @ query) / np.where(norms == 0, 1, norms * norm)
+
+
+class EmbeddedStore:
+    """Single-process, append-only columnar store for threads, messages, jobs and rollups.
+
+    Messages live in parallel column arrays indexed by row number, with a
+    sorted row list per thread and hash/band indexes for dedup. Embeddings go
+    to a memory-mapped float32 matrix. Every change is appended to a
+    write-ahead log before it is applied; on open the last snapshot is loaded
+    and the log replayed. Once the log passes ``checkpoint_bytes`` a
+    background thread rotates it, snapshots the columns and deletes the
+    rotated log. Log records carry a sequence number and the snapshot the
+    last one it contains, so records are never applied twice if a crash
+    lands between the two. Dropped messages stay in
+    the columns as dead rows until the next snapshot leaves them out; their
+    embedding rows are never reused.
+
+    A lock file keeps a second process from opening the same directory.
+    """
+
+    def __init__(self, directory: str, fsync: bool = True, checkpoint_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.fsync = fsync
+        self.checkpoint_bytes = checkpoint_bytes
+        self._lock = threading.RLock()
+        self._checkpoint_lock = threading.Lock()
+        self._checkpointing = False
+        self.sequence = 0
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, LOCK_FILE), "a+")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise DatabaseConnectionError(f"Embedded store {directory} is open in another process")
+
+        # Message columns
+        self.ids: List[str] = []
+        self.thread_of: List[str] = []
+        self.contents: List[str] = []
+        self.roles: List[str] = []
+        self.created = array("d")
+        self.vector_row = array("q")
+        self.hashes: List[Optional[str]] = []
+        self.simhashes: List[Optional[int]] = []
+        self.duplicate_of = array("q")
+        self.distances: List[Optional[int]] = []
+
+        self.row_of: Dict[str, int] = {}
+        self.thread_rows: Dict[str, List[int]] = {}
+        self.vector_owner: List[int] = []
+        self.by_hash: Dict[str, List[int]] = {}
+        self.by_band: List[Dict[int, List[int]]] = [{} for _ in range(SIMHASH_BANDS)]
+        self.threads: Dict[str, Dict[str, Any]] = {}
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.rollups: Dict[str, Dict[str, Any]] = {}
+
+        self.vectors = VectorFile(directory)
+        self.wal_path = os.path.join(directory, WAL_FILE)
+        self.rotated_wal_path = os.path.join(directory, ROTATED_WAL_FILE)
+        self._recover()
+        self._wal = open(self.wal_path, "ab")
+
+    # Recovery and durability
+
+    def _recover(self) -> None:
+        vector_count = 0
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "rb") as f:
+                snapshot = orjson.loads(f.read())
+            self.threads = snapshot["threads"]
+            self.jobs = snapshot["jobs"]
+            self.rollups = snapshot.get("rollups", {})
+            self.sequence = snapshot.get("sequence", 0)
+            vector_count = snapshot["vector_count"]
+            columns = snapshot["messages"]
+            for values in zip(*(columns[column] for column in COLUMNS)):
+                self._append_row(*values)
+
+        replayed = 0
+        # A rotated log is left behind when a checkpoint did not finish
+        for path in (self.rotated_wal_path, self.wal_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                good = 0
+                for line in f:
+                    try:
+                        sequence, op, payload = orjson.loads(line)
+                    except (orjson.JSONDecodeError, ValueError):
+                        break
+                    if not line.endswith(b"\n"):
+                        break
+                    good += len(line)
+                    # Already in the snapshot, or repeated by an interrupted rotation
+                    if sequence <= self.sequence:
+                        continue
+                    vector_count = max(vector_count, self._apply(op, payload))
+                    self.sequence = sequence
+                    replayed += 1
+            # Drop a torn record left by a crash mid-append
+            if good < os.path.getsize(path):
+                logger.warning(f"Truncating torn write-ahead log tail in {path}")
+                with open(path, "ab") as f:
+                    f.truncate(good)
+
+        if self.vectors.dimensions is not None:
+            self.vectors.load(vector_count)
+        logger.info(
+            f"Opened embedded store {self.directory}: {len(self.threads)} threads, "
+            f"{len(self.ids)} messages, {replayed} log records replayed"
+        )
+
+    def _log(self, op: str, payload: Dict[str, Any]) -> int:
+        sequence = self.sequence + 1
+        self._wal.write(orjson.dumps([sequence, op, payload]) + b"\n")
+        self._wal.flush()
+        if self.fsync:
+            os.fsync(self._wal.fileno())
+        return sequence
+
+    def _commit(self, op: str, payload: Dict[str, Any]) -> None:
+        """Log a change, then apply it"""
+        self.sequence = self._log(op, payload)
+        self._apply(op, payload)
+        if self._wal.tell() >= self.checkpoint_bytes and not self._checkpointing:
+            self._checkpointing = True
+            threading.Thread(target=self._background_checkpoint, name="embedded-checkpoint", daemon=True).start()
+
+    def _background_checkpoint(self) -> None:
+        try:
+            self.checkpoint()
+        except Exception as e:
+            logger.error(f"Checkpoint of {self.directory} failed: {str(e)}", exc_info=True)
+        finally:
+            self._checkpointing = False
+
+    def checkpoint(self) -> None:
+        """Snapshot every column and start a new log.
+
+        Only copying the columns and rotating the log hold the store lock;
+        the snapshot is serialized and written while writes continue into
+        the new log.
+        """
+        with self._checkpoint_lock:
+            with self._lock:
+                if self._wal.closed:
+                    return
+                self.vectors.flush()
+                snapshot = self._capture()
+                self._rotate()
+            path = os.path.join(self.directory, SNAPSHOT_FILE)
+            with open(path + ".tmp", "wb") as f:
+                f.write(orjson.dumps(snapshot))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            os.remove(self.rotated_wal_path)
+
+    def _capture(self) -> Dict[str, Any]:
+        """Copy the state a snapshot holds; callers hold the lock"""
+        live = [row for row in range(len(self.ids)) if self._live(row)]
+        return {
+            "sequence": self.sequence,
+            "threads": {thread_id: dict(thread) for thread_id, thread in self.threads.items()},
+            "jobs": dict(self.jobs),
+            "rollups": {key: dict(row) for key, row in self.rollups.items()},
+            "vector_count": self.vectors.count,
+            "messages": {
+                "id": [self.ids[row] for row in live],
+                "content": [self.contents[row] for row in live],
+                "role": [self.roles[row] for row in live],
+                "thread_id": [self.thread_of[row] for row in live],
+                "created_at": [self.created[row] for row in live],
+                "vector": [self.vector_row[row] for row in live],
+                "content_hash": [self.hashes[row] for row in live],
+                "simhash": [self.simhashes[row] for row in live],
+                "duplicate_of": [
+                    self.ids[self.duplicate_of[row]] if self.duplicate_of[row] >= 0 else None for row in live
+                ],
+                "distance": [self.distances[row] for row in live]
+            }
+        }
+
+    def _rotate(self) -> None:
+        """Move the log aside for the snapshot in progress; callers hold the lock"""
+        self._wal.close()
+        if os.path.exists(self.rotated_wal_path):
+            # An earlier checkpoint did not finish; its records are not in any snapshot yet
+            with open(self.rotated_wal_path, "ab") as rotated, open(self.wal_path, "rb") as current:
+                shutil.copyfileobj(current, rotated)
+                rotated.flush()
+                os.fsync(rotated.fileno())
+            os.remove(self.wal_path)
+        else:
+            os.replace(self.wal_path, self.rotated_wal_path)
+        self._wal = open(self.wal_path, "ab")
+
+    def close(self) -> None:
+        self.checkpoint()
+        with self._lock:
+            if self._wal.closed:
+                return
+            self._wal.close()
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+
+    # Applying log records
+
+    def _apply(self, op: str, payload: Dict[str, Any]) -> int:
+        """Apply one record; returns the end of the vector rows it references"""
+        if op == "thread":
+            self.threads.setdefault(payload["id"], {
+                "status": payload["status"],
+                "version": 0,
+                "created_at": payload["created_at"],
+                "updated_at": payload["updated_at"]
+            })
+        elif op == "status":
+            thread = self.threads[payload["id"]]
+            thread["status"] = payload["status"]
+            thread["updated_at"] = payload["updated_at"]
+        elif op == "messages":
+            vector_end = 0
+            for row in payload["rows"]:
+                self._append_row(*row[:3], payload["thread_id"], *row[3:])
+                if row[4] >= 0:
+                    vector_end = max(vector_end, row[4] + 1)
+            thread = self.threads[payload["thread_id"]]
+            thread["version"] += len(payload["rows"])
+            thread["updated_at"] = payload["updated_at"]
+            return vector_end
+        elif op == "drop":
+            dropped = {self.row_of.pop(message_id) for message_id in payload["ids"]}
+            self.thread_rows[payload["thread_id"]] = [
+                row for row in self.thread_rows.get(payload["thread_id"], ()) if row not in dropped
+            ]
+            for row in dropped:
+                self._unindex(row)
+            thread = self.threads[payload["thread_id"]]
+            thread["version"] += len(dropped)
+            thread["updated_at"] = payload["updated_at"]
+        elif op == "job":
+            self.jobs[payload["id"]] = payload
+        elif op == "rollups":
+            for row in payload["rows"]:
+                self._add_rollup(row)
+        elif op == "rollups_reset":
+            self.rollups = {}
+            for row in payload["rows"]:
+                self._add_rollup(row)
+        return 0
+
+    def _add_rollup(self, row: Dict[str, Any]) -> None:
+        key = f"{row['granularity']}:{row['bucket']}"
+        current = self.rollups.get(key)
+        if current is None:
+            self.rollups[key] = dict(row)
+            return
+        for name, value in row.items():
+            if name == "response_histogram":
+                current[name] = [a + b for a, b in zip(current[name], value)]
+            elif name not in ("granularity", "bucket"):
+                current[name] += value
+
+    def _append_row(
+        self,
+        message_id: str,
+        content: str,
+        role: str,
+        thread_id: str,
+        created_at: float,
+        vector: int,
+        content_hash: Optional[str],
+        simhash: Optional[int],
+        duplicate_of: Optional[str],
+        distance: Optional[int]
+    ) -> None:
+        row = len(self.ids)
+        self.ids.append(message_id)
+        self.thread_of.append(thread_id)
+        self.contents.append(content)
+        self.roles.append(role)
+        self.created.append(created_at)
+        self.vector_row.append(vector)
+        self.hashes.append(content_hash)
+        self.simhashes.append(simhash)
+        self.duplicate_of.append(self.row_of[duplicate_of] if duplicate_of in self.row_of else -1)
+        self.distances.append(distance)
+        self.row_of[message_id] = row
+
+        rows = self.thread_rows.setdefault(thread_id, [])
+        if not rows or self._order(rows[-1]) <= (created_at, message_id):
+            rows.append(row)
+        else:
+            insort(rows, row, key=self._order)
+
+        if vector >= 0:
+            if vector >= len(self.vector_owner):
+                self.vector_owner.extend([-1] * (vector + 1 - len(self.vector_owner)))
+            self.vector_owner[vector] = row
+        if content_hash is not None:
+            self.by_hash.setdefault(content_hash, []).append(row)
+        if simhash is not None:
+            for band, value in enumerate(simhash_bands(simhash)):
+                self.by_band[band].setdefault(value, []).append(row)
+
+    def _unindex(self, row: int) -> None:
+        """Take a dropped row out of the dedup and vector indexes"""
+        if self.hashes[row] is not None:
+            self.by_hash[self.hashes[row]].remove(row)
+        if self.simhashes[row] is not None:
+            for band, value in enumerate(simhash_bands(self.simhashes[row])):
+                self.by_band[band][value].remove(row)
+        if self.vector_row[row] >= 0:
+            self.vector_owner[self.vector_row[row]] = -1
+        self.contents[row] = ""
+
+    def _live(self, row: int) -> bool:
+        return self.row_of.get(self.ids[row]) == row
+
+    def _order(self, row: int) -> Tuple[float, str]:
+        return self.created[row], self.ids[row]
+
+    # Writes
+
+    def add_thread(self, thread_id: str, status: str, created_at: Optional[float] = None, updated_at: Optional[float] = None) -> bool:
+        with self._lock:
+            if thread_id in self.threads:
+                return False
+            now = time.time()
+            self._commit("thread", {
+                "id": thread_id,
+                "status": status,
+                "created_at": created_at if created_at is not None else now,
+                "updated_at": updated_at if updated_at is not None else now
+            })
+            return True
+
+    def set_status(self, thread_id: str, status: str) -> bool:
+        with self._lock:
+            if thread_id not in self.threads:
+                return False
+            self._commit("status", {"id": thread_id, "status": status, "updated_at": time.time()})
+            return True
+
+    def add_messages(self, thread_id: str, rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Append messages to a thread; returns the new thread version and the
+        created_at and role of the thread's last message before the append.
+
+        Each row has id, content, role, created_at (epoch seconds) and either
+        embedding, content_hash and simhash, or duplicate_of and distance.
+        Embeddings are written to the matrix before the log record that
+        references them.
+        """
+        with self._lock:
+            if thread_id not in self.threads:
+                return None
+            last = self.thread_rows.get(thread_id)
+            previous = last[-1] if last else None
+            embeddings = [row["embedding"] for row in rows if row.get("embedding") is not None]
+            next_vector = self.vectors.write(np.asarray(embeddings, dtype=np.float32)) if embeddings else -1
+            if embeddings and self.fsync:
+                self.vectors.flush()
+
+            records = []
+            for row in rows:
+                vector = -1
+                if row.get("embedding") is not None:
+                    vector = next_vector
+                    next_vector += 1
+                records.append([
+                    row["id"], row["content"], row["role"], row["created_at"], vector,
+                    row.get("content_hash"), row.get("simhash"), row.get("duplicate_of"), row.get("distance")
+                ])
+            self._commit("messages", {"thread_id": thread_id, "updated_at": time.time(), "rows": records})
+            if embeddings:
+                self.vectors.publish(next_vector)
+            return {
+                "version": self.threads[thread_id]["version"],
+                "previous_at": _datetime(self.created[previous]) if previous is not None else None,
+                "previous_role": self.roles[previous] if previous is not None else None
+            }
+
+    def drop_messages(self, thread_id: str, message_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """Drop the given messages of a thread except canonicals of live duplicates
+        elsewhere; returns how many were dropped and the new thread version"""
+        with self._lock:
+            if thread_id not in self.threads:
+                return None
+            wanted = set(message_ids)
+            rows = [row for row in self.thread_rows.get(thread_id, ()) if self.ids[row] in wanted]
+            pinned = {
+                canonical for row, canonical in enumerate(self.duplicate_of)
+                if canonical >= 0 and self.thread_of[row] != thread_id and self._live(row)
+            } if rows else set()
+            ids = [self.ids[row] for row in rows if row not in pinned]
+            if ids:
+                self._commit("drop", {"thread_id": thread_id, "updated_at": time.time(), "ids": ids})
+            return {"count": len(ids), "version": self.threads[thread_id]["version"]}
+
+    def save_job(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._commit("job", job)
+
+    def add_rollups(self, rows: List[Dict[str, Any]], reset: bool = False) -> None:
+        with self._lock:
+            self._commit("rollups_reset" if reset else "rollups", {"rows": rows})
+
+    # Reads
+
+    def embedding(self, row: int) -> Optional[List[float]]:
+        vector = self.vector_row[row]
+        return self.vectors.get(vector) if vector >= 0 else None
+
+    def message(self, row: int, include_embedding: bool = False) -> Dict[str, Any]:
+        """A message map shaped like the Cypher projections; a duplicate's
+        embedding is its canonical's"""
+        canonical = self.duplicate_of[row]
+        return {
+            "id": self.ids[row],
+            "content": self.contents[row],
+            "role": self.roles[row],
+            "created_at": _datetime(self.created[row]),
+            "thread_id": self.thread_of[row],
+            "embedding": self.embedding(row if canonical < 0 else canonical) if include_embedding else None,
+            "metadata": {}
+        }
+
+    def rows(self, thread_id: str) -> List[int]:
+        with self._lock:
+            return list(self.thread_rows.get(thread_id, ()))
+
+    def similar_rows(self, embedding: List[float], threshold: float, limit: Optional[int] = None) -> List[int]:
+        """Rows of live messages scoring at least ``threshold``, best first"""
+        with self._lock:
+            scores = self.vectors.scores(embedding)
+            hits = np.flatnonzero(scores >= threshold)
+            # Skip embeddings of dropped messages
+            hits = np.array([vector for vector in hits.tolist() if self.vector_owner[vector] >= 0], dtype=np.int64)
+            if limit is not None and len(hits) > limit:
+                hits = hits[np.argpartition(-scores[hits], limit)[:limit]]
+            hits = hits[np.argsort(-scores[hits], kind="stable")]
+            return [self.vector_owner[vector] for vector in hits.tolist()]
+
+
+def _timed(method: Callable) -> Callable:
+    """Record a repository call as an ``embedded`` Server-Timing stage"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with metrics.stage("embedded", method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class EmbeddedRepository(Repository):
+    """Repository over an in-process EmbeddedStore; no network hop"""
+
+    name = EMBEDDED_BACKEND
+
+    def __init__(self, store: EmbeddedStore):
+        self.store = store
+
+    def init_schema(self, embedding_dimensions: Optional[int] = None) -> None:
+        dimensions = self.store.vectors.dimensions
+        if embedding_dimensions and dimensions and dimensions != embedding_dimensions:
+            logger.warning(
+                f"Embedded store holds {dimensions}-dimension embeddings but the "
+                f"provider produces {embedding_dimensions}; similarity search will skip them"
+            )
+
+    def close(self) -> None:
+        self.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "threads": len(self.store.threads),
+            "messages": len(self.store.row_of),
+            "vectors": self.store.vectors.count,
+            "wal_bytes": os.path.getsize(self.store.wal_path)
+        }
+
+    def _thread_map(self, thread_id: str) -> Dict[str, Any]:
+        thread = self.store.threads[thread_id]
+        return {
+            "id": thread_id,
+            "status": thread["status"],
+            "created_at": _datetime(thread["created_at"]),
+            "updated_at": _datetime(thread["updated_at"])
+        }
+
+    # Threads
+
+    @_timed
+    def create_thread(self, thread_id: str, status: str) -> None:
+        self.store.add_thread(thread_id, status)
+
+    @_timed
+    def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        return self._thread_map(thread_id) if thread_id in self.store.threads else None
+
+    @_timed
+    def get_thread_version(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        thread = self.store.threads.get(thread_id)
+        if thread is None:
+            return None
+        return {
+            "version": thread["version"],
+            "updated_at": int(thread["updated_at"] * 1000),
+            "message_count": len(self.store.thread_rows.get(thread_id, ()))
+        }
+
+    @_timed
+    def update_thread_status(self, thread_id: str, status: str) -> Optional[Dict[str, Any]]:
+        return self._thread_map(thread_id) if self.store.set_status(thread_id, status) else None
+
+    @_timed
+    def get_thread_messages(self, thread_id: str) -> List[Dict[str, Any]]:
+        messages = []
+        for row in self.store.rows(thread_id):
+            message = self.store.message(row)
+            del message["embedding"], message["metadata"]
+            messages.append(message)
+        return messages
+
+    @_timed
+    def get_thread_analytics(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        roles = [self.store.roles[row] for row in self.store.rows(thread_id)]
+        return {
+            "message_count": len(roles),
+            "user_messages": roles.count("user"),
+            "assistant_messages": roles.count("assistant"),
+            # Like the graph, no reply links are stored to time responses by
+            "avg_response_time": None
+        }
+
+    @_timed
+    def delete_thread_messages(self, thread_id: str, message_ids: List[str]) -> Optional[Dict[str, Any]]:
+        return self.store.drop_messages(thread_id, message_ids)
+
+    @_timed
+    def find_similar_threads(self, embedding: List[float], threshold: float, limit: int) -> List[str]:
+        threads: Dict[str, None] = {}
+        for row in self.store.similar_rows(embedding, threshold):
+            threads.setdefault(self.store.thread_of[row])
+            if len(threads) == limit:
+                break
+        return list(threads)
+
+    # Messages
+
+    @_timed
+    def thread_exists(self, thread_id: str) -> bool:
+        return thread_id in self.store.threads
+
+    @_timed
+    def find_duplicate_candidates(self, content_hash: str, bands: List[int], limit: int) -> List[Dict[str, Any]]:
+        store = self.store
+        with store._lock:
+            candidates: Dict[int, None] = dict.fromkeys(store.by_hash.get(content_hash, ()))
+            for band, value in enumerate(bands):
+                candidates.update(dict.fromkeys(store.by_band[band].get(value, ())))
+        return [
+            {"id": store.ids[row], "content_hash": store.hashes[row], "simhash": store.simhashes[row]}
+            for row in list(candidates)[:limit]
+        ]
+
+    @_timed
+    def create_message(
+        self,
+        message_id: str,
+        content: str,
+        role: str,
+        thread_id: str,
+        embedding: List[float],
+        content_hash: str,
+        simhash: int,
+        bands: List[int]
+    ) -> Optional[Dict[str, Any]]:
+        created_at = time.time()
+        written = self.store.add_messages(thread_id, [{
+            "id": message_id,
+            "content": content,
+            "role": role,
+            "created_at": created_at,
+            "embedding": embedding,
+            "content_hash": content_hash,
+            "simhash": simhash
+        }])
+        if written is None:
+            return None
+        return {"id": message_id, "created_at": _datetime(created_at), **written}
+
+    @_timed
+    def create_duplicate_message(
+        self,
+        message_id: str,
+        content: str,
+        role: str,
+        thread_id: str,
+        canonical_id: str,
+        distance: int,
+        include_embedding: bool
+    ) -> Optional[Dict[str, Any]]:
+        canonical = self.store.row_of.get(canonical_id)
+        if canonical is None:
+            return None
+        created_at = time.time()
+        written = self.store.add_messages(thread_id, [{
+            "id": message_id,
+            "content": content,
+            "role": role,
+            "created_at": created_at,
+            "duplicate_of": canonical_id,
+            "distance": distance
+        }])
+        if written is None:
+            return None
+        embedding = self.store.embedding(canonical) if include_embedding else None
+        return {"embedding": embedding, "created_at": _datetime(created_at), **written}
+
+    @_timed
+    def create_messages_batch(
+        self,
+        thread_id: str,
+        canonical: List[Dict[str, Any]],
+        duplicates: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        rows = [{**row, "created_at": _timestamp(row["created_at"])} for row in canonical]
+        batch_ids = {row["id"] for row in canonical}
+        # Like the MATCH on the canonical, drop duplicates whose canonical is gone
+        rows += [
+            {**row, "created_at": _timestamp(row["created_at"]), "duplicate_of": row["canonical_id"]}
+            for row in duplicates
+            if row["canonical_id"] in batch_ids or row["canonical_id"] in self.store.row_of
+        ]
+        written = self.store.add_messages(thread_id, rows)
+        if written is None:
+            return None
+        return {"count": len(rows), "ids": [row["id"] for row in rows], **written}
+
+    @_timed
+    def get_recent_context(self, thread_id: str, limit: int, include_embedding: bool) -> List[Dict[str, Any]]:
+        rows = self.store.rows(thread_id)[-limit:] if limit > 0 else []
+        return [self.store.message(row, include_embedding) for row in reversed(rows)]
+
+    @_timed
+    def get_context_around_message(
+        self,
+        message_id: str,
+        thread_id: str,
+        window_seconds: float,
+        include_embedding: bool
+    ) -> List[Dict[str, Any]]:
+        store = self.store
+        center = store.row_of.get(message_id)
+        if center is None or store.thread_of[center] != thread_id:
+            return []
+        rows = store.rows(thread_id)
+        at = store.created[center]
+        # Rows are sorted by time, so the window is one contiguous slice
+        start = bisect_left(rows, at - window_seconds, key=lambda row: store.created[row])
+        end = bisect_right(rows, at + window_seconds, key=lambda row: store.created[row])
+        return [store.message(row, include_embedding) for row in rows[start:end]]
+
+    @_timed
+    def get_message(self, message_id: str, include_embedding: bool) -> Optional[Dict[str, Any]]:
+        row = self.store.row_of.get(message_id)
+        if row is None:
+            return None
+        message = self.store.message(row, include_embedding)
+        canonical = self.store.duplicate_of[row]
+        message["duplicate_of"] = self.store.ids[canonical] if canonical >= 0 else None
+        return message
+
+    @_timed
+    def find_similar_messages(
+        self,
+        embedding: List[float],
+        threshold: float,
+        limit: int,
+        include_embedding: bool
+    ) -> List[Dict[str, Any]]:
+        rows = self.store.similar_rows(embedding, threshold, limit)
+        return [self.store.message(row, include_embedding) for row in rows]
+
+    @_timed
+    def get_dedup_report(self) -> Dict[str, Any]:
+        store = self.store
+        with store._lock:
+            live = list(store.row_of.values())
+            duplicates = [store.distances[row] for row in live if store.duplicate_of[row] >= 0]
+            return {
+                "total_messages": len(live),
+                "canonical_messages": sum(1 for row in live if store.vector_row[row] >= 0),
+                "duplicate_messages": len(duplicates),
+                "exact_duplicates": duplicates.count(0),
+                "dimensions": store.vectors.dimensions or 0,
+                "value_bytes": 4
+            }
+
+    # Analysis
+
+    @_timed
+    def get_thread_statistics(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        rows = self.store.rows(thread_id)
+        if not rows:
+            return None
+        roles = [self.store.roles[row] for row in rows]
+        return {
+            "message_count": len(rows),
+            "user_messages": roles.count("user"),
+            "assistant_messages": roles.count("assistant"),
+            "first_message_time": _datetime(self.store.created[rows[0]]),
+            "last_message_time": _datetime(self.store.created[rows[-1]])
+        }
+
+    @_timed
+    def get_conversation(self, thread_id: str) -> List[Dict[str, Any]]:
+        store = self.store
+        return [
+            {"role": store.roles[row], "content": store.contents[row], "created_at": _datetime(store.created[row])}
+            for row in store.rows(thread_id)
+        ]
+
+    # Export and import
+
+    @_timed
+    def get_threads_page(self, after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        with self.store._lock:
+            ids = sorted(self.store.threads)
+        start = bisect_right(ids, after_id) if after_id is not None else 0
+        return [self._thread_map(thread_id) for thread_id in ids[start:start + limit]]
+
+    @_timed
+    def get_thread_messages_page(
+        self,
+        thread_id: str,
+        after_created_at: Any,
+        after_id: Optional[str],
+        include_embedding: bool,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        store = self.store
+        rows = store.rows(thread_id)
+        start = 0
+        if after_id is not None:
+            start = bisect_right(rows, (_timestamp(after_created_at), after_id), key=store._order)
+        page = []
+        for row in rows[start:start + limit]:
+            message = store.message(row, include_embedding)
+            canonical = store.duplicate_of[row]
+            message["duplicate_of"] = store.ids[canonical] if canonical >= 0 else None
+            message["duplicate_distance"] = store.distances[row] if canonical >= 0 else None
+            del message["metadata"]
+            page.append(message)
+        return page
+
+    @_timed
+    def import_threads(self, rows: List[Dict[str, Any]]) -> int:
+        for row in rows:
+            self.store.add_thread(
+                row["id"], row["status"], _timestamp(row["created_at"]), _timestamp(row["updated_at"])
+            )
+        return len(rows)
+
+    @_timed
+    def import_messages(self, rows: List[Dict[str, Any]]) -> int:
+        by_thread: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            if row["id"] in self.store.row_of or row["thread_id"] not in self.store.threads:
+                continue
+            # A duplicate whose canonical is missing keeps its own embedding
+            canonical = row["duplicate_of"] if row["duplicate_of"] in self.store.row_of else None
+            by_thread.setdefault(row["thread_id"], []).append({
+                "id": row["id"],
+                "content": row["content"],
+                "role": row["role"],
+                "created_at": _timestamp(row["created_at"]),
+                "embedding": None if canonical else row["embedding"],
+                "content_hash": None if canonical else row["content_hash"],
+                "simhash": None if canonical else row["simhash"],
+                "duplicate_of": canonical,
+                "distance": row["duplicate_distance"] if canonical else None
+            })
+        for thread_id, thread_rows in by_thread.items():
+            self.store.add_messages(thread_id, thread_rows)
+        return sum(len(thread_rows) for thread_rows in by_thread.values())
+
+    # Jobs
+
+    @_timed
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.jobs.get(job_id)
+        return dict(job) if job else None
+
+    @_timed
+    def get_completed_job(
+        self,
+        kind: str,
+        thread_id: str,
+        thread_version: int,
+        status: str
+    ) -> Optional[Dict[str, Any]]:
+        with self.store._lock:
+            matches = [
+                job for job in self.store.jobs.values()
+                if job["kind"] == kind and job["thread_id"] == thread_id
+                and job["thread_version"] == thread_version and job["status"] == status
+            ]
+        return dict(max(matches, key=lambda job: job["finished_at"])) if matches else None
+
+    @_timed
+    def save_job(self, job: Dict[str, Any]) -> None:
+        if job["thread_id"] in self.store.threads:
+            self.store.save_job(job)
+
+    # Rollups
+
+    @_timed
+    def add_rollups(self, rows: List[Dict[str, Any]]) -> None:
+        self.store.add_rollups(rows)
+
+    @_timed
+    def replace_rollups(self, rows: List[Dict[str, Any]]) -> None:
+        self.store.add_rollups(rows, reset=True)
+
+    @_timed
+    def get_rollups(self, granularity: str, start: Optional[float], end: Optional[float]) -> List[Dict[str, Any]]:
+        with self.store._lock:
+            rows = [
+                dict(row) for row in self.store.rollups.values()
+                if row["granularity"] == granularity
+                and (start is None or row["bucket"] >= start)
+                and (end is None or row["bucket"] < end)
+            ]
+        return sorted(rows, key=lambda row: row["bucket"])
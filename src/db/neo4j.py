@@ -1,6 +1,62 @@
-from neo4j import GraphDatabase
+from neo4j import READ_ACCESS, WRITE_ACCESS, Bookmarks, GraphDatabase
 from ..core.config import get_settings
+from ..core import consistency, metrics
+from .queries import query_name
 from contextlib import contextmanager
+from typing import Any, Callable, List, Optional
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _TracedTransaction:
+    """Transaction proxy that notes which named queries ran"""
+
+    def __init__(self, tx, names: List[str]):
+        self._tx = tx
+        self._names = names
+
+    def run(self, query, parameters=None, **kwargs):
+        self._names.append(query_name(query))
+        return self._tx.run(query, parameters, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+
+class _InstrumentedSession:
+    """Session proxy timing each managed transaction and auto-commit query"""
+
+    def __init__(self, session):
+        self._session = session
+
+    def _timed(self, execute: Callable, work: Callable, args, kwargs) -> Any:
+        names: List[str] = []
+
+        def traced(tx, *work_args, **work_kwargs):
+            names.clear()
+            return work(_TracedTransaction(tx, names), *work_args, **work_kwargs)
+
+        # Retries re-run the work, so the query names are only known afterwards
+        start = time.perf_counter()
+        try:
+            return execute(traced, *args, **kwargs)
+        finally:
+            metrics.record("neo4j", ("+".join(names) or "unknown",), time.perf_counter() - start)
+
+    def execute_read(self, work, *args, **kwargs):
+        return self._timed(self._session.execute_read, work, args, kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return self._timed(self._session.execute_write, work, args, kwargs)
+
+    def run(self, query, parameters=None, **kwargs):
+        with metrics.stage("neo4j", query_name(query)):
+            return self._session.run(query, parameters, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
 
 class Neo4jService:
     def __init__(self):
@@ -11,17 +67,31 @@ class Neo4jService:
         )
 
     @contextmanager
-    def get_session(self):
-        session = self._driver.session()
+    def get_session(self, leader_read: bool = False, **config):
+        """Open a session that takes part in the request's causal chain.
+
+        With a ``neo4j://`` URI, ``default_access_mode=READ_ACCESS`` sessions
+        go to followers and wait for the request's bookmarks; other sessions
+        go to the leader and record the bookmark they end with, unless
+        ``leader_read`` says they only read there.
+        """
+        writing = config.get("default_access_mode", WRITE_ACCESS) == WRITE_ACCESS
+        if "bookmarks" not in config:
+            bookmarks = consistency.write_bookmarks() if writing else consistency.read_bookmarks()
+            if bookmarks:
+                config["bookmarks"] = Bookmarks.from_raw_values(bookmarks)
+        session = self._driver.session(**config)
         try:
-            yield session
+            yield _InstrumentedSession(session) if metrics.enabled else session
         finally:
             session.close()
+            if writing and not leader_read:
+                consistency.note_write(session.last_bookmarks().raw_values)
 
     def close(self):
         self._driver.close()
 
-    def init_constraints(self):
+    def init_constraints(self, embedding_dimensions: Optional[int] = None):
         """Initialize Neo4j constraints and indexes"""
         with self.get_session() as session:
             # Create constraints for Message nodes
@@ -34,4 +104,55 @@ class Neo4jService:
             session.run("""
                 CREATE CONSTRAINT thread_id IF NOT EXISTS 
                 FOR (t:Thread) REQUIRE t.id IS UNIQUE
-            """)
\ No newline at end of file
+            """)
+
+            # Create constraints for background Job nodes
+            session.run("""
+                CREATE CONSTRAINT job_id IF NOT EXISTS
+                FOR (j:Job) REQUIRE j.id IS UNIQUE
+            """)
+
+            # One rollup node per granularity and bucket start
+            session.run("""
+                CREATE CONSTRAINT rollup_bucket IF NOT EXISTS
+                FOR (r:Rollup) REQUIRE (r.granularity, r.bucket) IS UNIQUE
+            """)
+
+            # Create indexes for duplicate detection fingerprints
+            session.run("""
+                CREATE INDEX message_content_hash IF NOT EXISTS
+                FOR (m:Message) ON (m.content_hash)
+            """)
+            for band in range(4):
+                session.run(f"""
+                    CREATE INDEX message_simhash_b{band} IF NOT EXISTS
+                    FOR (m:Message) ON (m.simhash_b{band})
+                """)
+
+            # Export pages seek past a (created_at, id) cursor
+            session.run("""
+                CREATE INDEX message_created_at_id IF NOT EXISTS
+                FOR (m:Message) ON (m.created_at, m.id)
+            """)
+
+            # Create the vector index sized for the configured embedding provider
+            if embedding_dimensions:
+                session.run(f"""
+                    CREATE VECTOR INDEX message_embedding IF NOT EXISTS
+                    FOR (m:Message) ON (m.embedding)
+                    OPTIONS {{indexConfig: {{
+                        `vector.dimensions`: {int(embedding_dimensions)},
+                        `vector.similarity_function`: 'cosine'
+                    }}}}
+                """)
+                existing = session.run("""
+                    SHOW VECTOR INDEXES YIELD name, options
+                    WHERE name = 'message_embedding'
+                    RETURN options.indexConfig['vector.dimensions'] as dimensions
+                """).single()
+                if existing and existing["dimensions"] != embedding_dimensions:
+                    logger.warning(
+                        f"Vector index message_embedding has {existing['dimensions']} dimensions "
+                        f"but the embedding provider returns {embedding_dimensions}; "
+                        "drop the index and re-embed messages after switching EMBEDDING_MODEL"
+                    )
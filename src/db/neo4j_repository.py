@@ -0,0 +1,362 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from neo4j import READ_ACCESS
+from .neo4j import Neo4jService
+from .queries.analysis import AnalysisQueries
+from .queries.export import ExportQueries
+from .queries.jobs import JobQueries
+from .queries.messages import MessageQueries
+from .queries.rollups import RollupQueries
+from .queries.threads import ThreadQueries
+from .repository import NEO4J_BACKEND, Repository
+
+# Open rollup ranges are bounded by sentinels so the planner always range-seeks
+ROLLUP_MIN = datetime.min.replace(tzinfo=timezone.utc)
+ROLLUP_MAX = datetime.max.replace(tzinfo=timezone.utc)
+
+
+class Neo4jRepository(Repository):
+    """Repository backed by the Neo4j graph over Bolt.
+
+    Reads open READ_ACCESS sessions, which a routing driver sends to
+    followers. Reads that decide a write in the same request (thread
+    existence, duplicate candidates) run on the leader instead, so a client
+    that sends no bookmark still sees the thread it just created.
+    """
+
+    name = NEO4J_BACKEND
+
+    def __init__(self, neo4j: Neo4jService):
+        self.neo4j = neo4j
+
+    def init_schema(self, embedding_dimensions: Optional[int] = None) -> None:
+        self.neo4j.init_constraints(embedding_dimensions)
+
+    def close(self) -> None:
+        self.neo4j.close()
+
+    def _read_single(self, query: str, **parameters) -> Optional[Dict[str, Any]]:
+        with self.neo4j.get_session(default_access_mode=READ_ACCESS) as session:
+            record = session.execute_read(lambda tx: tx.run(query, **parameters).single())
+        return dict(record) if record else None
+
+    def _write_single(self, query: str, **parameters) -> Optional[Dict[str, Any]]:
+        with self.neo4j.get_session() as session:
+            record = session.execute_write(lambda tx: tx.run(query, **parameters).single())
+        return dict(record) if record else None
+
+    def _leader_single(self, query: str, **parameters) -> Optional[Dict[str, Any]]:
+        """Run a read on the leader; a write transaction is how the driver pins one there"""
+        with self.neo4j.get_session(leader_read=True) as session:
+            record = session.execute_write(lambda tx: tx.run(query, **parameters).single())
+        return dict(record) if record else None
+
+    def _read_column(self, query: str, **parameters) -> List[Any]:
+        """First column of every row, e.g. the projected map of a ``RETURN m {...} as m``"""
+        with self.neo4j.get_session(default_access_mode=READ_ACCESS) as session:
+            rows = session.execute_read(lambda tx: tx.run(query, **parameters).values())
+        return [row[0] for row in rows]
+
+    # Threads
+
+    def create_thread(self, thread_id: str, status: str) -> None:
+        with self.neo4j.get_session() as session:
+            session.execute_write(
+                lambda tx: tx.run(
+                    ThreadQueries.CREATE_THREAD,
+                    id=thread_id,
+                    status=status
+                ).consume()
+            )
+
+    def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        record = self._read_single(ThreadQueries.GET_THREAD, thread_id=thread_id)
+        return record["t"] if record else None
+
+    def get_thread_version(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        return self._read_single(ThreadQueries.GET_THREAD_VERSION, thread_id=thread_id)
+
+    def update_thread_status(self, thread_id: str, status: str) -> Optional[Dict[str, Any]]:
+        record = self._write_single(ThreadQueries.UPDATE_THREAD_STATUS, thread_id=thread_id, status=status)
+        return record["t"] if record else None
+
+    def get_thread_messages(self, thread_id: str) -> List[Dict[str, Any]]:
+        return self._read_column(MessageQueries.GET_THREAD_MESSAGES, thread_id=thread_id)
+
+    def get_thread_analytics(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        return self._read_single(ThreadQueries.GET_THREAD_ANALYTICS, thread_id=thread_id)
+
+    def delete_thread_messages(self, thread_id: str, message_ids: List[str]) -> Optional[Dict[str, Any]]:
+        return self._write_single(ThreadQueries.DELETE_THREAD_MESSAGES, thread_id=thread_id, ids=message_ids)
+
+    def find_similar_threads(self, embedding: List[float], threshold: float, limit: int) -> List[str]:
+        return self._read_column(
+            ThreadQueries.FIND_SIMILAR_THREADS,
+            embedding=embedding,
+            threshold=threshold,
+            limit=limit
+        )
+
+    # Messages
+
+    def thread_exists(self, thread_id: str) -> bool:
+        return bool(self._leader_single(MessageQueries.THREAD_EXISTS, thread_id=thread_id)["count"])
+
+    def find_duplicate_candidates(self, content_hash: str, bands: List[int], limit: int) -> List[Dict[str, Any]]:
+        with self.neo4j.get_session(leader_read=True) as session:
+            return session.execute_write(
+                lambda tx: tx.run(
+                    MessageQueries.FIND_DUPLICATE_CANDIDATES,
+                    content_hash=content_hash,
+                    b0=bands[0],
+                    b1=bands[1],
+                    b2=bands[2],
+                    b3=bands[3],
+                    limit=limit
+                ).data()
+            )
+
+    def find_duplicate_candidates_batch(
+        self,
+        keys: List[Tuple[str, List[int]]],
+        limit: int
+    ) -> List[List[Dict[str, Any]]]:
+        if not keys:
+            return []
+        with self.neo4j.get_session(leader_read=True) as session:
+            rows = session.execute_write(
+                lambda tx: tx.run(
+                    MessageQueries.FIND_DUPLICATE_CANDIDATES_BATCH,
+                    keys=[{"content_hash": content_hash, "bands": bands} for content_hash, bands in keys],
+                    limit=limit
+                ).data()
+            )
+        candidates: List[List[Dict[str, Any]]] = [[] for _ in keys]
+        for row in rows:
+            candidates[row["index"]] = row["candidates"]
+        return candidates
+
+    def create_message(
+        self,
+        message_id: str,
+        content: str,
+        role: str,
+        thread_id: str,
+        embedding: List[float],
+        content_hash: str,
+        simhash: int,
+        bands: List[int]
+    ) -> Optional[Dict[str, Any]]:
+        return self._write_single(
+            MessageQueries.CREATE_MESSAGE,
+            id=message_id,
+            content=content,
+            role=role,
+            thread_id=thread_id,
+            embedding=embedding,
+            content_hash=content_hash,
+            simhash=simhash,
+            bands=bands
+        )
+
+    def create_duplicate_message(
+        self,
+        message_id: str,
+        content: str,
+        role: str,
+        thread_id: str,
+        canonical_id: str,
+        distance: int,
+        include_embedding: bool
+    ) -> Optional[Dict[str, Any]]:
+        return self._write_single(
+            MessageQueries.CREATE_DUPLICATE_MESSAGE,
+            id=message_id,
+            content=content,
+            role=role,
+            thread_id=thread_id,
+            canonical_id=canonical_id,
+            distance=distance,
+            include_embedding=include_embedding
+        )
+
+    def create_messages_batch(
+        self,
+        thread_id: str,
+        canonical: List[Dict[str, Any]],
+        duplicates: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        return self._write_single(
+            MessageQueries.CREATE_MESSAGES_BATCH,
+            thread_id=thread_id,
+            canonical=canonical,
+            duplicates=duplicates
+        )
+
+    def get_recent_context(self, thread_id: str, limit: int, include_embedding: bool) -> List[Dict[str, Any]]:
+        return self._read_column(
+            MessageQueries.GET_RECENT_CONTEXT,
+            thread_id=thread_id,
+            limit=limit,
+            include_embedding=include_embedding
+        )
+
+    def get_context_around_message(
+        self,
+        message_id: str,
+        thread_id: str,
+        window_seconds: float,
+        include_embedding: bool
+    ) -> List[Dict[str, Any]]:
+        return self._read_column(
+            MessageQueries.GET_CONTEXT_AROUND_MESSAGE,
+            message_id=message_id,
+            thread_id=thread_id,
+            window_seconds=window_seconds,
+            include_embedding=include_embedding
+        )
+
+    def stream_context(
+        self,
+        thread_id: str,
+        message_id: Optional[str],
+        limit: int,
+        window_seconds: float,
+        include_embedding: bool,
+        fetch_size: int
+    ) -> Iterator[Dict[str, Any]]:
+        # An auto-commit run keeps the cursor open, pulling fetch_size records at a time
+        with self.neo4j.get_session(fetch_size=fetch_size, default_access_mode=READ_ACCESS) as session:
+            if message_id:
+                result = session.run(
+                    MessageQueries.GET_CONTEXT_AROUND_MESSAGE,
+                    message_id=message_id,
+                    thread_id=thread_id,
+                    window_seconds=window_seconds,
+                    include_embedding=include_embedding
+                )
+            else:
+                result = session.run(
+                    MessageQueries.GET_RECENT_CONTEXT,
+                    thread_id=thread_id,
+                    limit=limit,
+                    include_embedding=include_embedding
+                )
+            for record in result:
+                yield record[0]
+
+    def get_message(self, message_id: str, include_embedding: bool) -> Optional[Dict[str, Any]]:
+        record = self._read_single(MessageQueries.GET_MESSAGE, id=message_id, include_embedding=include_embedding)
+        return record["m"] if record else None
+
+    def find_similar_messages(
+        self,
+        embedding: List[float],
+        threshold: float,
+        limit: int,
+        include_embedding: bool
+    ) -> List[Dict[str, Any]]:
+        return self._read_column(
+            MessageQueries.FIND_SIMILAR_MESSAGES,
+            embedding=embedding,
+            threshold=threshold,
+            limit=limit,
+            include_embedding=include_embedding
+        )
+
+    def get_dedup_report(self) -> Dict[str, Any]:
+        # Neo4j stores float lists as 64-bit doubles
+        return {**self._read_single(MessageQueries.DEDUP_REPORT), "value_bytes": 8}
+
+    # Analysis
+
+    def get_thread_statistics(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        record = self._read_single(AnalysisQueries.THREAD_STATISTICS, thread_id=thread_id)
+        return record["stats"] if record else None
+
+    def get_conversation(self, thread_id: str) -> List[Dict[str, Any]]:
+        return self._read_column(AnalysisQueries.THREAD_MESSAGES, thread_id=thread_id)
+
+    # Export and import
+
+    def get_threads_page(self, after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        if after_id is None:
+            return self._read_column(ExportQueries.THREADS_FIRST_PAGE, limit=limit)
+        return self._read_column(ExportQueries.THREADS_PAGE, after_id=after_id, limit=limit)
+
+    def get_thread_messages_page(
+        self,
+        thread_id: str,
+        after_created_at: Any,
+        after_id: Optional[str],
+        include_embedding: bool,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        if after_id is None:
+            return self._read_column(
+                ExportQueries.THREAD_MESSAGES_FIRST_PAGE,
+                thread_id=thread_id,
+                include_embedding=include_embedding,
+                limit=limit
+            )
+        return self._read_column(
+            ExportQueries.THREAD_MESSAGES_PAGE,
+            thread_id=thread_id,
+            after_created_at=after_created_at,
+            after_id=after_id,
+            include_embedding=include_embedding,
+            limit=limit
+        )
+
+    def import_threads(self, rows: List[Dict[str, Any]]) -> int:
+        return self._write_single(ExportQueries.IMPORT_THREADS, rows=rows)["count"]
+
+    def import_messages(self, rows: List[Dict[str, Any]]) -> int:
+        return self._write_single(ExportQueries.IMPORT_MESSAGES, rows=rows)["count"]
+
+    # Jobs
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        record = self._read_single(JobQueries.GET_JOB, id=job_id)
+        return record["job"] if record else None
+
+    def get_completed_job(
+        self,
+        kind: str,
+        thread_id: str,
+        thread_version: int,
+        status: str
+    ) -> Optional[Dict[str, Any]]:
+        record = self._read_single(
+            JobQueries.GET_COMPLETED_JOB,
+            kind=kind,
+            thread_id=thread_id,
+            thread_version=thread_version,
+            status=status
+        )
+        return record["job"] if record else None
+
+    def save_job(self, job: Dict[str, Any]) -> None:
+        with self.neo4j.get_session() as session:
+            session.execute_write(lambda tx: tx.run(JobQueries.SAVE_JOB, **job).consume())
+
+    # Rollups
+
+    def add_rollups(self, rows: List[Dict[str, Any]]) -> None:
+        self._write_single(RollupQueries.ADD_ROLLUPS, rows=rows)
+
+    def replace_rollups(self, rows: List[Dict[str, Any]]) -> None:
+        def replace(tx):
+            tx.run(RollupQueries.DELETE_ROLLUPS).consume()
+            tx.run(RollupQueries.ADD_ROLLUPS, rows=rows).consume()
+
+        with self.neo4j.get_session() as session:
+            session.execute_write(replace)
+
+    def get_rollups(self, granularity: str, start: Optional[float], end: Optional[float]) -> List[Dict[str, Any]]:
+        return self._read_column(
+            RollupQueries.GET_ROLLUPS,
+            granularity=granularity,
+            start=ROLLUP_MIN if start is None else datetime.fromtimestamp(start, timezone.utc),
+            end=ROLLUP_MAX if end is None else datetime.fromtimestamp(end, timezone.utc)
+        )
@@ -0,0 +1,23 @@
+import inspect
+from typing import Dict
+from . import analysis, export, jobs, messages, rollups, threads
+
+QUERY_MODULES = [analysis, export, jobs, messages, rollups, threads]
+
+
+def _query_names() -> Dict[str, str]:
+    names = {}
+    for module in QUERY_MODULES:
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            for name, value in vars(cls).items():
+                if name.isupper() and isinstance(value, str):
+                    names[value] = f"{cls.__name__}.{name}"
+    return names
+
+
+QUERY_NAMES = _query_names()
+
+
+def query_name(query: str) -> str:
+    """Name a Cypher string by its Queries constant, for metrics and logs"""
+    return QUERY_NAMES.get(query, "inline")
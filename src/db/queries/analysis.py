@@ -0,0 +1,20 @@
+class AnalysisQueries:
+    THREAD_STATISTICS = """
+    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
+    WITH t, m {.role, .created_at} as m
+    ORDER BY m.created_at
+    WITH t, collect(m) as messages
+    RETURN {
+        message_count: size(messages),
+        user_messages: size([m in messages WHERE m.role = 'user']),
+        assistant_messages: size([m in messages WHERE m.role = 'assistant']),
+        first_message_time: head(messages).created_at,
+        last_message_time: last(messages).created_at
+    } as stats
+    """
+
+    THREAD_MESSAGES = """
+    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
+    RETURN m {.role, .content, .created_at} as m
+    ORDER BY m.created_at
+    """
@@ -0,0 +1,95 @@
+class ExportQueries:
+    # First pages have no cursor; later pages seek past it on an index
+
+    THREADS_FIRST_PAGE = """
+    MATCH (t:Thread)
+    RETURN t {.id, .status, .created_at, .updated_at} as t
+    ORDER BY t.id
+    LIMIT $limit
+    """
+
+    THREADS_PAGE = """
+    MATCH (t:Thread)
+    WHERE t.id > $after_id
+    RETURN t {.id, .status, .created_at, .updated_at} as t
+    ORDER BY t.id
+    LIMIT $limit
+    """
+
+    THREAD_MESSAGES_FIRST_PAGE = """
+    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
+    WITH m, t
+    ORDER BY m.created_at, m.id
+    LIMIT $limit
+    OPTIONAL MATCH (m)-[d:DUPLICATE_OF]->(c:Message)
+    RETURN {
+        id: m.id,
+        content: m.content,
+        role: m.role,
+        created_at: m.created_at,
+        thread_id: t.id,
+        embedding: CASE WHEN $include_embedding THEN coalesce(m.embedding, c.embedding) END,
+        duplicate_of: c.id,
+        duplicate_distance: d.distance
+    } as m
+    ORDER BY m.created_at, m.id
+    """
+
+    THREAD_MESSAGES_PAGE = """
+    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
+    WHERE m.created_at >= $after_created_at
+      AND (m.created_at > $after_created_at OR m.id > $after_id)
+    WITH m, t
+    ORDER BY m.created_at, m.id
+    LIMIT $limit
+    OPTIONAL MATCH (m)-[d:DUPLICATE_OF]->(c:Message)
+    RETURN {
+        id: m.id,
+        content: m.content,
+        role: m.role,
+        created_at: m.created_at,
+        thread_id: t.id,
+        embedding: CASE WHEN $include_embedding THEN coalesce(m.embedding, c.embedding) END,
+        duplicate_of: c.id,
+        duplicate_distance: d.distance
+    } as m
+    ORDER BY m.created_at, m.id
+    """
+
+    IMPORT_THREADS = """
+    UNWIND $rows as row
+    MERGE (t:Thread {id: row.id})
+    ON CREATE SET t.status = row.status,
+                  t.version = 0,
+                  t.created_at = datetime(row.created_at),
+                  t.updated_at = datetime(row.updated_at)
+    RETURN count(t) as count
+    """
+
+    IMPORT_MESSAGES = """
+    UNWIND $rows as row
+    MATCH (t:Thread {id: row.thread_id})
+    OPTIONAL MATCH (existing:Message {id: row.id})
+    WITH t, row WHERE existing IS NULL
+    OPTIONAL MATCH (c:Message {id: row.duplicate_of})
+    CREATE (m:Message {
+        id: row.id,
+        content: row.content,
+        role: row.role,
+        created_at: datetime(row.created_at)
+    })-[:BELONGS_TO]->(t)
+    SET m.embedding = CASE WHEN c IS NULL THEN row.embedding END,
+        m.content_hash = CASE WHEN c IS NULL THEN row.content_hash END,
+        m.simhash = CASE WHEN c IS NULL THEN row.simhash END,
+        m.simhash_b0 = CASE WHEN c IS NULL THEN row.bands[0] END,
+        m.simhash_b1 = CASE WHEN c IS NULL THEN row.bands[1] END,
+        m.simhash_b2 = CASE WHEN c IS NULL THEN row.bands[2] END,
+        m.simhash_b3 = CASE WHEN c IS NULL THEN row.bands[3] END
+    FOREACH (_ IN CASE WHEN c IS NULL THEN [] ELSE [1] END |
+        CREATE (m)-[:DUPLICATE_OF {distance: coalesce(row.duplicate_distance, 0)}]->(c)
+    )
+    WITH t, count(m) as imported
+    SET t.version = coalesce(t.version, 0) + imported,
+        t.updated_at = datetime()
+    RETURN sum(imported) as count
+    """
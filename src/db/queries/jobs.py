@@ -0,0 +1,49 @@
+class JobQueries:
+    GET_JOB = """
+    MATCH (j:Job {id: $id})-[:FOR_THREAD]->(t:Thread)
+    RETURN j {
+        .id,
+        .kind,
+        thread_id: t.id,
+        .thread_version,
+        .status,
+        .created_at,
+        .started_at,
+        .finished_at,
+        .result,
+        .error
+    } as job
+    """
+
+    GET_COMPLETED_JOB = """
+    MATCH (j:Job {kind: $kind, thread_version: $thread_version, status: $status})
+          -[:FOR_THREAD]->(t:Thread {id: $thread_id})
+    RETURN j {
+        .id,
+        .kind,
+        thread_id: t.id,
+        .thread_version,
+        .status,
+        .created_at,
+        .started_at,
+        .finished_at,
+        .result,
+        .error
+    } as job
+    ORDER BY j.finished_at DESC
+    LIMIT 1
+    """
+
+    SAVE_JOB = """
+    MATCH (t:Thread {id: $thread_id})
+    MERGE (j:Job {id: $id})
+    SET j.kind = $kind,
+        j.thread_version = $thread_version,
+        j.status = $status,
+        j.result = $result,
+        j.error = $error,
+        j.created_at = datetime($created_at),
+        j.started_at = datetime($started_at),
+        j.finished_at = datetime($finished_at)
+    MERGE (j)-[:FOR_THREAD]->(t)
+    """
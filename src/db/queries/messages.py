@@ -1,28 +1,236 @@
 class MessageQueries:
+    THREAD_EXISTS = """
+    MATCH (t:Thread {id: $thread_id})
+    RETURN count(t) as count
+    """
+
+    FIND_DUPLICATE_CANDIDATES = """
+    CALL {
+        MATCH (c:Message {content_hash: $content_hash}) RETURN c
+        UNION
+        MATCH (c:Message {simhash_b0: $b0}) RETURN c
+        UNION
+        MATCH (c:Message {simhash_b1: $b1}) RETURN c
+        UNION
+        MATCH (c:Message {simhash_b2: $b2}) RETURN c
+        UNION
+        MATCH (c:Message {simhash_b3: $b3}) RETURN c
+    }
+    WITH c WHERE c.embedding IS NOT NULL
+    RETURN c.id as id, c.content_hash as content_hash, c.simhash as simhash
+    LIMIT $limit
+    """
+
+    FIND_DUPLICATE_CANDIDATES_BATCH = """
+    UNWIND range(0, size($keys) - 1) as index
+    WITH index, $keys[index] as key
+    CALL {
+        WITH key
+        CALL {
+            WITH key
+            MATCH (c:Message {content_hash: key.content_hash}) RETURN c
+            UNION
+            WITH key
+            MATCH (c:Message {simhash_b0: key.bands[0]}) RETURN c
+            UNION
+            WITH key
+            MATCH (c:Message {simhash_b1: key.bands[1]}) RETURN c
+            UNION
+            WITH key
+            MATCH (c:Message {simhash_b2: key.bands[2]}) RETURN c
+            UNION
+            WITH key
+            MATCH (c:Message {simhash_b3: key.bands[3]}) RETURN c
+        }
+        WITH c WHERE c.embedding IS NOT NULL
+        RETURN c LIMIT $limit
+    }
+    RETURN index, collect({id: c.id, content_hash: c.content_hash, simhash: c.simhash}) as candidates
+    """
+
     CREATE_MESSAGE = """
     MATCH (t:Thread {id: $thread_id})
+    WITH t, t.last_message_at as previous_at, t.last_role as previous_role
     CREATE (m:Message {
         id: $id,
         content: $content,
-        created_at: datetime(),
         role: $role,
+        created_at: datetime(),
         embedding: $embedding,
-        metadata: $metadata
+        content_hash: $content_hash,
+        simhash: $simhash,
+        simhash_b0: $bands[0],
+        simhash_b1: $bands[1],
+        simhash_b2: $bands[2],
+        simhash_b3: $bands[3]
     })-[:BELONGS_TO]->(t)
-    WITH m, t
-    MATCH (prev:Message)-[:BELONGS_TO]->(t)
-    WHERE NOT EXISTS((prev)<-[:NEXT]-())
-    CREATE (prev)-[:NEXT]->(m)
-    RETURN m
+    SET t.version = coalesce(t.version, 0) + 1,
+        t.updated_at = datetime(),
+        t.last_message_at = m.created_at,
+        t.last_role = m.role
+    RETURN m.id as id, t.version as version, m.created_at as created_at,
+           previous_at, previous_role
+    """
+
+    CREATE_DUPLICATE_MESSAGE = """
+    MATCH (t:Thread {id: $thread_id})
+    MATCH (c:Message {id: $canonical_id})
+    WITH t, c, t.last_message_at as previous_at, t.last_role as previous_role
+    CREATE (m:Message {
+        id: $id,
+        content: $content,
+        role: $role,
+        created_at: datetime()
+    })-[:BELONGS_TO]->(t)
+    CREATE (m)-[:DUPLICATE_OF {distance: $distance}]->(c)
+    SET t.version = coalesce(t.version, 0) + 1,
+        t.updated_at = datetime(),
+        t.last_message_at = m.created_at,
+        t.last_role = m.role
+    RETURN CASE WHEN $include_embedding THEN c.embedding END as embedding,
+           t.version as version, m.created_at as created_at,
+           previous_at, previous_role
+    """
+
+    CREATE_MESSAGES_BATCH = """
+    MATCH (t:Thread {id: $thread_id})
+    WITH t, t.last_message_at as previous_at, t.last_role as previous_role
+    CALL {
+        WITH t
+        UNWIND $canonical as row
+        CREATE (m:Message {
+            id: row.id,
+            content: row.content,
+            role: row.role,
+            created_at: datetime(row.created_at),
+            embedding: row.embedding,
+            content_hash: row.content_hash,
+            simhash: row.simhash,
+            simhash_b0: row.bands[0],
+            simhash_b1: row.bands[1],
+            simhash_b2: row.bands[2],
+            simhash_b3: row.bands[3]
+        })-[:BELONGS_TO]->(t)
+        RETURN collect(m) as canonical_messages
+    }
+    CALL {
+        WITH t
+        UNWIND $duplicates as row
+        MATCH (c:Message {id: row.canonical_id})
+        CREATE (m:Message {
+            id: row.id,
+            content: row.content,
+            role: row.role,
+            created_at: datetime(row.created_at)
+        })-[:BELONGS_TO]->(t)
+        CREATE (m)-[:DUPLICATE_OF {distance: row.distance}]->(c)
+        RETURN collect(m) as duplicate_messages
+    }
+    WITH t, previous_at, previous_role, canonical_messages + duplicate_messages as written
+    WITH t, previous_at, previous_role, written, reduce(
+        last = null, m IN written |
+        CASE WHEN last IS NULL OR m.created_at >= last.created_at THEN m ELSE last END
+    ) as last
+    SET t.version = coalesce(t.version, 0) + size(written),
+        t.updated_at = datetime(),
+        t.last_message_at = coalesce(last.created_at, t.last_message_at),
+        t.last_role = coalesce(last.role, t.last_role)
+    RETURN size(written) as count, [m IN written | m.id] as ids, t.version as version,
+           previous_at, previous_role
     """
 
     GET_MESSAGE = """
-    MATCH (m:Message {id: $id})
-    RETURN m
+    MATCH (m:Message {id: $id})-[:BELONGS_TO]->(t:Thread)
+    OPTIONAL MATCH (m)-[:DUPLICATE_OF]->(c:Message)
+    RETURN {
+        id: m.id,
+        content: m.content,
+        role: m.role,
+        created_at: m.created_at,
+        thread_id: t.id,
+        embedding: CASE WHEN $include_embedding THEN coalesce(m.embedding, c.embedding) END,
+        metadata: coalesce(m.metadata, {}),
+        duplicate_of: c.id
+    } as m
+    """
+
+    GET_CONTEXT_AROUND_MESSAGE = """
+    MATCH (m:Message {id: $message_id})-[:BELONGS_TO]->(t:Thread {id: $thread_id})
+    MATCH (context:Message)-[:BELONGS_TO]->(t)
+    WHERE abs(duration.between(context.created_at, m.created_at).seconds) <= $window_seconds
+    OPTIONAL MATCH (context)-[:DUPLICATE_OF]->(c:Message)
+    RETURN {
+        id: context.id,
+        content: context.content,
+        role: context.role,
+        created_at: context.created_at,
+        thread_id: t.id,
+        embedding: CASE WHEN $include_embedding THEN coalesce(context.embedding, c.embedding) END,
+        metadata: coalesce(context.metadata, {})
+    } as context
+    ORDER BY context.created_at
+    """
+
+    GET_RECENT_CONTEXT = """
+    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
+    WITH m, t
+    ORDER BY m.created_at DESC
+    LIMIT $limit
+    OPTIONAL MATCH (m)-[:DUPLICATE_OF]->(c:Message)
+    RETURN {
+        id: m.id,
+        content: m.content,
+        role: m.role,
+        created_at: m.created_at,
+        thread_id: t.id,
+        embedding: CASE WHEN $include_embedding THEN coalesce(m.embedding, c.embedding) END,
+        metadata: coalesce(m.metadata, {})
+    } as m
+    ORDER BY m.created_at DESC
+    """
+
+    FIND_SIMILAR_MESSAGES = """
+    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread)
+    WHERE m.embedding IS NOT NULL
+    WITH m, t, gds.similarity.cosine(m.embedding, $embedding) AS similarity
+    WHERE similarity >= $threshold
+    OPTIONAL MATCH (m)-[:DUPLICATE_OF]->(c:Message)
+    RETURN {
+        id: m.id,
+        content: m.content,
+        role: m.role,
+        created_at: m.created_at,
+        thread_id: t.id,
+        embedding: CASE WHEN $include_embedding THEN coalesce(m.embedding, c.embedding) END,
+        metadata: coalesce(m.metadata, {})
+    } as m
+    ORDER BY similarity DESC
+    LIMIT $limit
     """
 
     GET_THREAD_MESSAGES = """
     MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
-    RETURN m
+    RETURN {
+        id: m.id,
+        content: m.content,
+        role: m.role,
+        created_at: m.created_at,
+        thread_id: t.id
+    } as m
     ORDER BY m.created_at
-    """
\ No newline at end of file
+    """
+
+    DEDUP_REPORT = """
+    MATCH (m:Message)
+    WITH count(m) as total_messages,
+         count(m.embedding) as canonical_messages
+    OPTIONAL MATCH (:Message)-[d:DUPLICATE_OF]->(:Message)
+    WITH total_messages, canonical_messages,
+         count(d) as duplicate_messages,
+         sum(CASE WHEN d.distance = 0 THEN 1 ELSE 0 END) as exact_duplicates
+    RETURN total_messages, canonical_messages, duplicate_messages, exact_duplicates,
+           coalesce(head(COLLECT {
+               MATCH (s:Message) WHERE s.embedding IS NOT NULL
+               RETURN size(s.embedding) LIMIT 1
+           }), 0) as dimensions
+    """
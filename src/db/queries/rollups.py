@@ -0,0 +1,38 @@
+class RollupQueries:
+    ADD_ROLLUPS = """
+    UNWIND $rows as row
+    MERGE (r:Rollup {granularity: row.granularity, bucket: datetime({epochSeconds: toInteger(row.bucket)})})
+    SET r.message_count = coalesce(r.message_count, 0) + row.message_count,
+        r.user_messages = coalesce(r.user_messages, 0) + row.user_messages,
+        r.assistant_messages = coalesce(r.assistant_messages, 0) + row.assistant_messages,
+        r.duplicate_messages = coalesce(r.duplicate_messages, 0) + row.duplicate_messages,
+        r.response_count = coalesce(r.response_count, 0) + row.response_count,
+        r.response_seconds = coalesce(r.response_seconds, 0.0) + row.response_seconds,
+        r.response_histogram = [
+            i IN range(0, size(row.response_histogram) - 1) |
+            coalesce(r.response_histogram[i], 0) + row.response_histogram[i]
+        ]
+    RETURN count(r) as count
+    """
+
+    DELETE_ROLLUPS = """
+    MATCH (r:Rollup)
+    DELETE r
+    """
+
+    GET_ROLLUPS = """
+    MATCH (r:Rollup {granularity: $granularity})
+    WHERE r.bucket >= $start AND r.bucket < $end
+    RETURN r {
+        .granularity,
+        bucket: r.bucket.epochSeconds,
+        .message_count,
+        .user_messages,
+        .assistant_messages,
+        .duplicate_messages,
+        .response_count,
+        .response_seconds,
+        .response_histogram
+    } as r
+    ORDER BY r.bucket
+    """
@@ -0,0 +1,66 @@
+class ThreadQueries:
+    CREATE_THREAD = """
+    CREATE (t:Thread {
+        id: $id,
+        status: $status,
+        version: 0,
+        created_at: datetime(),
+        updated_at: datetime()
+    })
+    RETURN t.id as id
+    """
+
+    GET_THREAD = """
+    MATCH (t:Thread {id: $thread_id})
+    RETURN t {.id, .status, .created_at, .updated_at} as t
+    """
+
+    GET_THREAD_VERSION = """
+    MATCH (t:Thread {id: $thread_id})
+    RETURN coalesce(t.version, 0) as version,
+           t.updated_at.epochMillis as updated_at,
+           COUNT { (t)<-[:BELONGS_TO]-(:Message) } as message_count
+    """
+
+    UPDATE_THREAD_STATUS = """
+    MATCH (t:Thread {id: $thread_id})
+    SET t.status = $status,
+        t.updated_at = datetime()
+    RETURN t {.id, .status, .created_at, .updated_at} as t
+    """
+
+    DELETE_THREAD_MESSAGES = """
+    MATCH (t:Thread {id: $thread_id})
+    OPTIONAL MATCH (m:Message)-[:BELONGS_TO]->(t)
+    WHERE m.id IN $ids AND NOT EXISTS {
+        MATCH (m)<-[:DUPLICATE_OF]-(:Message)-[:BELONGS_TO]->(other:Thread)
+        WHERE other <> t
+    }
+    WITH t, collect(m) as messages
+    FOREACH (m IN messages | DETACH DELETE m)
+    SET t.version = coalesce(t.version, 0) + size(messages),
+        t.updated_at = datetime()
+    RETURN size(messages) as count, t.version as version
+    """
+
+    GET_THREAD_ANALYTICS = """
+    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
+    WITH m, t
+    OPTIONAL MATCH (m)-[r:NEXT]->(next:Message)
+    RETURN
+        count(m) as message_count,
+        sum(CASE WHEN m.role = 'user' THEN 1 ELSE 0 END) as user_messages,
+        sum(CASE WHEN m.role = 'assistant' THEN 1 ELSE 0 END) as assistant_messages,
+        avg(duration.between(m.created_at, next.created_at).seconds) as avg_response_time
+    """
+
+    FIND_SIMILAR_THREADS = """
+    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread)
+    WHERE m.embedding IS NOT NULL
+    WITH m, t, gds.similarity.cosine(m.embedding, $embedding) AS score
+    WHERE score >= $threshold
+    WITH t, max(score) as max_score
+    RETURN t.id as id
+    ORDER BY max_score DESC
+    LIMIT $limit
+    """
@@ -0,0 +1,274 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from ..core.config import get_settings
+
+NEO4J_BACKEND = "neo4j"
+EMBEDDED_BACKEND = "embedded"
+
+
+class Repository(ABC):
+    """Storage operations the services need, independent of the backend.
+
+    Ids are strings. Methods return plain maps shaped like the Cypher
+    projections in ``src.db.queries``; timestamps are either driver
+    DateTimes or ``datetime`` objects, so callers convert with
+    ``to_native()`` only when it is present. Methods are blocking and safe
+    to call from any thread.
+    """
+
+    name: str
+
+    def init_schema(self, embedding_dimensions: Optional[int] = None) -> None:
+        """Create constraints and indexes, if the backend has any"""
+
+    def close(self) -> None:
+        """Release connections and flush pending writes"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend details for the health endpoint"""
+        return {"backend": self.name}
+
+    # Threads
+
+    @abstractmethod
+    def create_thread(self, thread_id: str, status: str) -> None:
+        ...
+
+    @abstractmethod
+    def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """Thread map with id, status, created_at and updated_at"""
+
+    @abstractmethod
+    def get_thread_version(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """Write counter, updated_at in epoch milliseconds and message count"""
+
+    @abstractmethod
+    def update_thread_status(self, thread_id: str, status: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_thread_messages(self, thread_id: str) -> List[Dict[str, Any]]:
+        """Every message of a thread, oldest first"""
+
+    @abstractmethod
+    def get_thread_analytics(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def delete_thread_messages(self, thread_id: str, message_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """Remove the given messages of a thread from hot storage; returns how many
+        were removed and the new thread version.
+
+        Canonical messages that duplicates in other threads still point at
+        are kept, so those duplicates keep their embedding.
+        """
+
+    @abstractmethod
+    def find_similar_threads(self, embedding: List[float], threshold: float, limit: int) -> List[str]:
+        """Ids of threads holding a message at least ``threshold`` similar, best first"""
+
+    # Messages
+
+    @abstractmethod
+    def thread_exists(self, thread_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def find_duplicate_candidates(
+        self,
+        content_hash: str,
+        bands: List[int],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Canonical messages sharing the content hash or any SimHash band"""
+
+    def find_duplicate_candidates_batch(
+        self,
+        keys: List[Tuple[str, List[int]]],
+        limit: int
+    ) -> List[List[Dict[str, Any]]]:
+        """Duplicate candidates for several (content_hash, bands) keys, in key order"""
+        return [self.find_duplicate_candidates(content_hash, bands, limit) for content_hash, bands in keys]
+
+    @abstractmethod
+    def create_message(
+        self,
+        message_id: str,
+        content: str,
+        role: str,
+        thread_id: str,
+        embedding: List[float],
+        content_hash: str,
+        simhash: int,
+        bands: List[int]
+    ) -> Optional[Dict[str, Any]]:
+        """Store a canonical message; returns its id, created_at, the new thread version
+        and the thread's previous last message as previous_at and previous_role"""
+
+    @abstractmethod
+    def create_duplicate_message(
+        self,
+        message_id: str,
+        content: str,
+        role: str,
+        thread_id: str,
+        canonical_id: str,
+        distance: int,
+        include_embedding: bool
+    ) -> Optional[Dict[str, Any]]:
+        """Store a message linked to its canonical; returns the canonical embedding if
+        asked, plus created_at, version, previous_at and previous_role as above"""
+
+    @abstractmethod
+    def create_messages_batch(
+        self,
+        thread_id: str,
+        canonical: List[Dict[str, Any]],
+        duplicates: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Store prepared rows in one write; returns the count and ids written, the
+        new thread version, previous_at and previous_role.
+
+        Duplicates whose canonical was deleted since it was looked up are not
+        written and are missing from ``ids``.
+        """
+
+    @abstractmethod
+    def get_recent_context(
+        self,
+        thread_id: str,
+        limit: int,
+        include_embedding: bool
+    ) -> List[Dict[str, Any]]:
+        """The newest ``limit`` messages of a thread, newest first"""
+
+    @abstractmethod
+    def get_context_around_message(
+        self,
+        message_id: str,
+        thread_id: str,
+        window_seconds: float,
+        include_embedding: bool
+    ) -> List[Dict[str, Any]]:
+        """Messages within ``window_seconds`` of a message, oldest first"""
+
+    def stream_context(
+        self,
+        thread_id: str,
+        message_id: Optional[str],
+        limit: int,
+        window_seconds: float,
+        include_embedding: bool,
+        fetch_size: int
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the same messages as the context lookups as they are read"""
+        if message_id:
+            yield from self.get_context_around_message(message_id, thread_id, window_seconds, include_embedding)
+        else:
+            yield from self.get_recent_context(thread_id, limit, include_embedding)
+
+    @abstractmethod
+    def get_message(self, message_id: str, include_embedding: bool) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def find_similar_messages(
+        self,
+        embedding: List[float],
+        threshold: float,
+        limit: int,
+        include_embedding: bool
+    ) -> List[Dict[str, Any]]:
+        """Messages at least ``threshold`` cosine-similar, best first"""
+
+    @abstractmethod
+    def get_dedup_report(self) -> Dict[str, Any]:
+        """Message and duplicate counts, embedding dimensions and bytes per stored value"""
+
+    # Analysis
+
+    @abstractmethod
+    def get_thread_statistics(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """Message counts by role plus first and last message times"""
+
+    @abstractmethod
+    def get_conversation(self, thread_id: str) -> List[Dict[str, Any]]:
+        """Role, content and created_at of every message, oldest first"""
+
+    # Export and import
+
+    @abstractmethod
+    def get_threads_page(self, after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """Threads ordered by id, after ``after_id``"""
+
+    @abstractmethod
+    def get_thread_messages_page(
+        self,
+        thread_id: str,
+        after_created_at: Any,
+        after_id: Optional[str],
+        include_embedding: bool,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Messages ordered by (created_at, id), after the given key"""
+
+    @abstractmethod
+    def import_threads(self, rows: List[Dict[str, Any]]) -> int:
+        """Create threads that do not exist yet; returns the number of rows seen"""
+
+    @abstractmethod
+    def import_messages(self, rows: List[Dict[str, Any]]) -> int:
+        """Create messages that do not exist yet in existing threads"""
+
+    # Jobs
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_completed_job(
+        self,
+        kind: str,
+        thread_id: str,
+        thread_version: int,
+        status: str
+    ) -> Optional[Dict[str, Any]]:
+        """Latest finished job of a kind for one thread version"""
+
+    @abstractmethod
+    def save_job(self, job: Dict[str, Any]) -> None:
+        """Upsert a job; timestamps are ISO strings and result is JSON text"""
+
+    # Rollups
+
+    @abstractmethod
+    def add_rollups(self, rows: List[Dict[str, Any]]) -> None:
+        """Add rollup deltas to their (granularity, bucket) rows; buckets are epoch seconds"""
+
+    @abstractmethod
+    def replace_rollups(self, rows: List[Dict[str, Any]]) -> None:
+        """Replace every stored rollup with ``rows``"""
+
+    @abstractmethod
+    def get_rollups(self, granularity: str, start: Optional[float], end: Optional[float]) -> List[Dict[str, Any]]:
+        """Rollups of one granularity with buckets in [start, end), oldest first"""
+
+
+@lru_cache()
+def get_repository() -> Repository:
+    """The process-wide repository for the configured STORAGE_BACKEND"""
+    settings = get_settings()
+    if settings.STORAGE_BACKEND == EMBEDDED_BACKEND:
+        from .embedded import EmbeddedRepository, EmbeddedStore
+        return EmbeddedRepository(EmbeddedStore(
+            settings.EMBEDDED_DATA_DIR,
+            fsync=settings.EMBEDDED_FSYNC,
+            checkpoint_bytes=settings.EMBEDDED_CHECKPOINT_BYTES
+        ))
+    if settings.STORAGE_BACKEND != NEO4J_BACKEND:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+    from .neo4j import Neo4jService
+    from .neo4j_repository import Neo4jRepository
+    return Neo4jRepository(Neo4jService())
@@ -1,11 +1,23 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from fastapi.middleware.cors import CORSMiddleware
 from .api.routes.messages import router as messages_router
 from .api.routes.threads import router as threads_router
+from .api.routes.analysis import router as analysis_router
+from .api.routes.jobs import router as jobs_router
 from .api.error_handlers import context_manager_exception_handler
+from .api.timing import TimingMiddleware
+from .api.profiling import ProfilingMiddleware
+from .api.consistency import BookmarkMiddleware
 from .core.exceptions import ContextManagerException
 from .core.config import get_settings
-from .db.neo4j import Neo4jService
+from .db.repository import NEO4J_BACKEND, get_repository
+from .services.job_service import get_job_queue
+from .services.openai_scheduler import get_openai_scheduler
+from .services.completion_cache import get_completion_cache
+from .services.cold_tier import get_cold_tier
+from .services.embeddings import get_embedding_provider
+from .services.rollups import get_rollups
 from contextlib import asynccontextmanager
 
 settings = get_settings()
@@ -13,11 +25,19 @@ settings = get_settings()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    neo4j_service = Neo4jService()
-    neo4j_service.init_constraints()
+    repository = get_repository()
+    repository.init_schema(get_embedding_provider().dimensions)
+    job_queue = get_job_queue()
+    await job_queue.start()
+    rollups = get_rollups()
+    if rollups:
+        await rollups.start()
     yield
     # Shutdown
-    neo4j_service.close()
+    if rollups:
+        await rollups.stop()
+    await job_queue.stop()
+    repository.close()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -32,8 +52,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[settings.NEO4J_BOOKMARK_HEADER],
 )
 
+# Pass causal-consistency bookmarks between clients and Neo4j sessions
+if settings.STORAGE_BACKEND == NEO4J_BACKEND:
+    app.add_middleware(BookmarkMiddleware, header=settings.NEO4J_BOOKMARK_HEADER)
+
+# Time every request per route and per Neo4j/OpenAI stage
+if settings.METRICS_ENABLED:
+    app.add_middleware(TimingMiddleware)
+
+# Sample CPU stacks of selected requests into flamegraph files
+if settings.PROFILE_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Register error handlers
 app.add_exception_handler(
     ContextManagerException,
@@ -49,8 +82,32 @@ app.include_router(
     threads_router,
     prefix=settings.API_V1_STR
 )
+app.include_router(
+    analysis_router,
+    prefix=settings.API_V1_STR
+)
+app.include_router(
+    jobs_router,
+    prefix=settings.API_V1_STR
+)
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""    
-    return {"status": "healthy"}
\ No newline at end of file
+    """Health check endpoint"""
+    health = {"status": "healthy"}
+    health["storage"] = get_repository().stats()
+    provider = get_embedding_provider()
+    health["embeddings"] = {"provider": provider.name, "dimensions": provider.dimensions}
+    if settings.OPENAI_SCHEDULER_ENABLED:
+        health["openai"] = get_openai_scheduler().stats()
+    if settings.COMPLETION_CACHE_ENABLED:
+        health["completion_cache"] = get_completion_cache().stats()
+    if settings.COLD_TIER_ENABLED:
+        health["cold_tier"] = get_cold_tier().stats()
+    return health
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics endpoint"""
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Any, Optional
+from datetime import datetime
+from uuid import UUID, uuid4
+from ..core.constants import JobStatus
+
+class Job(BaseModel):
+    id: UUID = Field(default_factory=uuid4)
+    kind: str
+    thread_id: UUID
+    thread_version: int
+    status: str = Field(default=JobStatus.PENDING)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+class JobAccepted(BaseModel):
+    job_id: UUID
+    status: str
+    status_url: str
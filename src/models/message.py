@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 from datetime import datetime
 from uuid import UUID, uuid4
 from ..core.constants import MessageRole
@@ -18,4 +18,27 @@ class Message(BaseModel):
     thread_id: UUID
     created_at: datetime = Field(default_factory=datetime.utcnow)
     embedding: Optional[List[float]] = None
-    metadata: Dict = Field(default_factory=dict)
\ No newline at end of file
+    metadata: Dict = Field(default_factory=dict)
+    duplicate_of: Optional[UUID] = None
+
+    @classmethod
+    def from_record(cls, data: Dict[str, Any]) -> "Message":
+        """Build a Message from a Cypher map without re-validation.
+
+        Only for maps already shaped by our own projections: string ids, a
+        driver DateTime for created_at and optional embedding.
+        """
+        created_at = data["created_at"]
+        if hasattr(created_at, "to_native"):
+            created_at = created_at.to_native()
+        duplicate_of = data.get("duplicate_of")
+        return cls.model_construct(
+            id=UUID(data["id"]),
+            content=data["content"],
+            role=data["role"],
+            thread_id=UUID(data["thread_id"]),
+            created_at=created_at,
+            embedding=data.get("embedding"),
+            metadata=data.get("metadata") or {},
+            duplicate_of=UUID(duplicate_of) if duplicate_of else None
+        )
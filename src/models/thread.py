@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Dict, Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from uuid import UUID, uuid4
 from ..core.constants import ThreadStatus
@@ -7,6 +7,9 @@ from ..core.constants import ThreadStatus
 class ThreadCreate(BaseModel):
     metadata: Optional[Dict] = Field(default_factory=dict)
 
+class ThreadStatusUpdate(BaseModel):
+    status: str = Field(..., pattern="^(active|archived)$")
+
 class Thread(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: UUID = Field(default_factory=uuid4)
@@ -15,6 +18,18 @@ class Thread(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     metadata: Dict = Field(default_factory=dict)
 
+    @classmethod
+    def from_record(cls, data: Dict[str, Any]) -> "Thread":
+        """Build a Thread from a projected storage map without re-validation"""
+        created_at, updated_at = data["created_at"], data["updated_at"]
+        return cls.model_construct(
+            id=UUID(data["id"]),
+            status=data["status"],
+            created_at=created_at.to_native() if hasattr(created_at, "to_native") else created_at,
+            updated_at=updated_at.to_native() if hasattr(updated_at, "to_native") else updated_at,
+            metadata=data.get("metadata") or {}
+        )
+
 class ThreadSummary(BaseModel):
     id: UUID
     message_count: int
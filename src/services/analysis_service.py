@@ -1,77 +1,49 @@
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Optional
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from collections import defaultdict
-from ..db.neo4j import Neo4jService
+from ..db.repository import get_repository
 from ..services.openai_service import OpenAIService
+from ..services.rollups import COUNTERS, GRANULARITIES, RESPONSE_TIME_BOUNDS, get_rollups
 from ..core.exceptions import ContextManagerException
 
 class AnalysisService:
     def __init__(self):
-        self.neo4j = Neo4jService()
+        self.repository = get_repository()
         self.openai = OpenAIService()
+        self.rollups = get_rollups()
 
     async def get_thread_analytics(self, thread_id: UUID) -> Dict[str, Any]:
         """Get comprehensive analytics for a thread"""
-        with self.neo4j.get_session() as session:
-            result = session.execute_read(
-                lambda tx: tx.run("""
-                    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
-                    WITH m, t
-                    ORDER BY m.created_at
-                    WITH collect(m) as messages, t
-                    RETURN {
-                        message_count: size(messages),
-                        user_messages: size([m in messages WHERE m.role = 'user']),
-                        assistant_messages: size([m in messages WHERE m.role = 'assistant']),
-                        first_message_time: head(messages).created_at,
-                        last_message_time: last(messages).created_at
-                    } as stats
-                """,
-                thread_id=str(thread_id)
-                )
-            ).single()
-
-            if not result:
-                raise ContextManagerException(f"Thread {thread_id} not found")
-
-            stats = result["stats"]
-            
-            # Calculate duration and activity metrics
-            first_message = datetime.fromisoformat(str(stats["first_message_time"]))
-            last_message = datetime.fromisoformat(str(stats["last_message_time"]))
-            duration = last_message - first_message
-            
-            return {
-                "message_statistics": {
-                    "total_messages": stats["message_count"],
-                    "user_messages": stats["user_messages"],
-                    "assistant_messages": stats["assistant_messages"],
-                    "user_message_ratio": stats["user_messages"] / stats["message_count"]
-                },
-                "time_metrics": {
-                    "thread_duration_minutes": duration.total_seconds() / 60,
-                    "messages_per_hour": (stats["message_count"] / (duration.total_seconds() / 3600))
-                        if duration.total_seconds() > 0 else 0,
-                    "first_message": first_message.isoformat(),
-                    "last_message": last_message.isoformat()
-                }
+        stats = self.repository.get_thread_statistics(str(thread_id))
+        if not stats:
+            raise ContextManagerException(f"Thread {thread_id} not found")
+
+        # Calculate duration and activity metrics
+        first_message = datetime.fromisoformat(str(stats["first_message_time"]))
+        last_message = datetime.fromisoformat(str(stats["last_message_time"]))
+        duration = last_message - first_message
+        
+        return {
+            "message_statistics": {
+                "total_messages": stats["message_count"],
+                "user_messages": stats["user_messages"],
+                "assistant_messages": stats["assistant_messages"],
+                "user_message_ratio": stats["user_messages"] / stats["message_count"]
+            },
+            "time_metrics": {
+                "thread_duration_minutes": duration.total_seconds() / 60,
+                "messages_per_hour": (stats["message_count"] / (duration.total_seconds() / 3600))
+                    if duration.total_seconds() > 0 else 0,
+                "first_message": first_message.isoformat(),
+                "last_message": last_message.isoformat()
             }
+        }
 
     async def analyze_conversation_patterns(self, thread_id: UUID) -> Dict[str, Any]:
         """Analyze conversation patterns and interaction dynamics"""
-        messages = []
-        with self.neo4j.get_session() as session:
-            result = session.execute_read(
-                lambda tx: tx.run("""
-                    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
-                    RETURN m
-                    ORDER BY m.created_at
-                """,
-                thread_id=str(thread_id)
-                )
-            )
-            messages = [dict(record["m"]) for record in result]
+        messages = self.repository.get_conversation(str(thread_id))
 
         if not messages:
             raise ContextManagerException(f"No messages found in thread {thread_id}")
@@ -116,17 +88,7 @@ class AnalysisService:
 
     async def get_topic_evolution(self, thread_id: UUID) -> List[Dict[str, Any]]:
         """Analyze how topics evolve throughout the conversation"""
-        with self.neo4j.get_session() as session:
-            result = session.execute_read(
-                lambda tx: tx.run("""
-                    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
-                    RETURN m
-                    ORDER BY m.created_at
-                """,
-                thread_id=str(thread_id)
-                )
-            )
-            messages = [dict(record["m"]) for record in result]
+        messages = self.repository.get_conversation(str(thread_id))
 
         if not messages:
             raise ContextManagerException(f"No messages found in thread {thread_id}")
@@ -153,4 +115,72 @@ class AnalysisService:
                 "message_count": len(window_messages)
             })
 
-        return topic_evolution
\ No newline at end of file
+        return topic_evolution
+
+    def _global_rollups(self, granularity: str, start: Optional[datetime], end: Optional[datetime]) -> List[Dict[str, Any]]:
+        if not self.rollups:
+            raise ContextManagerException("Global rollups are disabled")
+        if granularity not in GRANULARITIES:
+            raise ContextManagerException(f"Unknown granularity: {granularity}")
+        return self.rollups.get(granularity, start, end)
+
+    @staticmethod
+    def _response_histogram(counts: List[int]) -> List[Dict[str, Any]]:
+        bounds = list(RESPONSE_TIME_BOUNDS) + [None]
+        return [{"max_seconds": bound, "count": count} for bound, count in zip(bounds, counts)]
+
+    async def get_global_buckets(
+        self,
+        granularity: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Corpus-wide message counts and response times per hour or day"""
+        return [
+            {
+                "bucket": datetime.fromtimestamp(row["bucket"], timezone.utc).isoformat(),
+                **{name: row[name] for name in COUNTERS},
+                "average_response_time": row["response_seconds"] / row["response_count"]
+                    if row["response_count"] else 0,
+                "response_histogram": self._response_histogram(row["response_histogram"])
+            }
+            for row in self._global_rollups(granularity, start, end)
+        ]
+
+    async def get_global_summary(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        granularity: str = "day"
+    ) -> Dict[str, Any]:
+        """Corpus-wide totals over the buckets starting in [start, end)"""
+        rows = self._global_rollups(granularity, start, end)
+        totals = {name: sum(row[name] for row in rows) for name in COUNTERS}
+        histogram = [sum(counts) for counts in zip(*(row["response_histogram"] for row in rows))]
+        return {
+            "message_statistics": {
+                "total_messages": totals["message_count"],
+                "user_messages": totals["user_messages"],
+                "assistant_messages": totals["assistant_messages"],
+                "duplicate_messages": totals["duplicate_messages"],
+                "user_message_ratio": totals["user_messages"] / totals["message_count"]
+                    if totals["message_count"] else 0
+            },
+            "response_time_analysis": {
+                "response_count": totals["response_count"],
+                "average_response_time": totals["response_seconds"] / totals["response_count"]
+                    if totals["response_count"] else 0,
+                "histogram": self._response_histogram(histogram or [0] * (len(RESPONSE_TIME_BOUNDS) + 1))
+            },
+            "time_metrics": {
+                "first_bucket": datetime.fromtimestamp(rows[0]["bucket"], timezone.utc).isoformat() if rows else None,
+                "last_bucket": datetime.fromtimestamp(rows[-1]["bucket"], timezone.utc).isoformat() if rows else None,
+                "buckets": len(rows)
+            }
+        }
+
+    async def rebuild_global_rollups(self) -> Dict[str, Any]:
+        """Recompute the global rollups from every stored message"""
+        if not self.rollups:
+            raise ContextManagerException("Global rollups are disabled")
+        return await asyncio.to_thread(self.rollups.rebuild)
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Optional, Tuple
+from uuid import UUID
+from ..core.config import get_settings
+
+MISSING = object()
+
+
+class ThreadVersionRegistry:
+    """Process-local view of each thread's write counter.
+
+    Appends made through this process update the registry immediately.
+    Entries expire after a short TTL so appends made by other workers are
+    picked up on the next lookup against the graph. Entries are kept in
+    expiry order and dropped once expired, so the registry only holds
+    threads written within the last TTL.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._versions: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, thread_id: UUID) -> Optional[int]:
+        key = str(thread_id)
+        with self._lock:
+            entry = self._versions.get(key)
+            if entry is None:
+                return None
+            version, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._versions[key]
+                return None
+            return version
+
+    def set(self, thread_id: UUID, version: int) -> None:
+        key = str(thread_id)
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            current = self._versions.get(key)
+            # Never move backwards when concurrent appends report out of order
+            if current is not None and current[0] > version:
+                return
+            self._versions[key] = (version, now + self.ttl_seconds)
+            self._versions.move_to_end(key)
+
+    def _prune(self, now: float) -> None:
+        """Drop expired entries; every entry shares one TTL, so they sit at the front"""
+        while self._versions:
+            key, (_, expires_at) = next(iter(self._versions.items()))
+            if expires_at >= now:
+                return
+            del self._versions[key]
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+
+class AnalyticsCache:
+    """LRU cache of analysis results keyed by (kind, thread id, thread version)"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value or MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+@lru_cache()
+def get_thread_versions() -> ThreadVersionRegistry:
+    return ThreadVersionRegistry(get_settings().THREAD_VERSION_TTL_SECONDS)
+
+
+@lru_cache()
+def get_analytics_cache() -> AnalyticsCache:
+    settings = get_settings()
+    return AnalyticsCache(
+        settings.ANALYSIS_CACHE_MAX_ENTRIES,
+        settings.ANALYSIS_CACHE_TTL_SECONDS
+    )
@@ -0,0 +1,126 @@
+import base64
+import gzip
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+import orjson
+from ..core.config import get_settings
+
+SEGMENT_SUFFIX = ".ndjson.gz"
+
+
+class ColdTier:
+    """Archived threads kept as compressed segment files outside hot storage.
+
+    A segment is the thread's NDJSON export, embeddings included, gzipped
+    into one file per thread. Hot similarity scans never see it; ``search``
+    scans segments only when a caller asks for archived messages.
+    """
+
+    def __init__(self, directory: str, compress_level: int = 6):
+        self.directory = directory
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, thread_id: str) -> str:
+        return os.path.join(self.directory, f"{thread_id}{SEGMENT_SUFFIX}")
+
+    def exists(self, thread_id: str) -> bool:
+        return os.path.exists(self._path(thread_id))
+
+    def write(self, thread_id: str, lines: Iterable[bytes]) -> int:
+        """Replace a thread's segment with ``lines``; returns the compressed size"""
+        path = self._path(thread_id)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=self.compress_level, mtime=0) as f:
+                for line in lines:
+                    f.write(line)
+            raw.flush()
+            os.fsync(raw.fileno())
+        with self._lock:
+            os.replace(tmp, path)
+        return os.path.getsize(path)
+
+    def chunks(self, thread_id: str, size: int = 1 << 16) -> Iterator[bytes]:
+        """Decompressed segment bytes, for feeding the NDJSON importer"""
+        with gzip.open(self._path(thread_id), "rb") as f:
+            while chunk := f.read(size):
+                yield chunk
+
+    def messages(self, thread_id: str) -> Iterator[Dict[str, Any]]:
+        """Message lines of a segment, as exported"""
+        with gzip.open(self._path(thread_id), "rb") as f:
+            for line in f:
+                row = orjson.loads(line)
+                if row.get("type") == "message":
+                    yield row
+
+    def remove(self, thread_id: str) -> None:
+        with self._lock:
+            try:
+                os.remove(self._path(thread_id))
+            except FileNotFoundError:
+                pass
+
+    def thread_ids(self) -> List[str]:
+        return sorted(
+            name[:-len(SEGMENT_SUFFIX)]
+            for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def search(
+        self,
+        embedding: List[float],
+        threshold: float,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Brute-force cosine scan of every segment; rows carry a ``score``, best first"""
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0:
+            return []
+        hits: List[Dict[str, Any]] = []
+        for thread_id in self.thread_ids():
+            try:
+                rows = [row for row in self.messages(thread_id) if row.get("embedding")]
+            except FileNotFoundError:
+                # Restored while we were scanning
+                continue
+            if not rows:
+                continue
+            matrix = np.stack([
+                np.frombuffer(base64.b64decode(row["embedding"]), dtype="<f4") for row in rows
+            ])
+            if matrix.shape[1] != len(query):
+                continue
+            norms = np.linalg.norm(matrix, axis=1)
+            scores = (matrix @ query) / np.where(norms == 0, 1, norms * norm)
+            for i in np.flatnonzero(scores >= threshold):
+                hits.append({**rows[i], "score": float(scores[i])})
+            hits = sorted(hits, key=lambda row: row["score"], reverse=True)[:limit]
+        return hits
+
+    def stats(self) -> Dict[str, int]:
+        segments = size = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(SEGMENT_SUFFIX):
+                continue
+            try:
+                size += entry.stat().st_size
+            except FileNotFoundError:
+                continue
+            segments += 1
+        return {"segments": segments, "bytes": size}
+
+
+@lru_cache()
+def get_cold_tier() -> Optional[ColdTier]:
+    settings = get_settings()
+    if not settings.COLD_TIER_ENABLED:
+        return None
+    return ColdTier(settings.COLD_TIER_DIR, settings.COLD_TIER_COMPRESS_LEVEL)
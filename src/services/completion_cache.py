@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from .analytics_cache import MISSING, AnalyticsCache
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def completion_key(
+    model: str,
+    template: str,
+    template_version: int,
+    temperature: float,
+    max_tokens: int,
+    prompt: str
+) -> str:
+    """Content address of a completion request"""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    parts = [model, template, template_version, temperature, max_tokens, prompt_hash]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Two-tier cache of completion text keyed by completion_key.
+
+    The memory tier is an LRU; the disk tier is a SQLite file shared by every
+    worker on the host and surviving restarts. Disk hits are promoted into
+    memory. Both tiers expire entries after the same TTL. Disk reads and
+    writes run in a worker thread so they never block the event loop; call
+    ``init_disk`` once before using the disk tier.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.path = os.path.abspath(path) if path else None
+        self.memory = AnalyticsCache(max_entries, ttl_seconds)
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def init_disk(self) -> None:
+        """Create the SQLite file and table, dropping expired entries"""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("DELETE FROM completions WHERE expires_at < ?", (time.time(),))
+        conn.close()
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT value FROM completions WHERE key = ? AND expires_at >= ?",
+                    (key, time.time())
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Completion cache read failed: {str(e)}")
+            return None
+        return row[0] if row is not None else None
+
+    def _write_disk(self, key: str, value: str) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, time.time() + self.ttl_seconds)
+                )
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Completion cache write failed: {str(e)}")
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+
+        if self.path:
+            value = await asyncio.to_thread(self._read_disk, key)
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.path:
+            await asyncio.to_thread(self._write_disk, key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        hits = memory["hits"] + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_entries": memory["entries"],
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0
+        }
+
+
+@lru_cache()
+def get_completion_cache() -> CompletionCache:
+    settings = get_settings()
+    cache = CompletionCache(
+        settings.COMPLETION_CACHE_MAX_ENTRIES,
+        settings.COMPLETION_CACHE_TTL_SECONDS,
+        settings.COMPLETION_CACHE_PATH
+    )
+    cache.init_disk()
+    return cache
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import logging
+import re
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, List, Optional
+import numpy as np
+from openai import AsyncOpenAI
+from ..core.config import get_settings
+from ..core.constants import RequestPriority
+from ..core.exceptions import EmbeddingGenerationError
+from .openai_scheduler import estimate_tokens, get_openai_scheduler
+
+logger = logging.getLogger(__name__)
+
+HASHING_MODEL = "hashing"
+LOCAL_MODEL_PREFIX = "local:"
+DEFAULT_HASHING_DIMENSIONS = 384
+
+OPENAI_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingProvider(ABC):
+    """Turns texts into fixed-size vectors"""
+
+    name: str
+
+    @property
+    @abstractmethod
+    def dimensions(self) -> int:
+        """Length of every vector this provider returns"""
+
+    @abstractmethod
+    async def embed(
+        self,
+        texts: List[str],
+        priority: str = RequestPriority.INTERACTIVE
+    ) -> List[List[float]]:
+        """Embed texts, preserving order"""
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Remote embeddings from the OpenAI API, admitted by the rate limit scheduler"""
+
+    def __init__(self, model: str, dimensions: Optional[int] = None):
+        self.settings = get_settings()
+        self.name = model
+        self._dimensions = dimensions or OPENAI_DIMENSIONS.get(model, 1536)
+        # Only the text-embedding-3 family can shorten its vectors
+        self._request_dimensions = dimensions if dimensions and not model.endswith("ada-002") else None
+        if not self.settings.OPENAI_API_KEY:
+            raise EmbeddingGenerationError(
+                f"EMBEDDING_MODEL={model} requires OPENAI_API_KEY; "
+                f"set it or use '{HASHING_MODEL}' or '{LOCAL_MODEL_PREFIX}<model>'"
+            )
+        if self.settings.OPENAI_SCHEDULER_ENABLED:
+            self.scheduler = get_openai_scheduler()
+            self.client = AsyncOpenAI(api_key=self.settings.OPENAI_API_KEY, max_retries=0)
+        else:
+            self.scheduler = None
+            self.client = AsyncOpenAI(api_key=self.settings.OPENAI_API_KEY)
+
+    @property
+    def dimensions(self) -> int:
+        return self._dimensions
+
+    async def embed(
+        self,
+        texts: List[str],
+        priority: str = RequestPriority.INTERACTIVE
+    ) -> List[List[float]]:
+        options = {"dimensions": self._request_dimensions} if self._request_dimensions else {}
+
+        def call():
+            return self.client.embeddings.with_raw_response.create(
+                model=self.name,
+                input=texts,
+                **options
+            )
+
+        if self.scheduler is None:
+            raw = await call()
+        else:
+            raw = await self.scheduler.run(self.name, estimate_tokens(*texts), priority, call)
+        response = raw.parse()
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class _LocalProvider(EmbeddingProvider):
+    """Runs CPU-bound inference in batches on a thread pool, off the event loop"""
+
+    def __init__(self, batch_size: int, threads: int):
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="embedding")
+
+    @abstractmethod
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch synchronously; returns a (len(texts), dimensions) array"""
+
+    async def embed(
+        self,
+        texts: List[str],
+        priority: str = RequestPriority.INTERACTIVE
+    ) -> List[List[float]]:
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        batches = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, self._embed_batch, texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ])
+        return np.vstack(batches).astype(float).tolist()
+
+
+class HashingEmbeddingProvider(_LocalProvider):
+    """Signed feature hashing of word unigrams and bigrams, L2-normalised.
+
+    Needs no model files or network, so it suits air-gapped rigs and tests.
+    Vectors capture lexical overlap only, not meaning.
+    """
+
+    def __init__(self, dimensions: int = DEFAULT_HASHING_DIMENSIONS, batch_size: int = 64, threads: int = 2):
+        super().__init__(batch_size, threads)
+        self.name = HASHING_MODEL
+        self._dimensions = dimensions
+
+    @property
+    def dimensions(self) -> int:
+        return self._dimensions
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self._dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = int.from_bytes(
+                    hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(),
+                    "little"
+                )
+                sign = 1.0 if digest >> 63 else -1.0
+                vectors[row, digest % self._dimensions] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class SentenceTransformerProvider(_LocalProvider):
+    """Local sentence-transformers model; requires the optional sentence-transformers package"""
+
+    def __init__(self, model_name: str, batch_size: int = 64, threads: int = 2):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise EmbeddingGenerationError(
+                f"EMBEDDING_MODEL={LOCAL_MODEL_PREFIX}{model_name} requires the "
+                "sentence-transformers package (pip install sentence-transformers)"
+            )
+        super().__init__(batch_size, threads)
+        self.name = f"{LOCAL_MODEL_PREFIX}{model_name}"
+        self.model: Any = SentenceTransformer(model_name, device="cpu")
+
+    @property
+    def dimensions(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+
+
+@lru_cache()
+def _get_provider(model: str, dimensions: Optional[int]) -> EmbeddingProvider:
+    settings = get_settings()
+    if model == HASHING_MODEL:
+        provider = HashingEmbeddingProvider(
+            dimensions or DEFAULT_HASHING_DIMENSIONS,
+            settings.EMBEDDING_BATCH_SIZE,
+            settings.EMBEDDING_THREADS
+        )
+    elif model.startswith(LOCAL_MODEL_PREFIX):
+        provider = SentenceTransformerProvider(
+            model[len(LOCAL_MODEL_PREFIX):],
+            settings.EMBEDDING_BATCH_SIZE,
+            settings.EMBEDDING_THREADS
+        )
+    else:
+        provider = OpenAIEmbeddingProvider(model, dimensions)
+    logger.info(f"Using embedding provider {provider.name} ({provider.dimensions} dimensions)")
+    return provider
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Pick a provider from EMBEDDING_MODEL: 'hashing',
+    'local:<sentence-transformers model>' or an OpenAI model name.
+
+    Providers are process singletons per model and dimensions, so local
+    models load once and OpenAI calls share one HTTP client on the server's
+    event loop. Local providers need no OPENAI_API_KEY.
+    """
+    settings = get_settings()
+    return _get_provider(settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSIONS)
@@ -0,0 +1,297 @@
+import asyncio
+import base64
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+import numpy as np
+import orjson
+from ..db.repository import get_repository
+from .cold_tier import get_cold_tier
+from ..core.config import get_settings
+from ..core.exceptions import ContextManagerException, ThreadNotFoundError
+from ..core.fingerprint import content_hash, simhash, simhash_bands
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMAT = "comagraph-ndjson/1"
+EMBEDDING_ENCODING = "base64-float32-le"
+THREAD_FIELDS = ("id", "status", "created_at", "updated_at")
+MESSAGE_FIELDS = ("id", "thread_id", "role", "content", "created_at")
+TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+
+def encode_embedding(embedding: List[float]) -> str:
+    return base64.b64encode(np.asarray(embedding, dtype="<f4").tobytes()).decode("ascii")
+
+
+def decode_embedding(encoded: str) -> List[float]:
+    return np.frombuffer(base64.b64decode(encoded), dtype="<f4").astype(float).tolist()
+
+
+def _require_fields(row: Dict[str, Any], fields: Tuple[str, ...]) -> None:
+    """Raise ValueError unless every field is a string, timestamps valid ISO 8601"""
+    missing = [field for field in fields if not isinstance(row.get(field), str)]
+    if missing:
+        raise ValueError(f"missing or non-string {', '.join(missing)}")
+    for field in TIMESTAMP_FIELDS:
+        if field in fields:
+            datetime.fromisoformat(row[field])
+
+
+def _isoformat(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    return value.isoformat()
+
+
+class ExportService:
+    """Stream threads out as NDJSON and load them back in chunked writes.
+
+    Exports page through storage with keyset pagination, so memory stays flat
+    regardless of thread size. Imports buffer at most one chunk of rows and
+    only read more of the request body once the previous chunk is written.
+    """
+
+    def __init__(self):
+        self.repository = get_repository()
+        self.cold_tier = get_cold_tier()
+        self.settings = get_settings()
+
+    def _header(self, include_embedding: bool) -> bytes:
+        return orjson.dumps({
+            "type": "header",
+            "format": EXPORT_FORMAT,
+            "embedding_encoding": EMBEDDING_ENCODING if include_embedding else None
+        }) + b"\n"
+
+    def _thread_line(self, thread: Dict[str, Any]) -> bytes:
+        return orjson.dumps({
+            "type": "thread",
+            "id": thread["id"],
+            "status": thread["status"],
+            "created_at": _isoformat(thread["created_at"]),
+            "updated_at": _isoformat(thread["updated_at"])
+        }) + b"\n"
+
+    def _message_lines(
+        self,
+        thread_id: str,
+        include_embedding: bool,
+        exported_ids: Optional[List[str]] = None
+    ) -> Iterator[bytes]:
+        # Archived messages come from the thread's cold segment, then whatever is still hot
+        archived = set()
+        if self.cold_tier and self.cold_tier.exists(thread_id):
+            for row in self.cold_tier.messages(thread_id):
+                archived.add(row["id"])
+                if exported_ids is not None:
+                    exported_ids.append(row["id"])
+                if not include_embedding:
+                    row["embedding"] = None
+                yield orjson.dumps(row) + b"\n"
+
+        after_created_at = None
+        after_id = None
+        while True:
+            page = self.repository.get_thread_messages_page(
+                thread_id,
+                after_created_at,
+                after_id,
+                include_embedding,
+                self.settings.EXPORT_PAGE_SIZE
+            )
+
+            for message in page:
+                if message["id"] in archived:
+                    continue
+                if exported_ids is not None:
+                    exported_ids.append(message["id"])
+                embedding = message["embedding"]
+                yield orjson.dumps({
+                    "type": "message",
+                    "id": message["id"],
+                    "thread_id": message["thread_id"],
+                    "role": message["role"],
+                    "content": message["content"],
+                    "created_at": _isoformat(message["created_at"]),
+                    "embedding": encode_embedding(embedding) if embedding else None,
+                    "duplicate_of": message["duplicate_of"],
+                    "duplicate_distance": message["duplicate_distance"]
+                }) + b"\n"
+
+            if len(page) < self.settings.EXPORT_PAGE_SIZE:
+                return
+            after_created_at = page[-1]["created_at"]
+            after_id = page[-1]["id"]
+
+    def export_thread(
+        self,
+        thread_id: UUID,
+        include_embedding: bool = False,
+        exported_ids: Optional[List[str]] = None
+    ) -> Iterator[bytes]:
+        """Return an NDJSON line iterator for one thread.
+
+        The thread lookup happens eagerly so a missing thread raises before
+        the response starts streaming. Ids of the exported messages are
+        appended to ``exported_ids`` as their lines are produced.
+        """
+        thread = self.repository.get_thread(str(thread_id))
+        if not thread:
+            raise ThreadNotFoundError(f"Thread {thread_id} not found")
+
+        def lines() -> Iterator[bytes]:
+            yield self._header(include_embedding)
+            yield self._thread_line(thread)
+            yield from self._message_lines(thread["id"], include_embedding, exported_ids)
+
+        return lines()
+
+    def export_all(self, include_embedding: bool = False) -> Iterator[bytes]:
+        """Stream every thread and its messages as NDJSON"""
+        yield self._header(include_embedding)
+        after_id = None
+        while True:
+            page = self.repository.get_threads_page(after_id, self.settings.EXPORT_PAGE_SIZE)
+
+            for thread in page:
+                yield self._thread_line(thread)
+                yield from self._message_lines(thread["id"], include_embedding)
+
+            if len(page) < self.settings.EXPORT_PAGE_SIZE:
+                return
+            after_id = page[-1]["id"]
+
+    async def import_stream(self, chunks: AsyncIterator[bytes]) -> Dict[str, int]:
+        """Import NDJSON produced by export, writing batches as lines arrive.
+
+        A duplicate is written in a chunk after its canonical's, so the link
+        can be made. Duplicates of canonicals not seen yet wait for a final
+        pass; if the canonical is still missing then, they keep their own
+        embedding.
+        """
+        counts = {"threads": 0, "messages": 0, "skipped": 0}
+        threads: List[Dict[str, Any]] = []
+        messages: List[Dict[str, Any]] = []
+        # Duplicates of a canonical in the current chunk ride with the next one
+        held: List[Dict[str, Any]] = []
+        deferred: List[Dict[str, Any]] = []
+        written_ids: Set[str] = set()
+        pending_ids: Set[str] = set()
+        chunk_size = self.settings.IMPORT_CHUNK_SIZE
+        buffer = b""
+        line_number = 0
+
+        async def flush() -> None:
+            nonlocal threads, messages, held, pending_ids
+            if not threads and not messages:
+                return
+            written = await asyncio.to_thread(self._write_chunk, threads, messages)
+            counts["threads"] += written["threads"]
+            counts["messages"] += written["messages"]
+            counts["skipped"] += len(messages) - written["messages"]
+            written_ids.update(pending_ids)
+            threads, messages, held, pending_ids = [], held, [], set()
+
+        def add(line: bytes) -> None:
+            kind, row = self._parse_line(line, line_number)
+            if kind == "thread":
+                threads.append(row)
+            elif kind == "message":
+                canonical = row["duplicate_of"]
+                if canonical is None:
+                    messages.append(row)
+                    pending_ids.add(row["id"])
+                elif canonical in written_ids:
+                    messages.append(row)
+                elif canonical in pending_ids:
+                    held.append(row)
+                else:
+                    deferred.append(row)
+
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                if not line.strip():
+                    continue
+                add(line)
+
+                # Waiting on the write before reading further is the backpressure
+                if len(threads) + len(messages) + len(held) >= chunk_size:
+                    await flush()
+
+        if buffer.strip():
+            line_number += 1
+            add(buffer)
+        while threads or messages or held:
+            await flush()
+        for start in range(0, len(deferred), chunk_size):
+            messages = deferred[start:start + chunk_size]
+            await flush()
+
+        return counts
+
+    def _parse_line(self, line: bytes, line_number: int) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Decode and validate one NDJSON line; returns its type and the row to write"""
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            raise ContextManagerException(f"Invalid NDJSON on line {line_number}: {str(e)}")
+        if not isinstance(row, dict):
+            raise ContextManagerException(f"Invalid NDJSON on line {line_number}: expected an object")
+
+        kind = row.get("type")
+        try:
+            if kind == "thread":
+                _require_fields(row, THREAD_FIELDS)
+                return kind, row
+            if kind == "message":
+                _require_fields(row, MESSAGE_FIELDS)
+                return kind, self._message_row(row)
+        except (TypeError, ValueError) as e:
+            raise ContextManagerException(f"Invalid {kind} on line {line_number}: {str(e)}")
+        return None, row
+
+    @staticmethod
+    def _message_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        embedding = decode_embedding(row["embedding"]) if row.get("embedding") else None
+        # Duplicates keep their own fingerprint in case their canonical never arrives
+        canonical = embedding is not None
+        value = simhash(row["content"]) if canonical else None
+        duplicate_of = row.get("duplicate_of")
+        if duplicate_of is not None and not isinstance(duplicate_of, str):
+            raise ValueError("duplicate_of must be a string")
+        distance = row.get("duplicate_distance")
+        if distance is not None and not isinstance(distance, int):
+            raise ValueError("duplicate_distance must be an integer")
+        return {
+            "id": row["id"],
+            "thread_id": row["thread_id"],
+            "role": row["role"],
+            "content": row["content"],
+            "created_at": row["created_at"],
+            "embedding": embedding,
+            "content_hash": content_hash(row["content"]) if canonical else None,
+            "simhash": value,
+            "bands": simhash_bands(value) if canonical else [None] * 4,
+            "duplicate_of": duplicate_of,
+            "duplicate_distance": distance
+        }
+
+    def _write_chunk(
+        self,
+        threads: List[Dict[str, Any]],
+        messages: List[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        written = {"threads": 0, "messages": 0}
+        if threads:
+            written["threads"] = self.repository.import_threads(threads)
+        if messages:
+            written["messages"] = self.repository.import_messages(messages)
+        logger.debug(f"Imported {written['threads']} threads and {written['messages']} messages")
+        return written
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+from ..models.message import MessageCreate
+from ..services.message_service import MessageService
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+Sender = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_CLOSE = object()
+
+
+class IngestSession:
+    """Group messages pushed over one connection into batched writes.
+
+    Pushed messages wait in a bounded queue. A single writer drains it into
+    batches of up to INGEST_BATCH_SIZE, waiting at most INGEST_BATCH_MAX_WAIT_MS
+    for a batch to fill, and each batch costs one embedding call and one
+    UNWIND write. When the queue is full, push() waits for the writer, so the
+    caller stops reading from its client until the pipeline catches up.
+    """
+
+    def __init__(self, thread_id: UUID, message_service: MessageService, send: Sender):
+        self.settings = get_settings()
+        self.thread_id = thread_id
+        self.message_service = message_service
+        self.send = send
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=self.settings.INGEST_MAX_PENDING)
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+
+    async def push(self, ref: Any, message: MessageCreate) -> None:
+        """Queue a message, waiting for room when the writer falls behind"""
+        try:
+            self._queue.put_nowait((ref, message))
+        except asyncio.QueueFull:
+            await self._send({"type": "backpressure", "pending": self.pending})
+            await self._queue.put((ref, message))
+
+    async def close(self) -> None:
+        """Flush everything already queued, then stop the writer"""
+        if self._writer is None:
+            return
+        await self._queue.put(_CLOSE)
+        await self._writer
+        self._writer = None
+
+    async def _run(self) -> None:
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is _CLOSE:
+                break
+            batch = [item]
+            closing = await self._fill(batch)
+            await self._flush(batch)
+
+    async def _fill(self, batch: List[Tuple[Any, MessageCreate]]) -> bool:
+        """Top up a batch until it is full or the wait runs out; True on close"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.settings.INGEST_BATCH_MAX_WAIT_MS / 1000
+        while len(batch) < self.settings.INGEST_BATCH_SIZE:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is _CLOSE:
+                return True
+            batch.append(item)
+        return False
+
+    async def _flush(self, batch: List[Tuple[Any, MessageCreate]]) -> None:
+        try:
+            messages = await self.message_service.create_messages_batch(
+                self.thread_id,
+                [message for _, message in batch]
+            )
+        except Exception as e:
+            logger.error(f"Failed to ingest batch of {len(batch)} messages: {str(e)}")
+            for ref, _ in batch:
+                await self._send({"type": "error", "ref": ref, "detail": str(e)})
+            return
+
+        for (ref, _), message in zip(batch, messages):
+            if message is None:
+                await self._send({
+                    "type": "error",
+                    "ref": ref,
+                    "detail": "Canonical message was deleted before the write; resend the message"
+                })
+                continue
+            await self._send({
+                "type": "ack",
+                "ref": ref,
+                "id": str(message.id),
+                "duplicate_of": str(message.duplicate_of) if message.duplicate_of else None
+            })
+
+    async def _send(self, frame: Dict[str, Any]) -> None:
+        # Acks for a client that has gone away are dropped; the writes still land
+        try:
+            await self.send(frame)
+        except Exception as e:
+            logger.debug(f"Dropped ingest frame for thread {self.thread_id}: {str(e)}")
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+from ..models.job import Job
+from ..db.repository import get_repository
+from ..core import consistency
+from ..core.config import get_settings
+from ..core.constants import JobStatus
+from ..core.exceptions import JobNotFoundError, JobQueueFullError
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[UUID], Awaitable[Any]]
+
+
+async def _thread_summary(thread_id: UUID) -> Any:
+    from .thread_service import ThreadService
+    summary = await ThreadService().get_thread_summary(thread_id)
+    return summary.model_dump(mode="json")
+
+
+async def _topic_evolution(thread_id: UUID) -> Any:
+    from .analysis_service import AnalysisService
+    return await AnalysisService().get_topic_evolution(thread_id)
+
+
+async def _conversation_patterns(thread_id: UUID) -> Any:
+    from .analysis_service import AnalysisService
+    return await AnalysisService().analyze_conversation_patterns(thread_id)
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    "thread_summary": _thread_summary,
+    "topic_evolution": _topic_evolution,
+    "conversation_patterns": _conversation_patterns,
+}
+
+
+class JobQueue:
+    """In-process job queue with a bounded worker pool.
+
+    Jobs are keyed by (kind, thread id, thread version) so repeated submissions
+    for an unchanged thread collapse onto one job. Each job runs on a worker
+    thread with its own event loop, keeping blocking storage and OpenAI calls
+    off the request loop. Jobs read with the bookmarks of the request that
+    submitted them, so a lagging follower cannot compute a result for a
+    thread version older than the one it is stored under. Finished jobs are
+    persisted through the repository.
+    """
+
+    def __init__(self, handlers: Optional[Dict[str, JobHandler]] = None):
+        self.settings = get_settings()
+        self.repository = get_repository()
+        self.handlers = handlers if handlers is not None else JOB_HANDLERS
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[UUID, Job]" = OrderedDict()
+        self._keys: Dict[Tuple[str, str, int], UUID] = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        """Start the worker pool"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.settings.JOB_QUEUE_SIZE)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.settings.JOB_WORKERS)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel workers; queued jobs are dropped"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def submit(self, kind: str, thread_id: UUID, thread_version: int) -> Job:
+        """Submit a job, reusing any live or completed job for the same thread version"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        key = (kind, str(thread_id), thread_version)
+        existing_id = self._keys.get(key)
+        if existing_id is not None:
+            existing = self._jobs.get(existing_id)
+            if existing is not None and existing.status != JobStatus.FAILED:
+                return existing
+
+        stored = self._load_completed(kind, thread_id, thread_version)
+        if stored is not None:
+            self._remember(stored)
+            return stored
+
+        if self._queue is None:
+            raise JobQueueFullError("Job queue is not running")
+
+        job = Job(kind=kind, thread_id=thread_id, thread_version=thread_version)
+        # Every bookmark the request knows, even on routes that read eventually
+        bookmarks = consistency.write_bookmarks()
+        try:
+            self._queue.put_nowait((job.id, bookmarks))
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"Job queue is full ({self.settings.JOB_QUEUE_SIZE} pending)")
+        self._remember(job)
+        return job
+
+    def get(self, job_id: UUID) -> Job:
+        """Get a job from memory, falling back to storage"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+
+        record = self.repository.get_job(str(job_id))
+        if not record:
+            raise JobNotFoundError(f"Job {job_id} not found")
+        return self._from_record(record)
+
+    def _remember(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        self._jobs.move_to_end(job.id)
+        self._keys[(job.kind, str(job.thread_id), job.thread_version)] = job.id
+        while len(self._jobs) > self.settings.JOB_RETENTION:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in (JobStatus.PENDING, JobStatus.RUNNING):
+                break
+            self._jobs.popitem(last=False)
+            self._keys.pop((oldest.kind, str(oldest.thread_id), oldest.thread_version), None)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, bookmarks = await self._queue.get()
+            job = self._jobs.get(job_id)
+            try:
+                if job is not None:
+                    await asyncio.to_thread(self._execute, job, bookmarks)
+            except Exception as e:
+                logger.error(f"Job {job_id} crashed: {str(e)}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def _execute(self, job: Job, bookmarks: List[str]) -> None:
+        """Run a job to completion on a worker thread and persist its outcome"""
+        consistency.start_request(bookmarks)
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = asyncio.run(self.handlers[job.kind](job.thread_id))
+            job.status = JobStatus.COMPLETED
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}", exc_info=True)
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        job.finished_at = datetime.utcnow()
+        self._persist(job)
+
+    def _persist(self, job: Job) -> None:
+        try:
+            self.repository.save_job({
+                "id": str(job.id),
+                "thread_id": str(job.thread_id),
+                "kind": job.kind,
+                "thread_version": job.thread_version,
+                "status": job.status,
+                "result": json.dumps(job.result) if job.result is not None else None,
+                "error": job.error,
+                "created_at": job.created_at.isoformat(),
+                "started_at": job.started_at.isoformat(),
+                "finished_at": job.finished_at.isoformat()
+            })
+        except Exception as e:
+            logger.error(f"Failed to persist job {job.id}: {str(e)}")
+
+    def _load_completed(self, kind: str, thread_id: UUID, thread_version: int) -> Optional[Job]:
+        record = self.repository.get_completed_job(kind, str(thread_id), thread_version, JobStatus.COMPLETED)
+        return self._from_record(record) if record else None
+
+    @staticmethod
+    def _from_record(data: Dict[str, Any]) -> Job:
+        data = dict(data)
+        for field in ("created_at", "started_at", "finished_at"):
+            if hasattr(data.get(field), "to_native"):
+                data[field] = data[field].to_native()
+        if data.get("result") is not None:
+            data["result"] = json.loads(data["result"])
+        return Job.model_validate(data)
+
+
+@lru_cache()
+def get_job_queue() -> JobQueue:
+    return JobQueue()
@@ -1,12 +1,24 @@
-from typing import List, Optional
-from uuid import UUID
+import asyncio
 from datetime import datetime
-import neo4j.time
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+from uuid import UUID
+import numpy as np
 from ..models.message import Message, MessageCreate
-from ..db.neo4j import Neo4jService
+from ..db.repository import get_repository
 from ..services.openai_service import OpenAIService
+from ..services.analytics_cache import get_thread_versions
+from ..services.cold_tier import get_cold_tier
+from ..services.export_service import decode_embedding
+from ..services.rollups import get_rollups
 from ..core.config import get_settings
 from ..core.exceptions import ContextManagerException, DatabaseConnectionError
+from ..core.fingerprint import (
+    SIMHASH_BANDS,
+    content_hash,
+    hamming_distance,
+    simhash,
+    simhash_bands
+)
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -14,31 +26,66 @@ logger = logging.getLogger(__name__)
 
 class MessageService:
     def __init__(self):
-        self.neo4j = Neo4jService()
+        self.repository = get_repository()
         self.openai = OpenAIService()
+        self.cold_tier = get_cold_tier()
+        self.rollups = get_rollups()
         self.settings = get_settings()
 
-    async def create_message(self, message_create: MessageCreate) -> Message:
-        """Create a new message with embedding and store in Neo4j"""
+    async def create_message(
+        self,
+        message_create: MessageCreate,
+        include_embedding: bool = False
+    ) -> Message:
+        """Create a new message with embedding and store it"""
         try:
             logger.debug(f"Starting message creation with content: {message_create.content}")
-        
+
             # First, verify thread exists
-            with self.neo4j.get_session() as session:
-                logger.debug(f"Verifying thread existence for ID: {message_create.thread_id}")
-                thread_exists = session.execute_read(
-                    lambda tx: tx.run(
-                        "MATCH (t:Thread {id: $thread_id}) RETURN count(t) as count",
-                        thread_id=str(message_create.thread_id)
-                    ).single()["count"]
+            logger.debug(f"Verifying thread existence for ID: {message_create.thread_id}")
+            if not self.repository.thread_exists(str(message_create.thread_id)):
+                raise ContextManagerException(f"Thread {message_create.thread_id} not found")
+
+            # Look for an exact or near-duplicate message whose embedding can be reused
+            fingerprint = content_hash(message_create.content)
+            content_simhash = simhash(message_create.content)
+            canonical = None
+            if self.settings.DEDUP_ENABLED:
+                canonical = self._find_duplicate(fingerprint, content_simhash)
+
+            if canonical:
+                logger.debug(
+                    f"Reusing embedding of message {canonical['id']} "
+                    f"(distance {canonical['distance']})"
+                )
+                message = Message(
+                    content=message_create.content,
+                    role=message_create.role,
+                    thread_id=message_create.thread_id,
+                    metadata=message_create.metadata,
+                    duplicate_of=UUID(canonical["id"])
+                )
+                result = self.repository.create_duplicate_message(
+                    str(message.id),
+                    message.content,
+                    message.role,
+                    str(message.thread_id),
+                    canonical["id"],
+                    canonical["distance"],
+                    include_embedding
                 )
-            
-                if not thread_exists:
-                    raise ContextManagerException(f"Thread {message_create.thread_id} not found")
+
+                if not result:
+                    raise DatabaseConnectionError("Failed to create message in database")
+
+                message.embedding = result["embedding"]
+                get_thread_versions().set(message.thread_id, result["version"])
+                self._record_rollups(result, [(result.get("created_at", message.created_at), message.role, True)])
+                return message
 
             # Generate embedding
             embedding = await self.openai.generate_embedding(message_create.content)
-        
+
             # Create message instance
             message = Message(
                 content=message_create.content,
@@ -47,141 +94,307 @@ class MessageService:
                 embedding=embedding,
                 metadata=message_create.metadata
             )
-        
-            # Store in Neo4j - metadata stored as individual properties
-            with self.neo4j.get_session() as session:
-                result = session.execute_write(
-                    lambda tx: tx.run(
-                        """
-                        MATCH (t:Thread {id: $thread_id})
-                        CREATE (m:Message {
-                            id: $id,
-                            content: $content,
-                            role: $role,
-                            created_at: datetime(),
-                            embedding: $embedding
-                        })-[:BELONGS_TO]->(t)
-                        RETURN m
-                        """,
-                        id=str(message.id),
-                        content=message.content,
-                        role=message.role,
-                        thread_id=str(message.thread_id),
-                        embedding=message.embedding
-                    ).single()
-                )
-            
-                if not result:
-                    raise DatabaseConnectionError("Failed to create message in database")
-            
-                return message
-                
+
+            result = self.repository.create_message(
+                str(message.id),
+                message.content,
+                message.role,
+                str(message.thread_id),
+                message.embedding,
+                fingerprint,
+                content_simhash,
+                simhash_bands(content_simhash)
+            )
+
+            if not result:
+                raise DatabaseConnectionError("Failed to create message in database")
+
+            get_thread_versions().set(message.thread_id, result["version"])
+            self._record_rollups(result, [(result.get("created_at", message.created_at), message.role, False)])
+            if not include_embedding:
+                message.embedding = None
+            return message
+
         except Exception as e:
             logger.error(f"Error creating message: {str(e)}", exc_info=True)
             raise ContextManagerException(f"Failed to create message: {str(e)}")
 
+    async def create_messages_batch(
+        self,
+        thread_id: UUID,
+        batch: List[MessageCreate]
+    ) -> List[Optional[Message]]:
+        """Create several messages with one candidate lookup, one embedding call
+        and one batched write.
+
+        Messages repeating content already stored, or earlier in the same
+        batch, are linked to their canonical message instead of being embedded.
+        The result lines up with ``batch``; a message is None when its
+        canonical was deleted before the write and it was not stored.
+        """
+        messages: List[Message] = []
+        canonical_rows: List[Dict[str, Any]] = []
+        duplicate_rows: List[Dict[str, Any]] = []
+        batch_candidates: List[Dict[str, Any]] = []
+
+        keys = [(content_hash(item.content), simhash(item.content)) for item in batch]
+        stored: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        if self.settings.DEDUP_ENABLED and batch:
+            stored = await asyncio.to_thread(self._find_duplicates, keys)
+
+        for item, (fingerprint, content_simhash), stored_canonical in zip(batch, keys, stored):
+            message = Message(
+                content=item.content,
+                role=item.role,
+                thread_id=thread_id,
+                metadata=item.metadata
+            )
+            row = {
+                "id": str(message.id),
+                "content": message.content,
+                "role": message.role,
+                "created_at": message.created_at.isoformat()
+            }
+
+            canonical = None
+            if self.settings.DEDUP_ENABLED:
+                canonical = self._closest_candidate(batch_candidates, fingerprint, content_simhash)
+                if canonical is None:
+                    canonical = stored_canonical
+
+            if canonical:
+                message.duplicate_of = UUID(canonical["id"])
+                duplicate_rows.append({
+                    **row,
+                    "canonical_id": canonical["id"],
+                    "distance": canonical["distance"]
+                })
+            else:
+                canonical_rows.append({
+                    **row,
+                    "content_hash": fingerprint,
+                    "simhash": content_simhash,
+                    "bands": simhash_bands(content_simhash)
+                })
+                batch_candidates.append({
+                    "id": row["id"],
+                    "content_hash": fingerprint,
+                    "simhash": content_simhash
+                })
+            messages.append(message)
+
+        embeddings = await self.openai.generate_embeddings(
+            [row["content"] for row in canonical_rows]
+        )
+        for row, embedding in zip(canonical_rows, embeddings):
+            row["embedding"] = embedding
+
+        result = await asyncio.to_thread(
+            self._write_batch, thread_id, canonical_rows, duplicate_rows
+        )
+        if not result:
+            raise ContextManagerException(f"Thread {thread_id} not found")
+
+        get_thread_versions().set(thread_id, result["version"])
+        written = set(result["ids"])
+        self._record_rollups(result, sorted(
+            (row["created_at"], row["role"], "canonical_id" in row)
+            for row in canonical_rows + duplicate_rows
+            if row["id"] in written
+        ))
+        if len(written) < len(messages):
+            logger.warning(
+                f"Skipped {len(messages) - len(written)} duplicates in thread {thread_id} "
+                f"whose canonical message was deleted"
+            )
+        logger.debug(
+            f"Created {result['count']} messages in thread {thread_id} "
+            f"({len(duplicate_rows)} duplicates)"
+        )
+        return [message if str(message.id) in written else None for message in messages]
+
+    def _write_batch(
+        self,
+        thread_id: UUID,
+        canonical_rows: List[Dict[str, Any]],
+        duplicate_rows: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        return self.repository.create_messages_batch(str(thread_id), canonical_rows, duplicate_rows)
+
+    def _record_rollups(self, result: Dict[str, Any], messages: List[Any]) -> None:
+        """Count written messages toward the global rollups; never fails the write"""
+        if not self.rollups:
+            return
+        try:
+            self.rollups.record(result, messages)
+        except Exception as e:
+            logger.warning(f"Failed to record rollups: {str(e)}")
+
+    def _find_duplicate(self, fingerprint: str, content_simhash: int) -> Optional[Dict[str, Any]]:
+        """Find a canonical message with the same or nearly the same content"""
+        candidates = self.repository.find_duplicate_candidates(
+            fingerprint,
+            simhash_bands(content_simhash),
+            self.settings.DEDUP_MAX_CANDIDATES
+        )
+        return self._closest_candidate(candidates, fingerprint, content_simhash)
+
+    def _find_duplicates(self, keys: List[Tuple[str, int]]) -> List[Optional[Dict[str, Any]]]:
+        """Find canonical messages for several (fingerprint, simhash) keys in one lookup"""
+        candidates = self.repository.find_duplicate_candidates_batch(
+            [(fingerprint, simhash_bands(content_simhash)) for fingerprint, content_simhash in keys],
+            self.settings.DEDUP_MAX_CANDIDATES
+        )
+        return [
+            self._closest_candidate(found, fingerprint, content_simhash)
+            for found, (fingerprint, content_simhash) in zip(candidates, keys)
+        ]
+
+    def _closest_candidate(
+        self,
+        candidates: List[Dict[str, Any]],
+        fingerprint: str,
+        content_simhash: int
+    ) -> Optional[Dict[str, Any]]:
+        """Pick an exact match, else the nearest candidate within the distance limit"""
+        max_distance = min(self.settings.DEDUP_MAX_HAMMING_DISTANCE, SIMHASH_BANDS - 1)
+        best = None
+        for candidate in candidates:
+            if candidate["content_hash"] == fingerprint:
+                return {"id": candidate["id"], "distance": 0}
+            distance = hamming_distance(candidate["simhash"], content_simhash)
+            if distance <= max_distance and (best is None or distance < best["distance"]):
+                best = {"id": candidate["id"], "distance": distance}
+        return best
+
     async def get_thread_context(
-        self, 
+        self,
         thread_id: UUID,
         message_id: Optional[UUID] = None,
-        window_size: Optional[int] = None
+        window_size: Optional[int] = None,
+        include_embedding: bool = False
     ) -> List[Message]:
         """Get context from thread, optionally centered around a specific message"""
         if window_size is None:
             window_size = self.settings.CONTEXT_WINDOW_SIZE
-            
-        with self.neo4j.get_session() as session:
-            if message_id:
-                with session.begin_transaction() as tx:
-                    result = tx.run("""
-                        MATCH (m:Message {id: $message_id})-[:BELONGS_TO]->(t:Thread {id: $thread_id})
-                        MATCH (context:Message)-[:BELONGS_TO]->(t)
-                        WHERE abs(duration.between(context.created_at, m.created_at).seconds) <= $window_seconds
-                        RETURN {
-                            id: toString(context.id),
-                            content: context.content,
-                            role: context.role,
-                            created_at: toString(context.created_at),
-                            thread_id: toString(t.id),
-                            metadata: coalesce(context.metadata, {})
-                        } as context
-                        ORDER BY context.created_at
-                    """,
-                    message_id=str(message_id),
-                    thread_id=str(thread_id),
-                    window_seconds=window_size * 60
-                    )
-                    messages = [Message.model_validate(record["context"]) for record in result]
-            else:
-                with session.begin_transaction() as tx:
-                    result = tx.run("""
-                        MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
-                        RETURN {
-                            id: toString(m.id),
-                            content: m.content,
-                            role: m.role,
-                            created_at: toString(m.created_at),
-                            thread_id: toString(t.id),
-                            metadata: coalesce(m.metadata, {})
-                        } as m
-                        ORDER BY m.created_at DESC
-                        LIMIT $limit
-                    """,
-                    thread_id=str(thread_id),
-                    limit=window_size
-                    )
-                    messages = [Message.model_validate(record["m"]) for record in result]
-        
-        return messages
-
-    async def get_similar_messages(self, content: str, limit: int = 5) -> List[Message]:
-        """Find messages similar to the provided content using embeddings"""
+
+        if message_id:
+            result = self.repository.get_context_around_message(
+                str(message_id),
+                str(thread_id),
+                window_size * 60,
+                include_embedding
+            )
+        else:
+            result = self.repository.get_recent_context(str(thread_id), window_size, include_embedding)
+
+        return [Message.from_record(record) for record in result]
+
+    def stream_thread_context(
+        self,
+        thread_id: UUID,
+        message_id: Optional[UUID] = None,
+        window_size: Optional[int] = None,
+        include_embedding: bool = False
+    ) -> Iterator[Message]:
+        """Yield context messages as the storage cursor receives them"""
+        if window_size is None:
+            window_size = self.settings.CONTEXT_WINDOW_SIZE
+
+        for record in self.repository.stream_context(
+            str(thread_id),
+            str(message_id) if message_id else None,
+            window_size,
+            window_size * 60,
+            include_embedding,
+            self.settings.STREAM_FETCH_SIZE
+        ):
+            yield Message.from_record(record)
+
+    async def get_message(
+        self,
+        message_id: UUID,
+        include_embedding: bool = False
+    ) -> Optional[Message]:
+        """Get a single message by ID"""
+        record = self.repository.get_message(str(message_id), include_embedding)
+        return Message.from_record(record) if record else None
+
+    async def get_similar_messages(
+        self,
+        content: str,
+        limit: int = 5,
+        include_embedding: bool = False,
+        include_archived: bool = False
+    ) -> List[Message]:
+        """Find messages similar to the provided content using embeddings.
+
+        Archived threads live in the cold tier and are only scanned when
+        ``include_archived`` is set.
+        """
         try:
             # Generate embedding for the query content
             query_embedding = await self.openai.generate_embedding(content)
-            
-            with self.neo4j.get_session() as session:
-                # Use vector similarity search in Neo4j
-                result = session.execute_read(
-                    lambda tx: tx.run("""
-                        MATCH (m:Message)-[:BELONGS_TO]->(t:Thread)
-                        WITH m, t, gds.similarity.cosine(m.embedding, $embedding) AS similarity
-                        WHERE similarity >= $threshold
-                        RETURN m, t.id as thread_id
-                        ORDER BY similarity DESC
-                        LIMIT $limit
-                    """,
-                    embedding=query_embedding,
-                    threshold=self.settings.SIMILARITY_THRESHOLD,
-                    limit=limit
-                    ).data()
-                )
-                
-                if not result:
-                    return []
-                    
-                try:
-                    messages = []
-                    for record in result:
-                        message_data = record["m"]
-                        # Convert Neo4j datetime to Python datetime
-                        if isinstance(message_data.get("created_at"), neo4j.time.DateTime):
-                            message_data["created_at"] = datetime.fromtimestamp(
-                                message_data["created_at"].to_native().timestamp()
-                            )
-                        # Add thread_id from the relationship
-                        message_data["thread_id"] = UUID(record["thread_id"])
-                        
-                        messages.append(Message.model_validate(message_data))
-                    return messages
-                    
-                except Exception as validation_error:
-                    logger.error(f"Error validating messages: {validation_error}")
-                    logger.debug(f"Raw result: {result}")
-                    raise ContextManagerException(f"Error validating message data: {str(validation_error)}")
-                
+
+            if include_archived and self.cold_tier:
+                return self._search_with_archived(query_embedding, limit, include_embedding)
+
+            result = self.repository.find_similar_messages(
+                query_embedding,
+                self.settings.SIMILARITY_THRESHOLD,
+                limit,
+                include_embedding
+            )
+            return [Message.from_record(record) for record in result]
+
         except Exception as e:
             logger.error(f"Error in get_similar_messages: {str(e)}")
             if isinstance(e, ContextManagerException):
                 raise
             raise ContextManagerException(f"Error finding similar messages: {str(e)}")
+
+    def _search_with_archived(
+        self,
+        query_embedding: List[float],
+        limit: int,
+        include_embedding: bool
+    ) -> List[Message]:
+        """Merge hot results with a scan of the cold tier by cosine score"""
+        threshold = self.settings.SIMILARITY_THRESHOLD
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query)) or 1.0
+        scored = []
+        for record in self.repository.find_similar_messages(query_embedding, threshold, limit, True):
+            embedding = np.asarray(record["embedding"], dtype=np.float32)
+            score = float(embedding @ query) / ((float(np.linalg.norm(embedding)) or 1.0) * query_norm)
+            if not include_embedding:
+                record = {**record, "embedding": None}
+            scored.append((score, record))
+        for row in self.cold_tier.search(query_embedding, threshold, limit):
+            scored.append((row["score"], {
+                "id": row["id"],
+                "content": row["content"],
+                "role": row["role"],
+                "thread_id": row["thread_id"],
+                "created_at": datetime.fromisoformat(row["created_at"]),
+                "embedding": decode_embedding(row["embedding"]) if include_embedding else None
+            }))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [Message.from_record(record) for _, record in scored[:limit]]
+
+    async def get_dedup_report(self) -> Dict[str, Any]:
+        """Report how many embedding calls and stored vectors dedup has saved"""
+        result = self.repository.get_dedup_report()
+
+        duplicates = result["duplicate_messages"]
+        total = result["total_messages"]
+        return {
+            "total_messages": total,
+            "canonical_messages": result["canonical_messages"],
+            "duplicate_messages": duplicates,
+            "exact_duplicates": result["exact_duplicates"],
+            "near_duplicates": duplicates - result["exact_duplicates"],
+            "dedup_ratio": duplicates / total if total else 0,
+            "embedding_calls_saved": duplicates,
+            "vector_bytes_saved": duplicates * result["dimensions"] * result["value_bytes"]
+        }
@@ -0,0 +1,363 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Mapping, Optional, Tuple
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from ..core.config import get_settings
+from ..core import metrics
+from ..core.constants import RequestPriority
+from ..core.exceptions import ProviderUnavailableError
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RANK = {RequestPriority.INTERACTIVE: 0, RequestPriority.BACKGROUND: 1}
+
+# How often a waiter that is not at the head of its queue re-checks its turn
+_POLL_SECONDS = 0.01
+# Longest the head waiter sleeps before re-reading buckets that headers may have moved
+_MAX_SLEEP_SECONDS = 0.25
+_WAIT_SAMPLES = 1024
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def estimate_tokens(*texts: str, max_tokens: int = 0) -> int:
+    """Rough token count for budgeting: ~4 characters per token plus the completion cap"""
+    return sum(len(text) for text in texts) // 4 + 1 + max_tokens
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Parse reset durations like '6m0s', '1.5s' or '20ms' into seconds"""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously up to its capacity"""
+
+    def __init__(self, capacity: int, period: float = 60.0):
+        self.capacity = max(1, capacity)
+        self.period = period
+        self.level = float(self.capacity)
+        self.blocked_until = 0.0
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: int, now: float) -> float:
+        """Seconds until `amount` can be taken"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        wait = 0.0 if self.level >= amount else (amount - self.level) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def take(self, amount: int, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def observe(
+        self,
+        limit: Optional[int],
+        remaining: Optional[int],
+        reset: Optional[float],
+        now: float
+    ) -> None:
+        """Align with the provider's view from rate-limit response headers"""
+        self._refill(now)
+        if limit:
+            self.capacity = limit
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+            if remaining <= 0 and reset:
+                self.blocked_until = max(self.blocked_until, now + reset)
+
+
+class ModelLimiter:
+    """Request and token buckets for one model plus its priority queue of waiters"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.waiters: List[Tuple[int, int]] = []
+
+    def delay(self, tokens: int, now: float) -> float:
+        return max(self.requests.delay(1, now), self.tokens.delay(tokens, now))
+
+    def take(self, tokens: int, now: float) -> None:
+        self.requests.take(1, now)
+        self.tokens.take(tokens, now)
+
+    def observe(self, headers: Mapping[str, str], now: float) -> None:
+        self.requests.observe(
+            _int_header(headers, "x-ratelimit-limit-requests"),
+            _int_header(headers, "x-ratelimit-remaining-requests"),
+            parse_reset(headers.get("x-ratelimit-reset-requests")),
+            now
+        )
+        self.tokens.observe(
+            _int_header(headers, "x-ratelimit-limit-tokens"),
+            _int_header(headers, "x-ratelimit-remaining-tokens"),
+            parse_reset(headers.get("x-ratelimit-reset-tokens")),
+            now
+        )
+
+
+class CircuitBreaker:
+    """Open after consecutive provider failures, then let one probe through per cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    def state(self, now: float) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if now - self.opened_at < self.reset_seconds:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self, now: float) -> bool:
+        state = self.state(now)
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self, now: float, probe: bool = False) -> None:
+        """Count a provider failure; a failed probe reopens the breaker"""
+        self.failures += 1
+        if probe or self.failures >= self.failure_threshold:
+            self.opened_at = now
+        if probe:
+            self.probing = False
+
+    def release_probe(self) -> None:
+        """Let another probe through after one ended without a verdict"""
+        self.probing = False
+
+
+class OpenAIScheduler:
+    """Admit OpenAI calls against per-model rate budgets in priority order.
+
+    Each model has request and token buckets seeded from settings and then
+    corrected from the x-ratelimit-* headers of every response. Waiters queue
+    per model, interactive before background, FIFO within a priority. State is
+    guarded by a thread lock and waiters poll with asyncio.sleep, so one
+    scheduler serves the request loop and the job workers' event loops alike.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, int]]] = None):
+        self.settings = get_settings()
+        self._limits = limits if limits is not None else {
+            self.settings.EMBEDDING_MODEL: (
+                self.settings.OPENAI_EMBEDDING_RPM,
+                self.settings.OPENAI_EMBEDDING_TPM
+            ),
+            self.settings.COMPLETION_MODEL: (
+                self.settings.OPENAI_COMPLETION_RPM,
+                self.settings.OPENAI_COMPLETION_TPM
+            ),
+        }
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self.breaker = CircuitBreaker(
+            self.settings.OPENAI_BREAKER_FAILURE_THRESHOLD,
+            self.settings.OPENAI_BREAKER_RESET_SECONDS
+        )
+        self._waits: Dict[str, Deque[float]] = {
+            priority: deque(maxlen=_WAIT_SAMPLES) for priority in PRIORITY_RANK
+        }
+        self._wait_totals: Dict[str, List[float]] = {priority: [0, 0.0] for priority in PRIORITY_RANK}
+        self._rate_limited = 0
+
+    def _limiter(self, model: str) -> ModelLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            rpm, tpm = self._limits.get(
+                model,
+                (self.settings.OPENAI_COMPLETION_RPM, self.settings.OPENAI_COMPLETION_TPM)
+            )
+            limiter = self._limiters[model] = ModelLimiter(rpm, tpm)
+        return limiter
+
+    async def run(
+        self,
+        model: str,
+        tokens: int,
+        priority: str,
+        call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Wait for budget, make the call and learn from its rate-limit headers.
+
+        `call` must return a raw response (``with_raw_response``) so headers
+        are visible. 429s are retried once the provider's reset has passed.
+        """
+        attempts = self.settings.OPENAI_MAX_RETRIES + 1
+        for attempt in range(attempts):
+            with self._lock:
+                limiter = self._limiter(model)
+                now = time.monotonic()
+                # Only the request admitted while half-open owns the probe
+                probe = self.breaker.state(now) == CircuitBreaker.HALF_OPEN
+                if not self.breaker.allow(now):
+                    raise ProviderUnavailableError("OpenAI circuit breaker is open")
+
+            try:
+                await self._acquire(model, limiter, tokens, priority)
+            except BaseException:
+                if probe:
+                    with self._lock:
+                        self.breaker.release_probe()
+                raise
+
+            try:
+                raw = await call()
+            except RateLimitError as e:
+                with self._lock:
+                    self._rate_limited += 1
+                    limiter.observe(e.response.headers, time.monotonic())
+                    # A 429 is back-pressure, not an outage; release a half-open probe
+                    if probe:
+                        self.breaker.release_probe()
+                if getattr(e, "code", None) == "insufficient_quota" or attempt == attempts - 1:
+                    raise
+                logger.warning(f"Rate limited by OpenAI on {model}; retrying ({attempt + 1}/{attempts - 1})")
+                continue
+            except (APIConnectionError, APITimeoutError, InternalServerError):
+                with self._lock:
+                    self.breaker.record_failure(time.monotonic(), probe)
+                raise
+            except Exception:
+                # Any other API error still proves the provider is answering
+                with self._lock:
+                    self.breaker.record_success()
+                raise
+            except BaseException:
+                # Cancelled mid-call: no verdict, so the next request may probe
+                if probe:
+                    with self._lock:
+                        self.breaker.release_probe()
+                raise
+
+            with self._lock:
+                self.breaker.record_success()
+                limiter.observe(raw.headers, time.monotonic())
+            return raw
+
+    async def _acquire(self, model: str, limiter: ModelLimiter, tokens: int, priority: str) -> None:
+        ticket = (PRIORITY_RANK[priority], next(self._seq))
+        start = time.monotonic()
+        with self._lock:
+            heapq.heappush(limiter.waiters, ticket)
+
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    if limiter.waiters[0] == ticket:
+                        delay = limiter.delay(tokens, now)
+                        if delay <= 0:
+                            heapq.heappop(limiter.waiters)
+                            limiter.take(tokens, now)
+                            break
+                        delay = min(delay, _MAX_SLEEP_SECONDS)
+                    else:
+                        delay = _POLL_SECONDS
+
+                if now - start + delay > self.settings.OPENAI_QUEUE_TIMEOUT_SECONDS:
+                    raise ProviderUnavailableError(
+                        f"Timed out after {now - start:.1f}s waiting for OpenAI rate limit budget"
+                    )
+                await asyncio.sleep(delay)
+        except BaseException:
+            with self._lock:
+                if ticket in limiter.waiters:
+                    limiter.waiters.remove(ticket)
+                    heapq.heapify(limiter.waiters)
+            raise
+
+        waited = time.monotonic() - start
+        metrics.observe_queue_wait(model, priority, waited)
+        with self._lock:
+            self._waits[priority].append(waited)
+            totals = self._wait_totals[priority]
+            totals[0] += 1
+            totals[1] += waited
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue wait times per priority, breaker state and remaining budgets"""
+        with self._lock:
+            now = time.monotonic()
+            queue_wait = {}
+            for priority, samples in self._waits.items():
+                count, total = self._wait_totals[priority]
+                ordered = sorted(samples)
+                queue_wait[priority] = {
+                    "count": count,
+                    "mean_seconds": total / count if count else 0.0,
+                    "p95_seconds": ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0,
+                    "max_seconds": ordered[-1] if ordered else 0.0
+                }
+            models = {}
+            for model, limiter in self._limiters.items():
+                limiter.requests._refill(now)
+                limiter.tokens._refill(now)
+                models[model] = {
+                    "queued": len(limiter.waiters),
+                    "requests_available": int(limiter.requests.level),
+                    "tokens_available": int(limiter.tokens.level)
+                }
+            return {
+                "queue_wait": queue_wait,
+                "rate_limited": self._rate_limited,
+                "breaker": self.breaker.state(now),
+                "models": models
+            }
+
+
+@lru_cache()
+def get_openai_scheduler() -> OpenAIScheduler:
+    return OpenAIScheduler()
@@ -1,62 +1,212 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
 from ..core.config import get_settings
-from typing import List, Dict, Any
+from ..core.constants import RequestPriority
+from ..core.exceptions import ProviderUnavailableError
+from ..core import metrics
+from .openai_scheduler import estimate_tokens, get_openai_scheduler
+from .completion_cache import completion_key, get_completion_cache
+from .embeddings import get_embedding_provider
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional
 import numpy as np
 
 class OpenAIService:
+    # Bump a template's version whenever its prompt changes so cached completions are not reused
+    PROMPT_VERSIONS = {"topics": 1, "summary": 1}
+
     def __init__(self):
         self.settings = get_settings()
-        self.client = OpenAI(api_key=self.settings.OPENAI_API_KEY)
+        self.embeddings = get_embedding_provider()
+        self.completion_cache = (
+            get_completion_cache() if self.settings.COMPLETION_CACHE_ENABLED else None
+        )
+        self.scheduler = None
+        self.client = None
+        if not self.settings.OPENAI_API_KEY:
+            # Local embeddings work without a key; completions fail when called
+            return
+        if self.settings.OPENAI_SCHEDULER_ENABLED:
+            # The scheduler retries 429s itself once the provider's reset has passed
+            self.scheduler = get_openai_scheduler()
+            self.client = AsyncOpenAI(api_key=self.settings.OPENAI_API_KEY, max_retries=0)
+        else:
+            self.client = AsyncOpenAI(api_key=self.settings.OPENAI_API_KEY)
 
-    async def generate_embedding(self, text: str) -> List[float]:
+    async def _call(
+        self,
+        model: str,
+        operation: str,
+        tokens: int,
+        priority: str,
+        call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Run a raw-response API call through the rate limit scheduler and parse it"""
+        if self.client is None:
+            raise ProviderUnavailableError("OPENAI_API_KEY is not set; completions are unavailable")
+        with metrics.stage("openai", model, operation):
+            if self.scheduler is None:
+                raw = await call()
+            else:
+                raw = await self.scheduler.run(model, tokens, priority, call)
+            return raw.parse()
+
+    async def generate_embedding(
+        self,
+        text: str,
+        priority: str = RequestPriority.INTERACTIVE
+    ) -> List[float]:
         """Generate embedding vector for given text"""
-        response = self.client.embeddings.create(
-            model=self.settings.EMBEDDING_MODEL,
-            input=text
-        )
-        return response.data[0].embedding
+        with metrics.stage("openai", self.embeddings.name, "embedding"):
+            return (await self.embeddings.embed([text], priority))[0]
+
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        priority: str = RequestPriority.BACKGROUND
+    ) -> List[List[float]]:
+        """Generate embedding vectors for several texts in one batch"""
+        if not texts:
+            return []
+        with metrics.stage("openai", self.embeddings.name, "embedding"):
+            return await self.embeddings.embed(texts, priority)
+
     async def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """Calculate cosine similarity between two embeddings"""
         vec1 = np.array(embedding1)
         vec2 = np.array(embedding2)
         return float(np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2)))
 
-    async def extract_topics(self, text: str) -> List[str]:
-        """Extract main topics from text using GPT"""
-        prompt = f"""
+    @staticmethod
+    def _topics_prompt(text: str) -> str:
+        return f"""
         Extract the main topics from the following text. Return them as a comma-separated list:
         
         Text: {text}
         
         Topics:"""
 
-        response = await self.client.chat.completions.create(
-            model=self.settings.COMPLETION_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=100
-        )
-        topics = response.choices[0].message.content.strip().split(",")
-        return [topic.strip() for topic in topics]
-
-    async def summarize_thread(self, messages: List[Dict[str, Any]]) -> str:
-        """Generate a summary of the conversation thread"""
+    @staticmethod
+    def _summary_prompt(messages: List[Dict[str, Any]]) -> str:
         conversation = "\n".join([
             f"{msg['role']}: {msg['content']}" 
             for msg in messages
         ])
 
-        prompt = f"""
+        return f"""
         Summarize the key points of this conversation thread concisely:
         
         {conversation}
         
         Summary:"""
 
-        response = await self.client.chat.completions.create(
-            model=self.settings.COMPLETION_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.5,
-            max_tokens=150
+    def _completion_key(self, template: str, prompt: str, temperature: float, max_tokens: int) -> Optional[str]:
+        if self.completion_cache is None:
+            return None
+        return completion_key(
+            self.settings.COMPLETION_MODEL,
+            template,
+            self.PROMPT_VERSIONS[template],
+            temperature,
+            max_tokens,
+            prompt
         )
-        return response.choices[0].message.content.strip()
\ No newline at end of file
+
+    async def _complete(self, template: str, prompt: str, temperature: float, max_tokens: int, priority: str) -> str:
+        key = self._completion_key(template, prompt, temperature, max_tokens)
+        if key is not None:
+            cached = await self.completion_cache.get(key)
+            if cached is not None:
+                return cached
+
+        response = await self._call(
+            self.settings.COMPLETION_MODEL,
+            "completion",
+            estimate_tokens(prompt, max_tokens=max_tokens),
+            priority,
+            lambda: self.client.chat.completions.with_raw_response.create(
+                model=self.settings.COMPLETION_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        )
+        content = response.choices[0].message.content
+        if key is not None:
+            await self.completion_cache.set(key, content)
+        return content
+
+    async def _cached_stream(self, template: str, prompt: str, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        """Stream a completion, replaying it in one piece when it is already cached"""
+        key = self._completion_key(template, prompt, temperature, max_tokens)
+        if key is not None:
+            cached = await self.completion_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        deltas = []
+        async for delta in self._stream_completion(prompt, temperature, max_tokens):
+            deltas.append(delta)
+            yield delta
+        # Only a completion streamed to the end is worth reusing
+        if key is not None:
+            await self.completion_cache.set(key, "".join(deltas))
+
+    async def _stream_completion(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        priority: str = RequestPriority.INTERACTIVE
+    ) -> AsyncIterator[str]:
+        stream = await self._call(
+            self.settings.COMPLETION_MODEL,
+            "completion_stream",
+            estimate_tokens(prompt, max_tokens=max_tokens),
+            priority,
+            lambda: self.client.chat.completions.with_raw_response.create(
+                model=self.settings.COMPLETION_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def extract_topics(
+        self,
+        text: str,
+        priority: str = RequestPriority.BACKGROUND
+    ) -> List[str]:
+        """Extract main topics from text using GPT"""
+        content = await self._complete("topics", self._topics_prompt(text), 0.3, 100, priority)
+        topics = content.strip().split(",")
+        return [topic.strip() for topic in topics]
+
+    async def extract_topics_stream(self, text: str) -> AsyncIterator[str]:
+        """Yield topics one at a time as the completion streams in"""
+        pending = ""
+        async for delta in self._cached_stream("topics", self._topics_prompt(text), 0.3, 100):
+            pending += delta
+            *complete, pending = pending.split(",")
+            for topic in complete:
+                if topic.strip():
+                    yield topic.strip()
+        if pending.strip():
+            yield pending.strip()
+
+    async def summarize_thread(
+        self,
+        messages: List[Dict[str, Any]],
+        priority: str = RequestPriority.BACKGROUND
+    ) -> str:
+        """Generate a summary of the conversation thread"""
+        content = await self._complete("summary", self._summary_prompt(messages), 0.5, 150, priority)
+        return content.strip()
+
+    async def summarize_thread_stream(self, messages: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Yield summary text deltas as the completion streams in"""
+        async for delta in self._cached_stream("summary", self._summary_prompt(messages), 0.5, 150):
+            yield delta
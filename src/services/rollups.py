@@ -0,0 +1,323 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from ..db.repository import get_repository
+from ..services.cold_tier import get_cold_tier
+from ..core.config import get_settings
+from ..core.constants import MessageRole
+from ..core.exceptions import ContextManagerException
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = {"hour": 3600, "day": 86400}
+# Upper bounds in seconds of the response time histogram; the last bucket is open-ended
+RESPONSE_TIME_BOUNDS = (1, 5, 15, 60, 300, 900, 3600, 86400)
+COUNTERS = (
+    "message_count",
+    "user_messages",
+    "assistant_messages",
+    "duplicate_messages",
+    "response_count",
+    "response_seconds"
+)
+
+ROLE_CODES = {MessageRole.USER: 1, MessageRole.ASSISTANT: 2}
+
+
+def epoch_seconds(value: Any) -> float:
+    """Epoch seconds from a driver DateTime, datetime or ISO string; naive means UTC"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def aggregate(
+    created: np.ndarray,
+    roles: np.ndarray,
+    duplicates: np.ndarray,
+    starts: np.ndarray,
+    counted: Optional[np.ndarray] = None
+) -> List[Dict[str, Any]]:
+    """Aggregate time-ordered messages into hourly and daily rollup rows.
+
+    ``created`` holds epoch seconds, ``roles`` ROLE_CODES and ``duplicates``
+    whether each message reused a canonical embedding. ``starts`` marks the
+    first message of each thread, which answers nothing. Rows left out of
+    ``counted`` only serve as the predecessor of the next message. Like the
+    per-thread pattern analysis, a response is a message following one of
+    the other role, timed from it and attributed to its own bucket.
+    """
+    if counted is None:
+        counted = np.ones(len(created), dtype=bool)
+    responded = np.zeros(len(created), dtype=bool)
+    delays = np.zeros(len(created))
+    if len(created) > 1:
+        responded[1:] = ~starts[1:] & (roles[1:] != roles[:-1]) & counted[1:]
+        delays[1:] = created[1:] - created[:-1]
+    delays = np.where(responded, delays, 0.0)
+    slots = np.searchsorted(RESPONSE_TIME_BOUNDS, delays, side="left")
+
+    rows = []
+    for granularity, seconds in GRANULARITIES.items():
+        live = counted | responded
+        buckets = (created[live] // seconds) * seconds
+        if not len(buckets):
+            continue
+        keys, inverse = np.unique(buckets, return_inverse=True)
+        size = len(keys)
+        weights = {
+            "message_count": counted[live],
+            "user_messages": counted[live] & (roles[live] == ROLE_CODES[MessageRole.USER]),
+            "assistant_messages": counted[live] & (roles[live] == ROLE_CODES[MessageRole.ASSISTANT]),
+            "duplicate_messages": counted[live] & duplicates[live],
+            "response_count": responded[live],
+            "response_seconds": delays[live]
+        }
+        sums = {name: np.bincount(inverse, weights=value.astype(float), minlength=size) for name, value in weights.items()}
+        histogram = np.zeros((size, len(RESPONSE_TIME_BOUNDS) + 1), dtype=np.int64)
+        answered = responded[live]
+        np.add.at(histogram, (inverse[answered], slots[live][answered]), 1)
+        for i, bucket in enumerate(keys.tolist()):
+            row = {"granularity": granularity, "bucket": bucket}
+            for name in COUNTERS:
+                row[name] = float(sums[name][i]) if name == "response_seconds" else int(sums[name][i])
+            row["response_histogram"] = histogram[i].tolist()
+            rows.append(row)
+    return rows
+
+
+def merge(rows: Iterable[Dict[str, Any]], into: Optional[Dict[Tuple[str, float], Dict[str, Any]]] = None) -> Dict[Tuple[str, float], Dict[str, Any]]:
+    """Add rollup rows together by (granularity, bucket)"""
+    merged = into if into is not None else {}
+    for row in rows:
+        key = (row["granularity"], row["bucket"])
+        current = merged.get(key)
+        if current is None:
+            merged[key] = {**row, "response_histogram": list(row["response_histogram"])}
+            continue
+        for name in COUNTERS:
+            current[name] += row[name]
+        current["response_histogram"] = [
+            a + b for a, b in zip(current["response_histogram"], row["response_histogram"])
+        ]
+    return merged
+
+
+class Rollups:
+    """Corpus-wide hourly and daily message rollups.
+
+    Every message write records a delta here: counts by role, duplicates
+    and the response time to the thread's previous message, which the
+    write returns. Deltas are added to the stored rollups every
+    ROLLUP_FLUSH_SECONDS, so each worker adds its own share. ``rebuild``
+    recomputes everything from a keyset-paged scan of hot and archived
+    threads, aggregating chunks of threads on a process pool; run it after
+    imports or to backfill. Only one rebuild runs at a time.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.repository = get_repository()
+        self.cold_tier = get_cold_tier()
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, float], Dict[str, Any]] = {}
+        self._cutoff = 0.0
+        self._rebuilding = False
+        self._task: Optional[asyncio.Task] = None
+
+    # Incremental updates
+
+    def record(
+        self,
+        result: Dict[str, Any],
+        messages: List[Tuple[Any, str, bool]]
+    ) -> None:
+        """Record written messages as (created_at, role, duplicate), oldest first.
+
+        ``result`` is the write's return map; its ``previous_at`` and
+        ``previous_role`` describe the thread's last message before the write.
+        """
+        previous_at = result.get("previous_at")
+        created = [epoch_seconds(created_at) for created_at, _, _ in messages]
+        roles = [ROLE_CODES.get(role, 0) for _, role, _ in messages]
+        duplicates = [duplicate for _, _, duplicate in messages]
+        counted = [True] * len(messages)
+        if previous_at is not None:
+            created.insert(0, epoch_seconds(previous_at))
+            roles.insert(0, ROLE_CODES.get(result.get("previous_role"), 0))
+            duplicates.insert(0, False)
+            counted.insert(0, False)
+        starts = np.zeros(len(created), dtype=bool)
+        starts[0] = True
+        with self._lock:
+            if self._rebuilding:
+                # The rebuild's scan counts every message from before its cutoff
+                counted = [count and at >= self._cutoff for count, at in zip(counted, created)]
+            rows = aggregate(
+                np.asarray(created, dtype=np.float64),
+                np.asarray(roles, dtype=np.int8),
+                np.asarray(duplicates, dtype=bool),
+                starts,
+                np.asarray(counted, dtype=bool)
+            )
+            merge(rows, self._pending)
+
+    def flush(self) -> int:
+        """Add pending deltas to storage; returns the number of buckets written"""
+        with self._lock:
+            if self._rebuilding or not self._pending:
+                return 0
+            rows = list(self._pending.values())
+            self._pending = {}
+        try:
+            self.repository.add_rollups(rows)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(rows)} rollup buckets: {str(e)}")
+            with self._lock:
+                merge(rows, self._pending)
+            return 0
+        return len(rows)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop(), name="rollup-flusher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.ROLLUP_FLUSH_SECONDS)
+            await asyncio.to_thread(self.flush)
+
+    # Full rebuild
+
+    def _thread_messages(self, thread_id: str) -> Iterator[Dict[str, Any]]:
+        """A thread's messages oldest first, from its cold segment once archived"""
+        if self.cold_tier and self.cold_tier.exists(thread_id):
+            yield from self.cold_tier.messages(thread_id)
+            return
+        page_size = self.settings.EXPORT_PAGE_SIZE
+        after_created_at = after_id = None
+        while True:
+            page = self.repository.get_thread_messages_page(
+                thread_id, after_created_at, after_id, False, page_size
+            )
+            yield from page
+            if len(page) < page_size:
+                return
+            after_created_at = page[-1]["created_at"]
+            after_id = page[-1]["id"]
+
+    def _scan(self, cutoff: float) -> Iterator[Tuple[np.ndarray, ...]]:
+        """Yield arrays of whole threads, about ROLLUP_SCAN_CHUNK messages at a time"""
+        created: List[float] = []
+        roles: List[int] = []
+        duplicates: List[bool] = []
+        starts: List[bool] = []
+        after_thread = None
+        while True:
+            threads = self.repository.get_threads_page(after_thread, self.settings.EXPORT_PAGE_SIZE)
+            for thread in threads:
+                first = True
+                for message in self._thread_messages(thread["id"]):
+                    at = epoch_seconds(message["created_at"])
+                    if at >= cutoff:
+                        break
+                    created.append(at)
+                    roles.append(ROLE_CODES.get(message["role"], 0))
+                    duplicates.append(message["duplicate_of"] is not None)
+                    starts.append(first)
+                    first = False
+                if len(created) >= self.settings.ROLLUP_SCAN_CHUNK:
+                    yield self._arrays(created, roles, duplicates, starts)
+                    created, roles, duplicates, starts = [], [], [], []
+            if len(threads) < self.settings.EXPORT_PAGE_SIZE:
+                break
+            after_thread = threads[-1]["id"]
+        if created:
+            yield self._arrays(created, roles, duplicates, starts)
+
+    @staticmethod
+    def _arrays(created, roles, duplicates, starts) -> Tuple[np.ndarray, ...]:
+        return (
+            np.asarray(created, dtype=np.float64),
+            np.asarray(roles, dtype=np.int8),
+            np.asarray(duplicates, dtype=bool),
+            np.asarray(starts, dtype=bool)
+        )
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Recompute every rollup from the messages written before now"""
+        start = time.perf_counter()
+        with self._lock:
+            if self._rebuilding:
+                raise ContextManagerException("A rollup rebuild is already running")
+            # Pending deltas are for messages the scan is about to count
+            self._cutoff = time.time()
+            self._rebuilding = True
+            self._pending = {}
+        try:
+            merged: Dict[Tuple[str, float], Dict[str, Any]] = {}
+            messages = 0
+            processes = self.settings.ROLLUP_PROCESSES
+            if processes > 0:
+                # Forking a server with live driver and flusher threads can deadlock the children
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+                    futures: List[Future] = []
+                    for chunk in self._scan(self._cutoff):
+                        messages += len(chunk[0])
+                        futures.append(pool.submit(aggregate, *chunk))
+                        # Bound the chunks held in memory while the pool catches up
+                        if len(futures) >= 2 * processes:
+                            merge(futures.pop(0).result(), merged)
+                    for future in futures:
+                        merge(future.result(), merged)
+            else:
+                for chunk in self._scan(self._cutoff):
+                    messages += len(chunk[0])
+                    merge(aggregate(*chunk), merged)
+
+            self.repository.replace_rollups(list(merged.values()))
+        finally:
+            with self._lock:
+                self._rebuilding = False
+        logger.info(f"Rebuilt {len(merged)} rollup buckets from {messages} messages")
+        return {
+            "messages": messages,
+            "buckets": len(merged),
+            "seconds": time.perf_counter() - start
+        }
+
+    # Reads
+
+    def get(self, granularity: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Stored buckets of one granularity in [start, end), oldest first"""
+        return self.repository.get_rollups(
+            granularity,
+            epoch_seconds(start) if start else None,
+            epoch_seconds(end) if end else None
+        )
+
+
+@lru_cache()
+def get_rollups() -> Optional[Rollups]:
+    if not get_settings().ROLLUPS_ENABLED:
+        return None
+    return Rollups()
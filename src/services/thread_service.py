@@ -1,19 +1,27 @@
 # src/services/thread_service.py
-from typing import List, Optional, Dict
+import asyncio
+import logging
+from typing import Any, AsyncIterator, List, Optional, Dict, Tuple
 from uuid import UUID
 from datetime import datetime
 from ..models.thread import Thread, ThreadCreate, ThreadSummary
 from ..models.message import Message
-from ..db.neo4j import Neo4jService
+from ..db.repository import get_repository
 from ..services.openai_service import OpenAIService
+from ..services.cold_tier import get_cold_tier
+from ..services.analytics_cache import get_thread_versions
+from ..services.export_service import ExportService
 from ..core.config import get_settings
 from ..core.exceptions import ThreadNotFoundError
-from ..core.constants import ThreadStatus
+from ..core.constants import MessageRole, ThreadStatus
+
+logger = logging.getLogger(__name__)
 
 class ThreadService:
     def __init__(self):
-        self.neo4j = Neo4jService()
+        self.repository = get_repository()
         self.openai = OpenAIService()
+        self.cold_tier = get_cold_tier()
         self.settings = get_settings()
 
     async def create_thread(self, thread_create: ThreadCreate) -> Thread:
@@ -22,138 +30,197 @@ class ThreadService:
             metadata=thread_create.metadata if thread_create.metadata else {}
         )
 
-        with self.neo4j.get_session() as session:
-            session.execute_write(
-                lambda tx: tx.run("""
-                    CREATE (t:Thread {
-                        id: $id,
-                        status: $status,
-                        created_at: datetime(),
-                        updated_at: datetime()
-                    })
-                    RETURN t
-                """,
-                id=str(thread.id),
-                status=thread.status
-                )
-            )
-
+        self.repository.create_thread(str(thread.id), thread.status)
         return thread
 
     async def get_thread(self, thread_id: UUID) -> Thread:
         """Retrieve a thread by ID"""
-        with self.neo4j.get_session() as session:
-            result = session.execute_read(
-                lambda tx: tx.run("""
-                    MATCH (t:Thread {id: $thread_id})
-                    RETURN t
-                """,
-                thread_id=str(thread_id)
-                )
-            ).single()
-
-            if not result:
-                raise ThreadNotFoundError(f"Thread {thread_id} not found")
-
-            thread_data = result["t"]
-            return Thread.model_validate(thread_data)
+        result = self.repository.get_thread(str(thread_id))
+        if not result:
+            raise ThreadNotFoundError(f"Thread {thread_id} not found")
+
+        return Thread.from_record(result)
+
+    async def get_thread_version(self, thread_id: UUID) -> Dict:
+        """Get the write counter, last update and message count of a thread"""
+        result = self.repository.get_thread_version(str(thread_id))
+        if not result:
+            raise ThreadNotFoundError(f"Thread {thread_id} not found")
+
+        return {
+            "version": result["version"],
+            "updated_at": result["updated_at"],
+            "message_count": result["message_count"]
+        }
 
     async def update_thread_status(
         self,
         thread_id: UUID,
         status: str
     ) -> Thread:
-        """Update thread status (active/archived)"""
+        """Update thread status (active/archived).
+
+        Archiving moves the thread's messages to the cold tier; any other
+        status rehydrates them first.
+        """
         if status not in [ThreadStatus.ACTIVE, ThreadStatus.ARCHIVED]:
             raise ValueError(f"Invalid status: {status}")
 
-        with self.neo4j.get_session() as session:
-            result = session.execute_write(
-                lambda tx: tx.run("""
-                    MATCH (t:Thread {id: $thread_id})
-                    SET t.status = $status,
-                        t.updated_at = datetime()
-                    RETURN t
-                """,
-                thread_id=str(thread_id),
-                status=status
-                )
-            ).single()
-
-            if not result:
-                raise ThreadNotFoundError(f"Thread {thread_id} not found")
-
-            return Thread.model_validate(result["t"])
+        if status != ThreadStatus.ARCHIVED:
+            await self._restore_thread(thread_id)
+
+        result = self.repository.update_thread_status(str(thread_id), status)
+        if not result:
+            raise ThreadNotFoundError(f"Thread {thread_id} not found")
+
+        if status == ThreadStatus.ARCHIVED:
+            await asyncio.to_thread(self._archive_thread, thread_id)
+        return Thread.from_record(result)
+
+    def _archive_thread(self, thread_id: UUID) -> None:
+        """Write the thread's segment, then drop its messages from hot storage.
+
+        The segment is the full export, including anything an earlier
+        archive left in it, so a crash between the two steps only leaves
+        messages in both tiers. Only messages written to the segment are
+        dropped; anything appended meanwhile stays hot.
+        """
+        if not self.cold_tier:
+            return
+        exported_ids: List[str] = []
+        size = self.cold_tier.write(
+            str(thread_id),
+            ExportService().export_thread(thread_id, include_embedding=True, exported_ids=exported_ids)
+        )
+        result = self.repository.delete_thread_messages(str(thread_id), exported_ids)
+        if result:
+            get_thread_versions().set(thread_id, result["version"])
+        removed = result["count"] if result else 0
+        logger.info(f"Archived thread {thread_id}: {removed} messages moved to a {size} byte segment")
+
+    async def _restore_thread(self, thread_id: UUID) -> None:
+        """Import the thread's segment back into hot storage and delete it"""
+        if not self.cold_tier or not self.cold_tier.exists(str(thread_id)):
+            return
+
+        async def chunks():
+            # Decompress off the event loop, one chunk at a time
+            segment = self.cold_tier.chunks(str(thread_id))
+            while (chunk := await asyncio.to_thread(next, segment, None)) is not None:
+                yield chunk
+
+        counts = await ExportService().import_stream(chunks())
+        await asyncio.to_thread(self.cold_tier.remove, str(thread_id))
+        version = self.repository.get_thread_version(str(thread_id))
+        if version:
+            get_thread_versions().set(thread_id, version["version"])
+        logger.info(f"Restored thread {thread_id}: {counts['messages']} messages rehydrated")
+
+    def _is_archived(self, thread_id: UUID) -> bool:
+        return bool(self.cold_tier and self.cold_tier.exists(str(thread_id)))
+
+    def _archived_messages(self, thread_id: UUID) -> List[Message]:
+        return [
+            Message.from_record({**row, "created_at": datetime.fromisoformat(row["created_at"]), "embedding": None})
+            for row in self.cold_tier.messages(str(thread_id))
+        ]
+
+    async def _get_thread_messages(self, thread_id: UUID) -> List[Message]:
+        """All messages of a thread, oldest first, including its cold segment"""
+        result = self.repository.get_thread_messages(str(thread_id))
+        messages = [Message.from_record(record) for record in result]
+        if self._is_archived(thread_id):
+            hot = {message.id for message in messages}
+            archived = await asyncio.to_thread(self._archived_messages, thread_id)
+            messages = sorted(
+                [message for message in archived if message.id not in hot] + messages,
+                key=lambda message: (message.created_at, str(message.id))
+            )
+        if not messages:
+            raise ThreadNotFoundError(f"Thread {thread_id} not found or empty")
+        return messages
 
     async def get_thread_summary(self, thread_id: UUID) -> ThreadSummary:
         """Generate a summary of the thread including topics and analytics"""
-        with self.neo4j.get_session() as session:
-            # Get all messages in thread
-            result = session.execute_read(
-                lambda tx: tx.run("""
-                    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
-                    RETURN m
-                    ORDER BY m.created_at
-                """,
-                thread_id=str(thread_id)
-                )
-            )
-
-            messages = [Message.model_validate(record["m"]) for record in result]
-
-            if not messages:
-                raise ThreadNotFoundError(f"Thread {thread_id} not found or empty")
+        # Get all messages in thread
+        messages = await self._get_thread_messages(thread_id)
+
+        # Extract topics from all messages
+        all_content = " ".join([msg.content for msg in messages])
+        topics = await self.openai.extract_topics(all_content)
+
+        # Generate summary
+        summary = await self.openai.summarize_thread(
+            [
+                {"role": msg.role, "content": msg.content}
+                for msg in messages
+            ]
+        )
 
-            # Extract topics from all messages
-            all_content = " ".join([msg.content for msg in messages])
-            topics = await self.openai.extract_topics(all_content)
+        return ThreadSummary(
+            id=thread_id,
+            message_count=len(messages),
+            last_message_at=messages[-1].created_at,
+            topics=topics,
+            summary=summary
+        )
 
-            # Generate summary
-            summary = await self.openai.summarize_thread(
-                [
-                    {"role": msg.role, "content": msg.content}
-                    for msg in messages
-                ]
-            )
-
-            return ThreadSummary(
-                id=thread_id,
-                message_count=len(messages),
-                last_message_at=messages[-1].created_at,
-                topics=topics,
-                summary=summary
-            )
+    async def stream_thread_summary(self, thread_id: UUID) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield (event, data) pairs: thread metadata first, then summary
+        deltas and topics as the completions stream, then the full summary"""
+        messages = await self._get_thread_messages(thread_id)
+        yield "meta", {
+            "id": str(thread_id),
+            "message_count": len(messages),
+            "last_message_at": messages[-1].created_at
+        }
+
+        summary = []
+        async for delta in self.openai.summarize_thread_stream(
+            [{"role": msg.role, "content": msg.content} for msg in messages]
+        ):
+            summary.append(delta)
+            yield "summary", {"delta": delta}
+
+        topics = []
+        async for topic in self.openai.extract_topics_stream(
+            " ".join([msg.content for msg in messages])
+        ):
+            topics.append(topic)
+            yield "topic", {"topic": topic}
+
+        yield "done", ThreadSummary(
+            id=thread_id,
+            message_count=len(messages),
+            last_message_at=messages[-1].created_at,
+            topics=topics,
+            summary="".join(summary).strip()
+        ).model_dump(mode="json")
 
     async def get_thread_analytics(
         self,
         thread_id: UUID
     ) -> Dict:
         """Get detailed analytics for a thread"""
-        with self.neo4j.get_session() as session:
-            result = session.execute_read(
-                lambda tx: tx.run("""
-                    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread {id: $thread_id})
-                    WITH m, t
-                    OPTIONAL MATCH (m)-[r:NEXT]->(next:Message)
-                    RETURN 
-                        count(m) as message_count,
-                        sum(CASE WHEN m.role = 'user' THEN 1 ELSE 0 END) as user_messages,
-                        sum(CASE WHEN m.role = 'assistant' THEN 1 ELSE 0 END) as assistant_messages,
-                        avg(duration.between(m.created_at, next.created_at).seconds) as avg_response_time
-                """,
-                thread_id=str(thread_id)
-                )
-            ).single()
-
-            if not result:
-                raise ThreadNotFoundError(f"Thread {thread_id} not found")
-
+        if self._is_archived(thread_id):
+            # Hot storage holds at most what was written since archiving
+            roles = [message.role for message in await self._get_thread_messages(thread_id)]
             return {
-                "message_count": result["message_count"],
-                "user_messages": result["user_messages"],
-                "assistant_messages": result["assistant_messages"],
-                "average_response_time_seconds": result["avg_response_time"]
+                "message_count": len(roles),
+                "user_messages": roles.count(MessageRole.USER),
+                "assistant_messages": roles.count(MessageRole.ASSISTANT),
+                "average_response_time_seconds": None
             }
+        result = self.repository.get_thread_analytics(str(thread_id))
+        if not result:
+            raise ThreadNotFoundError(f"Thread {thread_id} not found")
+
+        return {
+            "message_count": result["message_count"],
+            "user_messages": result["user_messages"],
+            "assistant_messages": result["assistant_messages"],
+            "average_response_time_seconds": result["avg_response_time"]
+        }
 
     async def find_similar_threads(
         self,
@@ -164,29 +231,17 @@ class ThreadService:
         # Generate embedding for query content
         query_embedding = await self.openai.generate_embedding(content)
 
-        with self.neo4j.get_session() as session:
-            # Find threads with similar messages
-            result = session.execute_read(
-                lambda tx: tx.run("""
-                    MATCH (m:Message)-[:BELONGS_TO]->(t:Thread)
-                    WITH m, t, gds.similarity.cosine(m.embedding, $embedding) AS score
-                    WHERE score >= $threshold
-                    WITH t, max(score) as max_score
-                    RETURN DISTINCT t
-                    ORDER BY max_score DESC
-                    LIMIT $limit
-                """,
-                embedding=query_embedding,
-                threshold=self.settings.SIMILARITY_THRESHOLD,
-                limit=limit
-                )
-            )
+        # Find threads with similar messages
+        thread_ids = self.repository.find_similar_threads(
+            query_embedding,
+            self.settings.SIMILARITY_THRESHOLD,
+            limit
+        )
 
-            threads = []
-            for record in result:
-                thread_id = UUID(record["t"]["id"])
-                # Get summary for each similar thread
-                summary = await self.get_thread_summary(thread_id)
-                threads.append(summary)
+        threads = []
+        for thread_id in thread_ids:
+            # Get summary for each similar thread
+            summary = await self.get_thread_summary(UUID(thread_id))
+            threads.append(summary)
 
-            return threads
\ No newline at end of file
+        return threads
\ No newline at end of file
@@ -20,8 +20,9 @@ def neo4j_service() -> Generator:
     finally:
         service.close()
 
-@pytest.fixture(autouse=True)
+@pytest.fixture
 def neo4j_cleanup():
+    """Wipe the live database after a test; request it from tests that write to Neo4j"""
     neo4j_service = Neo4jService()
     with neo4j_service.get_session() as session:
         yield session
@@ -0,0 +1,55 @@
+from uuid import uuid4
+from src.services.analytics_cache import MISSING, AnalyticsCache, ThreadVersionRegistry
+
+def test_cache_keyed_by_thread_version():
+    """Test a version bump misses the previous entry"""
+    cache = AnalyticsCache(max_entries=10, ttl_seconds=60)
+    thread_id = str(uuid4())
+    cache.set(("stats", thread_id, 1), {"total": 1})
+
+    assert cache.get(("stats", thread_id, 1)) == {"total": 1}
+    assert cache.get(("stats", thread_id, 2)) is MISSING
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_cache_evicts_least_recently_used():
+    """Test the cache stays within its entry bound"""
+    cache = AnalyticsCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_cache_entries_expire():
+    """Test entries past their TTL are dropped"""
+    cache = AnalyticsCache(max_entries=2, ttl_seconds=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is MISSING
+
+def test_version_registry_never_moves_backwards():
+    """Test out-of-order appends keep the newest version"""
+    versions = ThreadVersionRegistry(ttl_seconds=60)
+    thread_id = uuid4()
+    assert versions.get(thread_id) is None
+
+    versions.set(thread_id, 5)
+    versions.set(thread_id, 4)
+    assert versions.get(thread_id) == 5
+
+def test_version_registry_expires():
+    """Test expired versions force a fresh lookup"""
+    versions = ThreadVersionRegistry(ttl_seconds=-1)
+    thread_id = uuid4()
+    versions.set(thread_id, 1)
+    assert versions.get(thread_id) is None
+
+def test_version_registry_drops_expired_threads():
+    """Test the registry only keeps threads written within the TTL"""
+    versions = ThreadVersionRegistry(ttl_seconds=-1)
+    for version in range(100):
+        versions.set(uuid4(), version)
+    assert len(versions) == 1
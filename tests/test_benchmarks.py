@@ -0,0 +1,39 @@
+import json
+from benchmarks.bench_services import main, run_suite
+
+def test_suite_covers_every_service_path():
+    """Test a tiny run reports each benchmark with sane timings"""
+    results = run_suite(sizes=[50, 200], dimensions=32, repeat=2, warmup=0, thread_messages=20, batch_size=4)
+
+    assert set(results) == {
+        "message.create_message",
+        "message.create_message.duplicate",
+        "message.create_messages_batch.4",
+        "message.get_thread_context.recent",
+        "message.get_thread_context.around",
+        "thread.get_thread_summary",
+        "thread.get_thread_analytics",
+        "thread.find_similar_threads",
+        "analysis.get_thread_analytics",
+        "analysis.analyze_conversation_patterns",
+        "analysis.get_topic_evolution",
+        "message.get_similar_messages.50",
+        "message.get_similar_messages.200"
+    }
+    for result in results.values():
+        assert 0 < result["min_ms"] <= result["median_ms"] <= result["p95_ms"]
+
+def test_compare_flags_regressions(tmp_path, capsys):
+    """Test a run compared against a much faster baseline exits non-zero"""
+    output = tmp_path / "current.json"
+    baseline = tmp_path / "baseline.json"
+    args = ["--sizes", "50", "--dimensions", "32", "--repeat", "2", "--warmup", "0", "--thread-messages", "10"]
+    assert main(args + ["--output", str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    for result in report["results"].values():
+        result["median_ms"] /= 100
+    baseline.write_text(json.dumps(report))
+
+    assert main(args + ["--output", str(output), "--compare", str(baseline)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from src.core.config import get_settings
+from src.services.completion_cache import CompletionCache, completion_key, get_completion_cache
+from src.services.openai_service import OpenAIService
+
+class CountingOpenAIService(OpenAIService):
+    """OpenAI service that answers completions locally and counts billed calls"""
+
+    def __init__(self, cache):
+        super().__init__()
+        self.completion_cache = cache
+        self.calls = 0
+
+    async def _call(self, model, operation, tokens, priority, call):
+        self.calls += 1
+        message = SimpleNamespace(content=" billing, deployments ")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream_completion(self, prompt, temperature, max_tokens):
+        self.calls += 1
+        for delta in ["The user ", "asked about billing."]:
+            yield delta
+
+def _cache(path, ttl_seconds=60):
+    cache = CompletionCache(16, ttl_seconds, str(path))
+    cache.init_disk()
+    return cache
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+def test_key_covers_model_template_version_and_temperature():
+    """Test any change to the request produces a different key"""
+    base = completion_key("gpt", "topics", 1, 0.3, 100, "text")
+    assert base == completion_key("gpt", "topics", 1, 0.3, 100, "text")
+    assert base != completion_key("gpt-4", "topics", 1, 0.3, 100, "text")
+    assert base != completion_key("gpt", "topics", 2, 0.3, 100, "text")
+    assert base != completion_key("gpt", "topics", 1, 0.5, 100, "text")
+    assert base != completion_key("gpt", "topics", 1, 0.3, 100, "other text")
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test a fresh cache instance reads entries written by another"""
+    path = tmp_path / "completions.sqlite3"
+    asyncio.run(_cache(path).set("key", "value"))
+
+    restarted = _cache(path)
+    assert asyncio.run(restarted.get("key")) == "value"
+    assert asyncio.run(restarted.get("key")) == "value"
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.stats()["memory_hits"] == 1
+
+def test_expired_entries_are_misses(tmp_path):
+    """Test entries past their TTL are not served from either tier"""
+    cache = _cache(tmp_path / "completions.sqlite3", ttl_seconds=0.01)
+    asyncio.run(cache.set("key", "value"))
+    time.sleep(0.02)
+    assert asyncio.run(cache.get("key")) is None
+    assert cache.stats()["misses"] == 1
+
+def test_identical_prompts_are_billed_once(tmp_path):
+    """Test repeated topic and summary requests reuse the cached completion"""
+    service = CountingOpenAIService(_cache(tmp_path / "completions.sqlite3"))
+    messages = [{"role": "user", "content": "How do I update my card?"}]
+
+    async def run():
+        first = await service.extract_topics("billing text")
+        second = await service.extract_topics("billing text")
+        summary = await _collect(service.summarize_thread_stream(messages))
+        replayed = await service.summarize_thread(messages)
+        return first, second, summary, replayed
+
+    first, second, summary, replayed = asyncio.run(run())
+
+    assert first == second == ["billing", "deployments"]
+    assert "".join(summary) == replayed == "The user asked about billing."
+    assert service.calls == 2
+
+def test_default_cache_creates_its_store_once(tmp_path, monkeypatch):
+    """Test the shared cache resolves a relative path and creates the file up front"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(get_settings(), "COMPLETION_CACHE_PATH", "store/completions.sqlite3")
+    get_completion_cache.cache_clear()
+    try:
+        cache = get_completion_cache()
+        assert cache.path == str(tmp_path / "store" / "completions.sqlite3")
+        assert (tmp_path / "store" / "completions.sqlite3").exists()
+        assert get_completion_cache() is cache
+    finally:
+        get_completion_cache.cache_clear()
@@ -0,0 +1,77 @@
+from uuid import uuid4
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from src.api.conditional import make_etag, etag_matches, not_modified
+from src.api.deps import get_message_service, get_thread_service
+from src.api.routes.threads import router as threads_router
+from src.core.exceptions import ThreadNotFoundError
+
+class FakeThreadService:
+    """Knows the version of one thread"""
+
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+
+    async def get_thread_version(self, thread_id):
+        if thread_id != self.thread_id:
+            raise ThreadNotFoundError(f"Thread {thread_id} not found")
+        return {"version": 3, "updated_at": 1000, "message_count": 0}
+
+class FakeMessageService:
+    async def get_thread_context(self, thread_id, message_id, window_size, include_embedding=False):
+        return []
+
+def _client(thread_id) -> TestClient:
+    app = FastAPI()
+    app.include_router(threads_router)
+    app.dependency_overrides[get_thread_service] = lambda: FakeThreadService(thread_id)
+    app.dependency_overrides[get_message_service] = lambda: FakeMessageService()
+    return TestClient(app)
+
+def _request(if_none_match=None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+def test_etag_changes_with_version():
+    """Test ETags track the thread version stamp"""
+    assert make_etag("thread", "t1", 1, 1000) == make_etag("thread", "t1", 1, 1000)
+    assert make_etag("thread", "t1", 1, 1000) != make_etag("thread", "t1", 2, 1000)
+    assert make_etag("thread", "t1", 1, 1000).startswith('W/"')
+
+def test_if_none_match_comparison():
+    """Test weak comparison, lists and wildcards"""
+    etag = make_etag("thread", "t1", 1, 1000)
+    strong = etag.removeprefix("W/")
+    assert etag_matches(_request(etag), etag)
+    assert etag_matches(_request(strong), etag)
+    assert etag_matches(_request(f'"other", {etag}'), etag)
+    assert etag_matches(_request("*"), etag)
+    assert not etag_matches(_request('"other"'), etag)
+    assert not etag_matches(_request(), etag)
+
+def test_not_modified_response():
+    """Test 304 responses carry validators and no body"""
+    etag = make_etag("thread", "t1", 1, 1000)
+    response = not_modified(etag)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert "cache-control" in response.headers
+    assert response.body == b""
+
+def test_context_of_unknown_thread_skips_validators():
+    """Test unknown threads answer from the read path without an ETag"""
+    known = uuid4()
+    client = _client(known)
+
+    response = client.get(f"/threads/{uuid4()}/context")
+    assert response.status_code == 200
+    assert response.json() == []
+    assert "etag" not in response.headers
+
+    response = client.get(f"/threads/{known}/context")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert client.get(f"/threads/{known}/context", headers={"If-None-Match": etag}).status_code == 304
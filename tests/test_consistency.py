@@ -0,0 +1,137 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from neo4j import READ_ACCESS, Bookmarks
+from src.api.consistency import BookmarkMiddleware
+from src.api.deps import eventual_reads
+from src.core.constants import JobStatus
+from src.db.neo4j import Neo4jService
+from src.services.job_service import JobQueue
+
+HEADER = "X-Neo4j-Bookmark"
+
+class FakeSession:
+    def __init__(self, config, produced):
+        self.config = config
+        self.produced = produced
+
+    def last_bookmarks(self):
+        return Bookmarks.from_raw_values(self.produced)
+
+    def close(self):
+        pass
+
+class FakeDriver:
+    """Records session configs; write sessions end on the next bookmark"""
+
+    def __init__(self):
+        self.configs = []
+
+    def session(self, **config):
+        self.configs.append(config)
+        reading = config.get("default_access_mode") == READ_ACCESS
+        given = config["bookmarks"].raw_values if "bookmarks" in config else []
+        return FakeSession(config, given if reading else [f"bm{len(self.configs)}"])
+
+def _service():
+    neo4j = Neo4jService()
+    neo4j.close()
+    neo4j._driver = FakeDriver()
+    return neo4j
+
+def _app(neo4j):
+    app = FastAPI()
+
+    def read():
+        with neo4j.get_session(default_access_mode=READ_ACCESS):
+            pass
+
+    @app.post("/write")
+    def write():
+        with neo4j.get_session():
+            pass
+        read()
+        return {}
+
+    @app.get("/exists")
+    def leader_read():
+        with neo4j.get_session(leader_read=True):
+            pass
+        return {}
+
+    @app.get("/read")
+    def causal_read():
+        read()
+        return {}
+
+    @app.get("/search", dependencies=[Depends(eventual_reads)])
+    def eventual_read():
+        read()
+        return {}
+
+    app.add_middleware(BookmarkMiddleware, header=HEADER)
+    return app
+
+def _given(config):
+    return sorted(config["bookmarks"].raw_values) if "bookmarks" in config else None
+
+def test_write_returns_bookmark_and_later_reads_wait_for_it():
+    """Test a write's bookmark is sent back and honored within and across requests"""
+    neo4j = _service()
+    client = TestClient(_app(neo4j))
+
+    response = client.post("/write", headers={HEADER: "bm0"})
+    assert response.headers[HEADER] == "bm1"
+    write, read_after = neo4j._driver.configs
+    assert _given(write) == ["bm0"]
+    assert _given(read_after) == ["bm1"]
+
+    response = client.get("/read", headers={HEADER: "bm1, bm9"})
+    assert HEADER not in response.headers
+    assert _given(neo4j._driver.configs[-1]) == ["bm1", "bm9"]
+
+def test_eventual_routes_skip_bookmarks():
+    """Test routes opted into eventual reads ignore the client's bookmarks"""
+    neo4j = _service()
+    client = TestClient(_app(neo4j))
+
+    client.get("/search", headers={HEADER: "bm1"})
+    assert _given(neo4j._driver.configs[-1]) is None
+
+def test_leader_reads_return_no_bookmark():
+    """Test a read pinned to the leader chains after the client's bookmarks but is not a write"""
+    neo4j = _service()
+    client = TestClient(_app(neo4j))
+
+    response = client.get("/exists", headers={HEADER: "bm1"})
+    assert HEADER not in response.headers
+    assert _given(neo4j._driver.configs[-1]) == ["bm1"]
+
+def test_jobs_read_with_the_submitting_requests_bookmarks():
+    """Test a background job waits for the bookmarks of the request that queued it"""
+    neo4j = _service()
+
+    async def handler(thread_id):
+        with neo4j.get_session(default_access_mode=READ_ACCESS):
+            pass
+        return {}
+
+    app = FastAPI()
+    queue = JobQueue(handlers={"kind": handler})
+
+    @app.post("/jobs", dependencies=[Depends(eventual_reads)])
+    async def submit():
+        job = queue.submit("kind", uuid4(), 1)
+        while job.status in (JobStatus.PENDING, JobStatus.RUNNING):
+            await asyncio.sleep(0.01)
+        return {}
+
+    app.add_middleware(BookmarkMiddleware, header=HEADER)
+    queue.repository = SimpleNamespace(save_job=lambda job: None, get_completed_job=lambda *args: None)
+    with TestClient(app) as client:
+        client.portal.call(queue.start)
+        client.post("/jobs", headers={HEADER: "bm7"})
+        client.portal.call(queue.stop)
+    assert _given(neo4j._driver.configs[-1]) == ["bm7"]
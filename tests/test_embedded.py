@@ -0,0 +1,203 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+import pytest
+from src.core.exceptions import DatabaseConnectionError
+from src.core.fingerprint import content_hash, simhash, simhash_bands
+from src.db.embedded import ROTATED_WAL_FILE, WAL_FILE, EmbeddedRepository, EmbeddedStore
+from src.models.message import MessageCreate
+from src.services.embeddings import HashingEmbeddingProvider
+from src.services.export_service import ExportService
+from src.services.message_service import MessageService
+
+def _open(directory, **kwargs):
+    return EmbeddedRepository(EmbeddedStore(str(directory), fsync=False, **kwargs))
+
+def _rows(count, start=None):
+    start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        value = simhash(f"message {i}")
+        rows.append({
+            "id": str(UUID(int=i + 1)),
+            "content": f"message {i}",
+            "role": "user" if i % 2 == 0 else "assistant",
+            "created_at": start + timedelta(minutes=i),
+            "embedding": [1.0, float(i), 0.0],
+            "content_hash": content_hash(f"message {i}"),
+            "simhash": value,
+            "bands": simhash_bands(value)
+        })
+    return rows
+
+def test_messages_survive_reopen_and_checkpoint(tmp_path):
+    """Test writes are replayed from the log, and again after a checkpoint"""
+    repository = _open(tmp_path)
+    repository.create_thread("t1", "active")
+    batch = repository.create_messages_batch("t1", _rows(3), [{
+        "id": "dup", "content": "message 0", "role": "user",
+        "created_at": datetime(2024, 1, 1, 0, 10, tzinfo=timezone.utc),
+        "canonical_id": str(UUID(int=1)), "distance": 0
+    }])
+    assert batch == {
+        "count": 4, "ids": [str(UUID(int=i + 1)) for i in range(3)] + ["dup"],
+        "version": 4, "previous_at": None, "previous_role": None
+    }
+    repository.store._wal.close()
+    repository.store._lock_file.close()
+
+    reopened = _open(tmp_path)
+    assert reopened.get_thread_version("t1")["version"] == 4
+    assert [m["content"] for m in reopened.get_thread_messages("t1")] == [
+        "message 0", "message 1", "message 2", "message 0"
+    ]
+    duplicate = reopened.get_message("dup", include_embedding=True)
+    assert duplicate["duplicate_of"] == str(UUID(int=1))
+    assert duplicate["embedding"] == [1.0, 0.0, 0.0]
+
+    reopened.close()
+    assert os.path.getsize(tmp_path / WAL_FILE) == 0
+    checkpointed = _open(tmp_path)
+    assert checkpointed.get_dedup_report()["duplicate_messages"] == 1
+    assert checkpointed.find_similar_messages([1.0, 2.0, 0.0], 0.99, 1, False)[0]["content"] == "message 2"
+    checkpointed.close()
+
+def test_torn_log_tail_is_truncated(tmp_path):
+    """Test a half-written log record from a crash is dropped on open"""
+    repository = _open(tmp_path)
+    repository.create_thread("t1", "active")
+    repository.store._wal.write(b'["status", {"id": "t1", "sta')
+    repository.store._wal.close()
+    repository.store._lock_file.close()
+
+    reopened = _open(tmp_path)
+    assert reopened.get_thread("t1")["status"] == "active"
+    assert (tmp_path / WAL_FILE).read_bytes().endswith(b"\n")
+    reopened.close()
+
+def test_interrupted_checkpoint_does_not_replay_twice(tmp_path, monkeypatch):
+    """Test a crash after the snapshot is written skips the records it already holds"""
+    repository = _open(tmp_path)
+    repository.create_thread("t1", "active")
+    first, second = _rows(2)
+    repository.create_messages_batch("t1", [first], [])
+    # Crash between replacing the snapshot and removing the rotated log
+    monkeypatch.setattr("src.db.embedded.os.remove", lambda path: None)
+    repository.store.checkpoint()
+    monkeypatch.undo()
+    repository.create_messages_batch("t1", [second], [])
+    repository.store._wal.close()
+    repository.store._lock_file.close()
+
+    reopened = _open(tmp_path)
+    assert [m["id"] for m in reopened.get_thread_messages("t1")] == [first["id"], second["id"]]
+    assert reopened.get_thread_version("t1")["version"] == 2
+    reopened.close()
+    assert not (tmp_path / ROTATED_WAL_FILE).exists()
+
+def test_checkpoint_runs_in_background(tmp_path):
+    """Test passing the checkpoint size snapshots on another thread"""
+    repository = _open(tmp_path, checkpoint_bytes=1)
+    repository.create_thread("t1", "active")
+    for thread in threading.enumerate():
+        if thread.name == "embedded-checkpoint":
+            thread.join()
+    assert os.path.getsize(tmp_path / WAL_FILE) == 0
+    assert not (tmp_path / ROTATED_WAL_FILE).exists()
+    repository.close()
+
+    reopened = _open(tmp_path)
+    assert reopened.get_thread("t1")["status"] == "active"
+    reopened.close()
+
+def test_second_open_is_refused(tmp_path):
+    """Test the lock file keeps two stores off one directory"""
+    repository = _open(tmp_path)
+    with pytest.raises(DatabaseConnectionError):
+        EmbeddedStore(str(tmp_path))
+    repository.close()
+
+def test_context_window_and_duplicate_candidates(tmp_path):
+    """Test context lookups slice the time-ordered thread and dedup finds candidates"""
+    repository = _open(tmp_path)
+    repository.create_thread("t1", "active")
+    repository.create_messages_batch("t1", list(reversed(_rows(10))), [])
+
+    recent = repository.get_recent_context("t1", 3, False)
+    assert [m["content"] for m in recent] == ["message 9", "message 8", "message 7"]
+    around = repository.get_context_around_message(str(UUID(int=5)), "t1", 120, False)
+    assert [m["content"] for m in around] == [f"message {i}" for i in range(2, 7)]
+
+    value = simhash("message 3")
+    candidates = repository.find_duplicate_candidates(content_hash("message 3"), simhash_bands(value), 10)
+    assert str(UUID(int=4)) in [candidate["id"] for candidate in candidates]
+    repository.close()
+
+def test_duplicates_return_their_canonical_embedding(tmp_path):
+    """Test every read that honours include_embedding resolves a duplicate's vector"""
+    repository = _open(tmp_path)
+    repository.create_thread("t1", "active")
+    rows = _rows(2)
+    repository.create_messages_batch("t1", rows, [{
+        "id": "dup", "content": "message 0", "role": "user",
+        "created_at": datetime(2024, 1, 1, 0, 10, tzinfo=timezone.utc),
+        "canonical_id": rows[0]["id"], "distance": 0
+    }])
+
+    reads = [
+        repository.get_recent_context("t1", 1, True),
+        repository.get_context_around_message("dup", "t1", 60, True),
+        [repository.get_message("dup", True)]
+    ]
+    for read in reads:
+        duplicate = next(m for m in read if m["id"] == "dup")
+        assert duplicate["embedding"] == [1.0, 0.0, 0.0]
+    assert repository.get_recent_context("t1", 1, False)[0]["embedding"] is None
+    repository.close()
+
+def test_export_round_trip(tmp_path):
+    """Test an export from one embedded store imports into another unchanged"""
+    source = _open(tmp_path / "source")
+    source.create_thread("t1", "active")
+    source.create_messages_batch("t1", _rows(5), [])
+    service = ExportService()
+    service.repository = source
+    service.settings = service.settings.model_copy(update={"EXPORT_PAGE_SIZE": 2})
+    exported = b"".join(service.export_all(include_embedding=True))
+
+    async def chunks():
+        yield exported
+
+    target = _open(tmp_path / "target")
+    service.repository = target
+    counts = asyncio.run(service.import_stream(chunks()))
+    assert counts["messages"] == 5
+    assert target.get_thread_messages("t1") == source.get_thread_messages("t1")
+    assert target.get_message(str(UUID(int=3)), True)["embedding"] == [1.0, 2.0, 0.0]
+    source.close()
+    target.close()
+
+def test_message_service_on_embedded_store(tmp_path):
+    """Test the message service dedups and searches against the embedded backend"""
+    repository = _open(tmp_path)
+    service = MessageService()
+    service.repository = repository
+    service.openai.embeddings = HashingEmbeddingProvider(64)
+    thread_id = uuid4()
+    repository.create_thread(str(thread_id), "active")
+
+    first = asyncio.run(service.create_message(
+        MessageCreate(thread_id=thread_id, content="deploy failed on staging", role="user")
+    ))
+    second = asyncio.run(service.create_message(
+        MessageCreate(thread_id=thread_id, content="deploy failed on staging", role="user")
+    ))
+    assert second.duplicate_of == first.id
+
+    similar = asyncio.run(service.get_similar_messages("deploy failed on staging", limit=1))
+    assert [message.id for message in similar] == [first.id]
+    report = asyncio.run(service.get_dedup_report())
+    assert report["duplicate_messages"] == 1
+    repository.close()
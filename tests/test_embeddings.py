@@ -0,0 +1,82 @@
+import asyncio
+import numpy as np
+import pytest
+from src.core.config import get_settings
+from src.core.exceptions import EmbeddingGenerationError, ProviderUnavailableError
+from src.services.embeddings import (
+    HashingEmbeddingProvider,
+    OpenAIEmbeddingProvider,
+    get_embedding_provider
+)
+from src.services.openai_service import OpenAIService
+
+def _cosine(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+def test_hashing_provider_is_deterministic_and_normalised():
+    """Test hashing vectors have the reported size, unit length and are stable"""
+    provider = HashingEmbeddingProvider(dimensions=64)
+    first, again, empty = asyncio.run(provider.embed(["Deploy the billing service", "Deploy the billing service", ""]))
+
+    assert provider.dimensions == len(first) == 64
+    assert first == again
+    assert np.linalg.norm(first) == pytest.approx(1.0, abs=1e-6)
+    assert not any(empty)
+
+def test_hashing_provider_ranks_overlapping_text_closer():
+    """Test texts sharing words are more similar than unrelated ones"""
+    provider = HashingEmbeddingProvider(dimensions=256)
+    query, related, unrelated = asyncio.run(provider.embed([
+        "the billing service failed to deploy",
+        "deploy of the billing service failed again",
+        "what a lovely sunny afternoon"
+    ]))
+    assert _cosine(query, related) > _cosine(query, unrelated)
+
+def test_batches_keep_input_order():
+    """Test texts split over several thread pool batches come back in order"""
+    provider = HashingEmbeddingProvider(dimensions=32, batch_size=2)
+    texts = [f"message number {i}" for i in range(7)]
+    batched = asyncio.run(provider.embed(texts))
+    single = [asyncio.run(provider.embed([text]))[0] for text in texts]
+    assert batched == single
+
+def test_embedding_model_selects_provider(monkeypatch):
+    """Test EMBEDDING_MODEL picks the provider behind OpenAIService"""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL", "hashing")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSIONS", 48)
+
+    service = OpenAIService()
+    assert isinstance(service.embeddings, HashingEmbeddingProvider)
+    assert len(asyncio.run(service.generate_embedding("hello world"))) == 48
+    assert service.embeddings is get_embedding_provider()
+
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL", "text-embedding-3-large")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSIONS", None)
+    provider = get_embedding_provider()
+    assert isinstance(provider, OpenAIEmbeddingProvider)
+    assert provider.dimensions == 3072
+    # Built once per process, not per service or health probe
+    assert get_embedding_provider() is provider
+    assert OpenAIService().embeddings is provider
+
+def test_local_providers_need_no_api_key(monkeypatch):
+    """Test local providers are cached per dimensions and run without OPENAI_API_KEY"""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", None)
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL", "hashing")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSIONS", 32)
+    small = get_embedding_provider()
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSIONS", 96)
+    large = get_embedding_provider()
+    assert (small.dimensions, large.dimensions) == (32, 96)
+
+    service = OpenAIService()
+    assert len(asyncio.run(service.generate_embedding("hello world"))) == 96
+    with pytest.raises(ProviderUnavailableError):
+        asyncio.run(service.extract_topics("hello world"))
+
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL", "text-embedding-3-small")
+    with pytest.raises(EmbeddingGenerationError):
+        get_embedding_provider()
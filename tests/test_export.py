@@ -0,0 +1,127 @@
+import asyncio
+import orjson
+import pytest
+from src.core.exceptions import ContextManagerException
+from src.db.embedded import EmbeddedRepository, EmbeddedStore
+from src.services.export_service import ExportService, decode_embedding, encode_embedding
+
+class CapturingExportService(ExportService):
+    """Export service that records chunks instead of writing them"""
+
+    def __init__(self, chunk_size: int):
+        super().__init__()
+        self.settings = self.settings.model_copy(update={"IMPORT_CHUNK_SIZE": chunk_size})
+        self.chunks = []
+
+    def _write_chunk(self, threads, messages):
+        self.chunks.append((list(threads), list(messages)))
+        return {"threads": len(threads), "messages": len(messages)}
+
+async def _byte_chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+def test_embedding_round_trip():
+    """Test base64 float32 encoding survives a round trip"""
+    embedding = [0.5, -0.25, 1.0, 0.125]
+    assert decode_embedding(encode_embedding(embedding)) == embedding
+
+def test_import_streams_in_chunks():
+    """Test import splits arbitrary byte chunks into bounded UNWIND batches"""
+    lines = [{"type": "header", "format": "comagraph-ndjson/1"}]
+    lines.append({
+        "type": "thread", "id": "t1", "status": "active",
+        "created_at": "2024-01-01T00:00:00+00:00", "updated_at": "2024-01-01T00:00:00+00:00"
+    })
+    for i in range(5):
+        lines.append({
+            "type": "message", "id": f"m{i}", "thread_id": "t1", "role": "user",
+            "content": f"message {i}", "created_at": "2024-01-01T00:00:00+00:00",
+            "embedding": encode_embedding([float(i), 0.0]) if i < 4 else None,
+            "duplicate_of": "m0" if i == 4 else None
+        })
+    payload = b"\n".join(orjson.dumps(line) for line in lines)
+
+    service = CapturingExportService(chunk_size=2)
+    counts = asyncio.run(service.import_stream(_byte_chunks(payload, 7)))
+
+    assert counts == {"threads": 1, "messages": 5, "skipped": 0}
+    assert all(len(t) + len(m) <= 2 for t, m in service.chunks)
+    messages = [m for _, chunk in service.chunks for m in chunk]
+    assert messages[1]["embedding"] == [1.0, 0.0]
+    assert messages[1]["content_hash"] is not None
+    assert messages[4]["content_hash"] is None
+    assert messages[4]["duplicate_of"] == "m0"
+
+@pytest.mark.parametrize("line", [
+    b'{"type": "thread", "id": "t1", "status": "active"',
+    b'{"type": "message", "id": "m1", "role": "user", "content": "hi", "created_at": "2024-01-01T00:00:00"}',
+    b'{"type": "message", "id": "m1", "thread_id": "t1", "role": "user", "content": "hi", "created_at": "yesterday"}',
+    b'{"type": "message", "id": "m1", "thread_id": "t1", "role": "user", "content": "hi",'
+    b' "created_at": "2024-01-01T00:00:00", "embedding": "not base64!"}',
+])
+def test_import_rejects_invalid_rows_with_their_line(line):
+    """Test malformed rows, including an unterminated last line, fail with their line number"""
+    header = orjson.dumps({"type": "header", "format": "comagraph-ndjson/1"})
+    service = CapturingExportService(chunk_size=10)
+
+    with pytest.raises(ContextManagerException, match="line 2"):
+        asyncio.run(service.import_stream(_byte_chunks(header + b"\n" + line, 16)))
+    assert service.chunks == []
+
+def _message(message_id, content, embedding=None, duplicate_of=None):
+    return {
+        "type": "message", "id": message_id, "thread_id": "t1", "role": "user",
+        "content": content, "created_at": "2024-01-01T00:00:00+00:00",
+        "embedding": encode_embedding(embedding) if embedding else None,
+        "duplicate_of": duplicate_of, "duplicate_distance": 0 if duplicate_of else None
+    }
+
+@pytest.fixture
+def embedded_export(tmp_path):
+    repository = EmbeddedRepository(EmbeddedStore(str(tmp_path), fsync=False))
+    service = ExportService()
+    service.settings = service.settings.model_copy(update={"IMPORT_CHUNK_SIZE": 2})
+    service.repository = repository
+    service.cold_tier = None
+    yield repository, service
+    repository.close()
+
+def test_import_links_duplicates_that_precede_their_canonical(embedded_export):
+    """Test a duplicate line ahead of its canonical is linked, and an orphan keeps its embedding"""
+    repository, service = embedded_export
+    lines = [
+        {"type": "thread", "id": "t1", "status": "active",
+         "created_at": "2024-01-01T00:00:00+00:00", "updated_at": "2024-01-01T00:00:00+00:00"},
+        _message("dup", "disk full", [0.0, 1.0], duplicate_of="canonical"),
+        _message("orphan", "gone", [1.0, 0.0], duplicate_of="missing"),
+        _message("other", "unrelated", [0.5, 0.5]),
+        _message("canonical", "disk full", [0.0, 1.0])
+    ]
+    payload = b"\n".join(orjson.dumps(line) for line in lines)
+
+    counts = asyncio.run(service.import_stream(_byte_chunks(payload, 5)))
+
+    assert counts == {"threads": 1, "messages": 4, "skipped": 0}
+    duplicate = repository.get_message("dup", include_embedding=True)
+    assert (duplicate["duplicate_of"], duplicate["embedding"]) == ("canonical", [0.0, 1.0])
+    orphan = repository.get_message("orphan", include_embedding=True)
+    assert (orphan["duplicate_of"], orphan["embedding"]) == (None, [1.0, 0.0])
+
+def test_reimport_skips_existing_messages(embedded_export):
+    """Test messages already stored are reported as skipped and leave the version alone"""
+    repository, service = embedded_export
+    lines = [
+        {"type": "thread", "id": "t1", "status": "active",
+         "created_at": "2024-01-01T00:00:00+00:00", "updated_at": "2024-01-01T00:00:00+00:00"},
+        _message("m1", "first", [1.0, 0.0]),
+        _message("m2", "second", [0.0, 1.0])
+    ]
+    payload = b"\n".join(orjson.dumps(line) for line in lines)
+    asyncio.run(service.import_stream(_byte_chunks(payload, 64)))
+    version = repository.get_thread_version("t1")["version"]
+
+    counts = asyncio.run(service.import_stream(_byte_chunks(payload, 64)))
+
+    assert counts["messages"] == 0 and counts["skipped"] == 2
+    assert repository.get_thread_version("t1")["version"] == version
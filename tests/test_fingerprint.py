@@ -0,0 +1,34 @@
+from src.core.fingerprint import (
+    SIMHASH_BANDS,
+    content_hash,
+    hamming_distance,
+    simhash,
+    simhash_bands
+)
+
+def test_content_hash_ignores_case_and_whitespace():
+    """Test exact fingerprint normalization"""
+    assert content_hash("Hello   World") == content_hash("hello world\n")
+    assert content_hash("hello world") != content_hash("hello there")
+
+def test_simhash_near_duplicates():
+    """Test near-duplicate texts land within a few bits"""
+    base = "The deployment failed because the database migration timed out after ten minutes"
+    variant = "The deployment failed because the database migration timed out after ten minutes!"
+    other = "Can you recommend a good recipe for banana bread with walnuts"
+    assert hamming_distance(simhash(base), simhash(variant)) <= 3
+    assert hamming_distance(simhash(base), simhash(other)) > 3
+
+def test_simhash_fits_signed_int64():
+    """Test SimHash values can be stored as Neo4j integers"""
+    for text in ["a", "hello world", "x" * 1000]:
+        value = simhash(text)
+        assert -(1 << 63) <= value < (1 << 63)
+
+def test_simhash_bands_share_band_when_close():
+    """Test the banding pigeonhole property used for index lookups"""
+    value = simhash("status update from the nightly build bot")
+    flipped = value ^ 0b1011  # three bits, all in the lowest band
+    assert len(simhash_bands(value)) == SIMHASH_BANDS
+    shared = [a == b for a, b in zip(simhash_bands(value), simhash_bands(flipped))]
+    assert sum(shared) == SIMHASH_BANDS - 1
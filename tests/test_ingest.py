@@ -0,0 +1,153 @@
+import asyncio
+from uuid import uuid4
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.deps import get_message_service, get_thread_service
+from src.api.routes.messages import router as messages_router
+from src.models.message import MessageCreate
+from src.core.fingerprint import content_hash
+from src.services.ingest_service import IngestSession
+from src.services.message_service import MessageService
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    async def generate_embeddings(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 0.0] for text in texts]
+
+class CapturingMessageService(MessageService):
+    """Message service that records batch writes instead of running them"""
+
+    def __init__(self, existing=None, deleted=()):
+        super().__init__()
+        self.openai = FakeEmbeddings()
+        self.existing = existing or {}
+        self.deleted = set(deleted)
+        self.writes = []
+
+    def _find_duplicates(self, keys):
+        return [self.existing.get(fingerprint) for fingerprint, _ in keys]
+
+    def _write_batch(self, thread_id, canonical_rows, duplicate_rows):
+        self.writes.append((canonical_rows, duplicate_rows))
+        ids = [row["id"] for row in canonical_rows] + [
+            row["id"] for row in duplicate_rows if row["canonical_id"] not in self.deleted
+        ]
+        return {"count": len(ids), "ids": ids, "version": len(self.writes)}
+
+def _creates(thread_id, *contents):
+    return [MessageCreate(content=content, role="user", thread_id=thread_id) for content in contents]
+
+def test_batch_embeds_once_and_links_in_batch_duplicates():
+    """Test a batch makes one embedding call and skips repeated content"""
+    thread_id = uuid4()
+    service = CapturingMessageService()
+    messages = asyncio.run(service.create_messages_batch(
+        thread_id,
+        _creates(thread_id, "deploy failed on staging", "rollback please", "deploy failed on staging")
+    ))
+
+    assert service.openai.calls == [["deploy failed on staging", "rollback please"]]
+    canonical_rows, duplicate_rows = service.writes[0]
+    assert [row["id"] for row in canonical_rows] == [str(messages[0].id), str(messages[1].id)]
+    assert duplicate_rows[0]["canonical_id"] == str(messages[0].id)
+    assert duplicate_rows[0]["distance"] == 0
+    assert messages[2].duplicate_of == messages[0].id
+
+def test_session_batches_and_acks_in_order():
+    """Test pushed messages are grouped into batches and acked with their ids"""
+    thread_id = uuid4()
+    service = CapturingMessageService()
+    frames = []
+
+    async def send(frame):
+        frames.append(frame)
+
+    async def run():
+        session = IngestSession(thread_id, service, send)
+        session.settings = session.settings.model_copy(update={"INGEST_BATCH_SIZE": 2})
+        for ref, message in enumerate(_creates(thread_id, "one", "two", "three")):
+            await session.push(ref, message)
+        session.start()
+        await session.close()
+
+    asyncio.run(run())
+
+    assert [len(canonical) for canonical, _ in service.writes] == [2, 1]
+    assert [frame["ref"] for frame in frames] == [0, 1, 2]
+    assert all(frame["type"] == "ack" and frame["id"] for frame in frames)
+
+def test_session_reports_duplicates_of_deleted_canonicals():
+    """Test a duplicate whose canonical vanished before the write gets an error, not an ack"""
+    thread_id = uuid4()
+    canonical_id = str(uuid4())
+    service = CapturingMessageService(
+        existing={content_hash("seen before"): {"id": canonical_id, "distance": 0}},
+        deleted={canonical_id}
+    )
+    frames = []
+
+    async def send(frame):
+        frames.append(frame)
+
+    async def run():
+        session = IngestSession(thread_id, service, send)
+        for ref, message in enumerate(_creates(thread_id, "seen before", "brand new")):
+            await session.push(ref, message)
+        session.start()
+        await session.close()
+
+    asyncio.run(run())
+
+    assert [(frame["ref"], frame["type"]) for frame in frames] == [(0, "error"), (1, "ack")]
+
+def test_session_signals_backpressure_when_full():
+    """Test a full queue tells the client to slow down and then waits"""
+    thread_id = uuid4()
+    service = CapturingMessageService()
+    frames = []
+
+    async def send(frame):
+        frames.append(frame)
+
+    async def run():
+        session = IngestSession(thread_id, service, send)
+        session._queue = asyncio.Queue(maxsize=1)
+        first, second = _creates(thread_id, "first", "second")
+        await session.push("a", first)
+        blocked = asyncio.create_task(session.push("b", second))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        session.start()
+        await blocked
+        await session.close()
+
+    asyncio.run(run())
+
+    assert frames[0] == {"type": "backpressure", "pending": 1}
+    assert [frame["ref"] for frame in frames[1:]] == ["a", "b"]
+
+class FakeThreadService:
+    async def get_thread_version(self, thread_id):
+        return {"version": 1, "updated_at": 0, "message_count": 0}
+
+def test_websocket_accepts_binary_frames_and_rejects_undecodable_ones():
+    """Test binary frames are decoded as UTF-8 JSON and bad ones get an error frame"""
+    service = CapturingMessageService()
+    app = FastAPI()
+    app.include_router(messages_router)
+    app.dependency_overrides[get_message_service] = lambda: service
+    app.dependency_overrides[get_thread_service] = lambda: FakeThreadService()
+
+    with TestClient(app).websocket_connect(f"/messages/ws/{uuid4()}") as websocket:
+        websocket.send_bytes(b"\xff\xfe")
+        error = websocket.receive_json()
+        assert error["type"] == "error" and error["ref"] is None
+
+        websocket.send_bytes(b'{"ref": 7, "content": "binary hello", "role": "user"}')
+        ack = websocket.receive_json()
+        assert ack["type"] == "ack" and ack["ref"] == 7
+
+    assert len(service.writes) == 1
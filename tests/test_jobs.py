@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from uuid import uuid4
+from src.core.constants import JobStatus
+from src.core.exceptions import JobQueueFullError
+from src.services.job_service import JobQueue
+
+class InMemoryJobQueue(JobQueue):
+    """Job queue that keeps finished jobs in memory only"""
+
+    def _persist(self, job):
+        pass
+
+    def _load_completed(self, kind, thread_id, thread_version):
+        return None
+
+def test_job_runs_and_stores_result():
+    """Test a submitted job completes with its handler's result"""
+    calls = []
+
+    async def handler(thread_id):
+        calls.append(thread_id)
+        return {"thread": str(thread_id)}
+
+    async def scenario():
+        queue = InMemoryJobQueue({"echo": handler})
+        await queue.start()
+        thread_id = uuid4()
+        job = queue.submit("echo", thread_id, 1)
+        await queue._queue.join()
+        await queue.stop()
+        return thread_id, queue.get(job.id)
+
+    thread_id, job = asyncio.run(scenario())
+    assert job.status == JobStatus.COMPLETED
+    assert job.result == {"thread": str(thread_id)}
+    assert calls == [thread_id]
+
+def test_duplicate_submissions_collapse():
+    """Test the same thread version maps onto one job"""
+    async def handler(thread_id):
+        return 1
+
+    async def scenario():
+        queue = InMemoryJobQueue({"count": handler})
+        await queue.start()
+        thread_id = uuid4()
+        first = queue.submit("count", thread_id, 3)
+        second = queue.submit("count", thread_id, 3)
+        newer = queue.submit("count", thread_id, 4)
+        await queue.stop()
+        return first, second, newer
+
+    first, second, newer = asyncio.run(scenario())
+    assert first.id == second.id
+    assert newer.id != first.id
+
+def test_failed_job_records_error():
+    """Test handler exceptions mark the job failed"""
+    async def handler(thread_id):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        queue = InMemoryJobQueue({"fail": handler})
+        await queue.start()
+        job = queue.submit("fail", uuid4(), 1)
+        await queue._queue.join()
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == JobStatus.FAILED
+    assert job.error == "boom"
+
+def test_full_queue_rejects_submission():
+    """Test submissions beyond the queue bound are refused"""
+    async def handler(thread_id):
+        return None
+
+    async def scenario():
+        queue = InMemoryJobQueue({"noop": handler})
+        queue._queue = asyncio.Queue(maxsize=1)
+        queue.submit("noop", uuid4(), 1)
+        with pytest.raises(JobQueueFullError):
+            queue.submit("noop", uuid4(), 1)
+
+    asyncio.run(scenario())
@@ -1,5 +1,8 @@
+import pytest
 from fastapi.testclient import TestClient
 
+pytestmark = pytest.mark.usefixtures("neo4j_cleanup")
+
 def test_create_message(client: TestClient):
     """Test message creation"""
     # Create a thread first
@@ -23,4 +26,78 @@ def test_create_message(client: TestClient):
     data = response.json()
     assert "id" in data
     assert data["content"] == "Hello, world!"
-    assert data["role"] == "user"
\ No newline at end of file
+    assert data["role"] == "user"
+
+def test_duplicate_message_reuses_embedding(client: TestClient):
+    """Test duplicate content links to the original message"""
+    thread_response = client.post(
+        "/api/v1/threads/",
+        json={"metadata": {}}
+    )
+    thread_id = thread_response.json()["id"]
+
+    payload = {
+        "content": "Build #42 finished successfully",
+        "role": "assistant",
+        "thread_id": thread_id,
+        "metadata": {}
+    }
+    first = client.post("/api/v1/messages/?include=embedding", json=payload).json()
+    second = client.post("/api/v1/messages/?include=embedding", json=payload).json()
+
+    assert second["duplicate_of"] == first["id"]
+    assert second["embedding"] == first["embedding"]
+    assert first["embedding"] is not None
+
+    report = client.get("/api/v1/messages/dedup/report").json()
+    assert report["duplicate_messages"] == 1
+    assert report["exact_duplicates"] == 1
+    assert report["embedding_calls_saved"] == 1
+
+
+def test_embeddings_are_opt_in(client: TestClient):
+    """Test embeddings are only returned with include=embedding"""
+    thread_id = client.post(
+        "/api/v1/threads/",
+        json={"metadata": {}}
+    ).json()["id"]
+    created = client.post(
+        "/api/v1/messages/",
+        json={
+            "content": "Projection check",
+            "role": "user",
+            "thread_id": thread_id,
+            "metadata": {}
+        }
+    ).json()
+    assert created["embedding"] is None
+
+    plain = client.get(f"/api/v1/messages/{created['id']}").json()
+    assert plain["embedding"] is None
+
+    full = client.get(f"/api/v1/messages/{created['id']}?include=embedding").json()
+    assert len(full["embedding"]) > 0
+
+    assert client.get(f"/api/v1/messages/{created['id']}?include=bogus").status_code == 400
+
+
+def test_websocket_ingest_acks_batches(client: TestClient):
+    """Test messages pushed over the WebSocket are acked with stored ids"""
+    thread_id = client.post(
+        "/api/v1/threads/",
+        json={"metadata": {}}
+    ).json()["id"]
+
+    with client.websocket_connect(f"/api/v1/messages/ws/{thread_id}") as ws:
+        ws.send_json({"ref": 1, "content": "Streaming in", "role": "user"})
+        ws.send_json({"ref": 2, "content": "Streaming in", "role": "user"})
+        ws.send_json({"ref": 3, "content": "Bad role", "role": "system"})
+        frames = [ws.receive_json() for _ in range(3)]
+
+    error = next(frame for frame in frames if frame["type"] == "error")
+    assert error["ref"] == 3
+    acks = {frame["ref"]: frame for frame in frames if frame["type"] == "ack"}
+    assert acks[2]["duplicate_of"] == acks[1]["id"]
+
+    stored = client.get(f"/api/v1/messages/{acks[1]['id']}").json()
+    assert stored["content"] == "Streaming in"
@@ -0,0 +1,73 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from src.core import metrics
+from src.api.timing import TimingMiddleware
+from src.db.neo4j import _InstrumentedSession
+from src.db.queries.messages import MessageQueries
+
+class FakeSession:
+    def execute_read(self, work):
+        return work(FakeTransaction())
+
+class FakeTransaction:
+    def run(self, query, parameters=None, **kwargs):
+        return query
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_server_timing_lists_stages_and_remainder():
+    """Test the header carries each stage plus app and total time"""
+    header = metrics.server_timing(
+        [("neo4j", "MessageQueries.GET_MESSAGE", 0.002), ("openai", "gpt", 0.1)],
+        total=0.15
+    )
+    assert header == (
+        'neo4j;desc="MessageQueries.GET_MESSAGE";dur=2.0, '
+        'openai;desc="gpt";dur=100.0, app;dur=48.0, total;dur=150.0'
+    )
+
+def test_disabled_stage_is_a_shared_noop(monkeypatch):
+    """Test nothing is recorded when metrics are off"""
+    monkeypatch.setattr(metrics, "enabled", False)
+    stages = metrics.start_request()
+    with metrics.stage("neo4j", "anything"):
+        pass
+    assert metrics.stage("openai", "model", "embedding") is metrics.stage("neo4j", "other")
+    assert stages == []
+
+def test_session_transactions_are_named_by_query():
+    """Test managed transactions are timed under their Queries constant"""
+    labels = {"query": "MessageQueries.GET_MESSAGE"}
+    before = _sample("comagraph_neo4j_query_seconds_count", labels)
+    stages = metrics.start_request()
+
+    session = _InstrumentedSession(FakeSession())
+    assert session.execute_read(lambda tx: tx.run(MessageQueries.GET_MESSAGE, id="1")) == MessageQueries.GET_MESSAGE
+
+    assert _sample("comagraph_neo4j_query_seconds_count", labels) == before + 1
+    assert [stage[:2] for stage in stages] == [("neo4j", "MessageQueries.GET_MESSAGE")]
+
+def test_middleware_adds_server_timing_and_route_histogram(monkeypatch):
+    """Test responses carry Server-Timing and latency is labelled by route template"""
+    monkeypatch.setattr(metrics, "enabled", True)
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        with metrics.stage("neo4j", "ItemQueries.GET_ITEM"):
+            pass
+        return {"id": item_id}
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = _sample("comagraph_http_request_seconds_count", labels)
+
+    response = TestClient(app).get("/items/7")
+
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert 'neo4j;desc="ItemQueries.GET_ITEM"' in timing
+    assert "total;dur=" in timing
+    assert _sample("comagraph_http_request_seconds_count", labels) == before + 1
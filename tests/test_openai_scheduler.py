@@ -0,0 +1,140 @@
+import asyncio
+import httpx
+import pytest
+from openai import APIConnectionError, RateLimitError
+from src.core.constants import RequestPriority
+from src.core.exceptions import ProviderUnavailableError
+from src.services.openai_scheduler import CircuitBreaker, OpenAIScheduler, TokenBucket, parse_reset
+
+class FakeRaw:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+def _rate_limit_error(headers):
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    response = httpx.Response(429, headers=headers, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+def test_parse_reset_durations():
+    """Test OpenAI reset header formats are converted to seconds"""
+    assert parse_reset("6m0s") == 360
+    assert parse_reset("1.5s") == 1.5
+    assert parse_reset("20ms") == pytest.approx(0.02)
+    assert parse_reset("2") == 2
+    assert parse_reset(None) is None
+
+def test_bucket_refills_and_honours_headers():
+    """Test buckets refill over time and block until reset when exhausted"""
+    bucket = TokenBucket(60)
+    bucket.take(60, now=bucket.updated)
+    assert bucket.delay(1, now=bucket.updated) == pytest.approx(1.0)
+    assert bucket.delay(1, now=bucket.updated + 1) == pytest.approx(0.0)
+
+    bucket.observe(limit=120, remaining=0, reset=5.0, now=bucket.updated)
+    assert bucket.capacity == 120
+    assert bucket.delay(1, now=bucket.updated) == pytest.approx(5.0)
+
+def test_interactive_requests_jump_the_queue():
+    """Test queued interactive calls are admitted before earlier background calls"""
+    scheduler = OpenAIScheduler(limits={"model": (60, 1000)})
+    order = []
+
+    def call(name):
+        async def make():
+            order.append(name)
+            return FakeRaw()
+        return make
+
+    async def run():
+        limiter = scheduler._limiter("model")
+        limiter.requests.level = 0
+        background = asyncio.create_task(
+            scheduler.run("model", 1, RequestPriority.BACKGROUND, call("background"))
+        )
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(
+            scheduler.run("model", 1, RequestPriority.INTERACTIVE, call("interactive"))
+        )
+        await asyncio.sleep(0.02)
+        assert order == []
+        limiter.requests.level = 2
+        await asyncio.gather(background, interactive)
+
+    asyncio.run(run())
+
+    assert order == ["interactive", "background"]
+    stats = scheduler.stats()
+    assert stats["queue_wait"]["interactive"]["count"] == 1
+    assert stats["queue_wait"]["background"]["max_seconds"] > 0
+
+def test_rate_limited_calls_are_retried_after_reset():
+    """Test a 429 blocks the bucket until reset and the call is retried"""
+    scheduler = OpenAIScheduler(limits={"model": (100, 1000)})
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise _rate_limit_error({
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": "20ms"
+            })
+        return FakeRaw({"x-ratelimit-remaining-tokens": "10"})
+
+    asyncio.run(scheduler.run("model", 1, RequestPriority.BACKGROUND, call))
+
+    assert len(attempts) == 2
+    assert scheduler.stats()["rate_limited"] == 1
+    assert scheduler.stats()["models"]["model"]["tokens_available"] <= 10
+
+def test_breaker_opens_on_failures_and_fails_fast():
+    """Test repeated connection errors open the breaker"""
+    scheduler = OpenAIScheduler(limits={"model": (100, 1000)})
+    scheduler.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+
+    async def failing():
+        raise APIConnectionError(request=request)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(APIConnectionError):
+                await scheduler.run("model", 1, RequestPriority.INTERACTIVE, failing)
+        with pytest.raises(ProviderUnavailableError):
+            await scheduler.run("model", 1, RequestPriority.INTERACTIVE, failing)
+
+    asyncio.run(run())
+    assert scheduler.stats()["breaker"] == CircuitBreaker.OPEN
+
+def test_breaker_half_open_probe_closes_on_success():
+    """Test one probe is let through after the cool-down and success closes the breaker"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10)
+    breaker.record_failure(now=100)
+    assert not breaker.allow(now=105)
+    assert breaker.allow(now=111)
+    assert not breaker.allow(now=111)
+    breaker.record_success()
+    assert breaker.state(now=111) == CircuitBreaker.CLOSED
+
+def test_cancelled_probe_releases_the_breaker():
+    """Test a probe cancelled mid-call lets the next request probe, and only the probe releases it"""
+    scheduler = OpenAIScheduler(limits={"model": (100, 1000)})
+    scheduler.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.01)
+    scheduler.breaker.record_failure(now=0)
+
+    async def hang():
+        await asyncio.sleep(60)
+
+    async def run():
+        probe = asyncio.create_task(scheduler.run("model", 1, RequestPriority.INTERACTIVE, hang))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ProviderUnavailableError):
+            await scheduler.run("model", 1, RequestPriority.INTERACTIVE, hang)
+        assert scheduler.breaker.probing
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await scheduler.run("model", 1, RequestPriority.INTERACTIVE, lambda: asyncio.sleep(0, FakeRaw()))
+
+    assert isinstance(asyncio.run(run()), FakeRaw)
+    assert scheduler.stats()["breaker"] == CircuitBreaker.CLOSED
@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.profiling import ProfilingMiddleware, StackSampler
+
+def _busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+def _app(tmp_path, sample_rate=0.0, max_files=200):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    middleware_settings = {
+        "PROFILE_DIR": str(tmp_path),
+        "PROFILE_SAMPLE_RATE": sample_rate,
+        "PROFILE_MAX_FILES": max_files,
+        "PROFILE_INTERVAL_MS": 1
+    }
+
+    @app.get("/threads/{thread_id}/context")
+    async def context(thread_id: str):
+        _busy_loop(0.05)
+        return {"id": thread_id}
+
+    client = TestClient(app)
+    # Build the middleware stack, then point its settings at the temp directory
+    client.get("/threads/warmup/context")
+    middleware = app.middleware_stack
+    while not isinstance(middleware, ProfilingMiddleware):
+        middleware = middleware.app
+    middleware.settings = middleware.settings.model_copy(update=middleware_settings)
+    return client
+
+def test_sampler_records_folded_stacks():
+    """Test the sampler attributes samples to the running function"""
+    sampler = StackSampler(threading.get_ident(), 0.001)
+    sampler.start()
+    _busy_loop(0.05)
+    sampler.stop()
+
+    folded = sampler.folded()
+    assert "_busy_loop" in folded
+    stack, count = folded.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+
+def test_header_triggers_profile_tagged_with_route_and_thread(tmp_path):
+    """Test the debug header profiles a request and names the file after it"""
+    client = _app(tmp_path)
+    assert os.listdir(tmp_path) == []
+
+    response = client.get("/threads/abc/context", headers={"X-Profile": "1"})
+
+    profile_id = response.headers["x-profile-id"]
+    [name] = os.listdir(tmp_path)
+    assert name.endswith(f"-threads_thread_id_context-abc-{profile_id}.folded")
+    assert "_busy_loop" in (tmp_path / name).read_text()
+
+def test_profiles_are_rotated(tmp_path):
+    """Test only the newest PROFILE_MAX_FILES profiles are kept"""
+    client = _app(tmp_path, sample_rate=1.0, max_files=2)
+    for i in range(4):
+        client.get(f"/threads/t{i}/context")
+        time.sleep(0.01)
+
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 2
+    assert {name.split("-")[2] for name in names} == {"t2", "t3"}
@@ -0,0 +1,86 @@
+import inspect
+import re
+import pytest
+from pathlib import Path
+from src.db.queries import QUERY_MODULES
+SERVICES_DIR = Path(__file__).resolve().parent.parent / "src" / "services"
+
+def _queries():
+    for module in QUERY_MODULES:
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            for name, value in vars(cls).items():
+                if name.isupper() and isinstance(value, str):
+                    yield f"{cls.__name__}.{name}", value
+
+def _top_level_return_items(query: str):
+    """Yield the items of every RETURN clause outside subqueries"""
+    depth = 0
+    masked = []
+    for char in query:
+        if char in "{[(":
+            depth += 1
+        elif char in "}])":
+            depth -= 1
+        # Mask anything nested so splitting on commas and keywords is safe
+        masked.append(char if depth == 0 or char in "{[(" and depth == 1 else " ")
+    masked = "".join(masked)
+    for match in re.finditer(r"\bRETURN\b(.*?)(?=\bORDER BY\b|\bLIMIT\b|\bSKIP\b|\bUNION\b|$)", masked, re.S):
+        for item in match.group(1).split(","):
+            item = re.sub(r"\bDISTINCT\b", "", item)
+            yield re.split(r"\bas\b|\bAS\b", item)[0].strip()
+
+def _node_variables(query: str):
+    return set(re.findall(r"\(\s*([A-Za-z_]\w*)\s*[:){]", query))
+
+def test_queries_never_return_whole_nodes():
+    """Test every query projects properties instead of returning nodes"""
+    offenders = []
+    for name, query in _queries():
+        nodes = _node_variables(query)
+        for item in _top_level_return_items(query):
+            if item in nodes:
+                offenders.append(f"{name} returns node '{item}'")
+    assert not offenders, "\n".join(offenders)
+
+def test_services_use_query_modules():
+    """Test services do not build Cypher inline"""
+    inline = [
+        path.name
+        for path in SERVICES_DIR.glob("*.py")
+        if re.search(r"tx\.run\(\s*(f?\"\"\"|f?\")", path.read_text())
+    ]
+    assert not inline, f"Inline Cypher in: {', '.join(inline)}"
+
+def test_embeddings_are_opt_in():
+    """Test queries only read embeddings for similarity or when asked"""
+    allowed = {
+        "MessageQueries.CREATE_MESSAGE",
+        "MessageQueries.CREATE_MESSAGES_BATCH",
+        "MessageQueries.FIND_DUPLICATE_CANDIDATES",
+        "MessageQueries.DEDUP_REPORT",
+        "MessageQueries.FIND_SIMILAR_MESSAGES",
+        "ThreadQueries.FIND_SIMILAR_THREADS",
+    }
+    for name, query in _queries():
+        for match in re.finditer(r"\bembedding\b\s*:\s*([^\n]*)", query):
+            if "$include_embedding" not in match.group(1) and name not in allowed:
+                pytest.fail(f"{name} returns embeddings without $include_embedding")
+
+def test_opted_in_embeddings_resolve_duplicates():
+    """Test projections honouring $include_embedding fall back to the canonical's vector"""
+    for name, query in _queries():
+        for match in re.finditer(r"\$include_embedding THEN ([^\n]*?) END", query):
+            if name != "MessageQueries.CREATE_DUPLICATE_MESSAGE" and "coalesce(" not in match.group(1):
+                pytest.fail(f"{name} returns a null embedding for duplicates")
+
+def test_range_filters_stay_seekable():
+    """Test optional range bounds are not guarded with IS NULL, which defeats index seeks"""
+    for name, query in _queries():
+        if re.search(r"\$\w+ IS NULL OR", query):
+            pytest.fail(f"{name} guards a range bound with IS NULL")
+
+def test_projections_list_their_fields():
+    """Test map projections name their properties instead of copying them all"""
+    for name, query in _queries():
+        if re.search(r"\{\s*\.\*", query):
+            pytest.fail(f"{name} projects every property")
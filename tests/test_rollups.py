@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime, timezone
+from uuid import uuid4
+import numpy as np
+import pytest
+from src.core.constants import ThreadStatus
+from src.core.exceptions import ContextManagerException
+from src.db.embedded import EmbeddedRepository, EmbeddedStore
+from src.models.message import MessageCreate
+from src.services.embeddings import HashingEmbeddingProvider
+from src.services.message_service import MessageService
+from src.services.rollups import RESPONSE_TIME_BOUNDS, Rollups, aggregate
+
+@pytest.fixture
+def rollups(tmp_path):
+    repository = EmbeddedRepository(EmbeddedStore(str(tmp_path), fsync=False))
+    rollups = Rollups()
+    rollups.repository = repository
+    rollups.cold_tier = None
+    messages = MessageService()
+    messages.repository = repository
+    messages.rollups = rollups
+    messages.openai.embeddings = HashingEmbeddingProvider(64)
+    yield repository, rollups, messages
+    repository.close()
+
+def _by_bucket(rows):
+    return {(row["granularity"], row["bucket"]): row for row in rows}
+
+def test_aggregate_counts_roles_and_responses_per_bucket():
+    """Test responses are timed within a thread and land in the answering message's bucket"""
+    # Thread one: user at 0s, assistant at 30s, user at 3630s (next hour); thread two starts at 3700s
+    created = np.array([0.0, 30.0, 3630.0, 3700.0, 3702.0])
+    roles = np.array([1, 2, 1, 2, 1], dtype=np.int8)
+    duplicates = np.array([False, False, True, False, False])
+    starts = np.array([True, False, False, True, False])
+
+    rows = _by_bucket(aggregate(created, roles, duplicates, starts))
+
+    first_hour, second_hour = rows[("hour", 0.0)], rows[("hour", 3600.0)]
+    assert (first_hour["message_count"], first_hour["user_messages"], first_hour["response_count"]) == (2, 1, 1)
+    assert first_hour["response_seconds"] == 30.0
+    assert first_hour["response_histogram"][RESPONSE_TIME_BOUNDS.index(60)] == 1
+    assert (second_hour["message_count"], second_hour["duplicate_messages"]) == (3, 1)
+    # 3600s after the assistant, then 2s inside thread two; thread two's start answers nothing
+    assert second_hour["response_count"] == 2
+    assert second_hour["response_seconds"] == 3602.0
+    day = rows[("day", 0.0)]
+    assert (day["message_count"], day["assistant_messages"], day["response_count"]) == (5, 2, 3)
+    assert sum(day["response_histogram"]) == 3
+
+def test_incremental_rollups_match_rebuild(rollups, monkeypatch):
+    """Test deltas recorded on every write path add up to what a full rebuild computes"""
+    repository, rollups, messages = rollups
+    thread_ids = [uuid4(), uuid4()]
+    for thread_id in thread_ids:
+        repository.create_thread(str(thread_id), ThreadStatus.ACTIVE)
+        for role, content in [("user", "disk is full"), ("assistant", "clear the cache"), ("user", "disk is full")]:
+            asyncio.run(messages.create_message(MessageCreate(thread_id=thread_id, content=content, role=role)))
+        asyncio.run(messages.create_messages_batch(thread_id, [
+            MessageCreate(thread_id=thread_id, content="it worked", role="assistant"),
+            MessageCreate(thread_id=thread_id, content="thanks", role="user")
+        ]))
+    rollups.flush()
+    incremental = repository.get_rollups("hour", None, None)
+    assert sum(row["message_count"] for row in incremental) == 10
+    assert sum(row["duplicate_messages"] for row in incremental) == 6
+    assert sum(row["response_count"] for row in incremental) == 8
+
+    monkeypatch.setattr(rollups.settings, "ROLLUP_PROCESSES", 2)
+    monkeypatch.setattr(rollups.settings, "ROLLUP_SCAN_CHUNK", 4)
+    assert rollups.rebuild()["messages"] == 10
+    rebuilt = _by_bucket(repository.get_rollups("hour", None, None))
+    for key, row in _by_bucket(incremental).items():
+        assert rebuilt[key]["message_count"] == row["message_count"]
+        assert rebuilt[key]["response_histogram"] == row["response_histogram"]
+        assert rebuilt[key]["response_seconds"] == pytest.approx(row["response_seconds"], abs=1e-3)
+    assert len(repository.get_rollups("day", None, None)) >= 1
+
+def test_rebuild_rejects_a_concurrent_rebuild(rollups, monkeypatch):
+    """Test a second rebuild fails fast instead of racing the first"""
+    _, rollups, _ = rollups
+    monkeypatch.setattr(rollups.settings, "ROLLUP_PROCESSES", 0)
+    rollups._rebuilding = True
+    with pytest.raises(ContextManagerException):
+        rollups.rebuild()
+    rollups._rebuilding = False
+    assert rollups.rebuild()["messages"] == 0
+
+def test_rebuild_drops_deltas_its_scan_counts(rollups):
+    """Test deltas recorded during a rebuild only count messages after its cutoff"""
+    _, rollups, _ = rollups
+    rollups._rebuilding = True
+    rollups._cutoff = 7200.0
+    rollups.record({"previous_at": None}, [
+        (datetime.fromtimestamp(3600, timezone.utc), "user", False),
+        (datetime.fromtimestamp(7260, timezone.utc), "assistant", False)
+    ])
+    rows = _by_bucket(rollups._pending.values())
+    assert ("hour", 3600.0) not in rows
+    late = rows[("hour", 7200.0)]
+    # The answer is timed from the scanned message but counted once, as a delta
+    assert (late["message_count"], late["response_count"], late["response_seconds"]) == (1, 1, 3660.0)
+    rollups._rebuilding = False
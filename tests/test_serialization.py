@@ -0,0 +1,43 @@
+import json
+from datetime import datetime, timezone
+from typing import List
+from uuid import uuid4
+from pydantic import TypeAdapter
+from src.models.message import Message
+from src.api.responses import FastJSONResponse
+
+class DriverDateTime:
+    """Stand-in for neo4j.time.DateTime"""
+
+    def __init__(self, value: datetime):
+        self.value = value
+
+    def to_native(self) -> datetime:
+        return self.value
+
+def _record(**overrides) -> dict:
+    record = {
+        "id": str(uuid4()),
+        "content": "hello",
+        "role": "user",
+        "created_at": DriverDateTime(datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)),
+        "thread_id": str(uuid4()),
+        "embedding": [0.25, -0.5],
+        "metadata": {}
+    }
+    record.update(overrides)
+    return record
+
+def test_from_record_matches_validation():
+    """Test trusted construction yields the same model as validation"""
+    record = _record()
+    trusted = Message.from_record(record)
+    validated = Message.model_validate({**record, "created_at": record["created_at"].to_native()})
+    assert trusted == validated
+
+def test_fast_response_matches_pydantic_json():
+    """Test orjson rendering matches pydantic's JSON output"""
+    messages = [Message.from_record(_record()), Message.from_record(_record(embedding=None))]
+    fast = json.loads(FastJSONResponse(messages).body)
+    expected = json.loads(TypeAdapter(List[Message]).dump_json(messages))
+    assert fast == expected
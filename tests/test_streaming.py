@@ -0,0 +1,35 @@
+import asyncio
+import json
+from src.api.sse import sse_event
+from src.services.openai_service import OpenAIService
+
+class FakeStreamingOpenAIService(OpenAIService):
+    """OpenAI service that replays fixed completion deltas"""
+
+    def __init__(self, deltas):
+        super().__init__()
+        self.completion_cache = None
+        self.deltas = deltas
+
+    async def _stream_completion(self, prompt, temperature, max_tokens):
+        for delta in self.deltas:
+            yield delta
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+def test_sse_event_format():
+    """Test events are framed per the server-sent events spec"""
+    assert sse_event("topic", {"topic": "billing"}) == b'event: topic\ndata: {"topic":"billing"}\n\n'
+
+def test_topics_stream_splits_on_commas_across_deltas():
+    """Test topics are emitted as soon as each comma arrives"""
+    service = FakeStreamingOpenAIService(["Bil", "ling, deploy", "ments ,", " CI pipeline"])
+    topics = asyncio.run(_collect(service.extract_topics_stream("text")))
+    assert topics == ["Billing", "deployments", "CI pipeline"]
+
+def test_summary_stream_passes_deltas_through():
+    """Test summary deltas are forwarded unchanged"""
+    service = FakeStreamingOpenAIService(["The user ", "asked about ", "billing."])
+    deltas = asyncio.run(_collect(service.summarize_thread_stream([{"role": "user", "content": "hi"}])))
+    assert "".join(deltas) == "The user asked about billing."
@@ -1,7 +1,10 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from uuid import UUID
 
+pytestmark = pytest.mark.usefixtures("neo4j_cleanup")
+
 def test_create_thread(client: TestClient):
     """Test thread creation"""
     response = client.post(
@@ -39,4 +42,62 @@ def test_thread_context(client: TestClient):
     context_response = client.get(f"/api/v1/threads/{thread_id}/context")
     assert context_response.status_code == 200
     messages = context_response.json()
-    assert len(messages) > 0
\ No newline at end of file
+    assert len(messages) > 0
+
+def test_thread_context_conditional_get(client: TestClient):
+    """Test If-None-Match short-circuits unchanged thread context"""
+    thread_id = client.post(
+        "/api/v1/threads/",
+        json={"metadata": {}}
+    ).json()["id"]
+
+    first = client.get(f"/api/v1/threads/{thread_id}/context")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = client.get(
+        f"/api/v1/threads/{thread_id}/context",
+        headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+
+    client.post(
+        "/api/v1/messages/",
+        json={
+            "content": "New message",
+            "role": "user",
+            "thread_id": thread_id,
+            "metadata": {}
+        }
+    )
+    changed = client.get(
+        f"/api/v1/threads/{thread_id}/context",
+        headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_thread_export(client: TestClient):
+    """Test a thread streams out as NDJSON"""
+    thread_id = client.post(
+        "/api/v1/threads/",
+        json={"metadata": {}}
+    ).json()["id"]
+    client.post(
+        "/api/v1/messages/",
+        json={
+            "content": "Exported message",
+            "role": "user",
+            "thread_id": thread_id,
+            "metadata": {}
+        }
+    )
+
+    response = client.get(f"/api/v1/threads/{thread_id}/export?include=embedding")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["type"] for line in lines] == ["header", "thread", "message"]
+    assert lines[2]["content"] == "Exported message"
+    assert lines[2]["embedding"]
@@ -0,0 +1,112 @@
+import asyncio
+from uuid import uuid4
+import orjson
+import pytest
+from src.core.constants import ThreadStatus
+from src.db.embedded import EmbeddedRepository, EmbeddedStore
+from src.models.message import MessageCreate
+from src.services.analytics_cache import get_thread_versions
+from src.services.cold_tier import ColdTier
+from src.services.embeddings import HashingEmbeddingProvider
+from src.services.export_service import ExportService
+from src.services.message_service import MessageService
+from src.services.thread_service import ThreadService
+
+@pytest.fixture
+def tiers(tmp_path, monkeypatch):
+    repository = EmbeddedRepository(EmbeddedStore(str(tmp_path / "hot"), fsync=False))
+    cold_tier = ColdTier(str(tmp_path / "cold"))
+    monkeypatch.setattr("src.services.export_service.get_repository", lambda: repository)
+    monkeypatch.setattr("src.services.export_service.get_cold_tier", lambda: cold_tier)
+
+    messages = MessageService()
+    threads = ThreadService()
+    for service in (messages, threads):
+        service.repository = repository
+        service.cold_tier = cold_tier
+    messages.openai.embeddings = HashingEmbeddingProvider(64)
+    yield repository, cold_tier, messages, threads
+    repository.close()
+
+def _thread(repository, messages, *contents):
+    thread_id = uuid4()
+    repository.create_thread(str(thread_id), ThreadStatus.ACTIVE)
+    created = [
+        asyncio.run(messages.create_message(MessageCreate(thread_id=thread_id, content=content, role="user")))
+        for content in contents
+    ]
+    return thread_id, created
+
+def test_archive_moves_thread_to_cold_tier_and_back(tiers):
+    """Test archiving empties hot storage, hides the thread from search and restores it"""
+    repository, cold_tier, messages, threads = tiers
+    thread_id, created = _thread(repository, messages, "kubernetes rollout stuck", "helm chart values")
+
+    asyncio.run(threads.update_thread_status(thread_id, ThreadStatus.ARCHIVED))
+    assert cold_tier.exists(str(thread_id))
+    assert repository.get_thread_messages(str(thread_id)) == []
+    assert repository.stats()["messages"] == 0
+    assert asyncio.run(messages.get_similar_messages("kubernetes rollout stuck")) == []
+    archived = asyncio.run(messages.get_similar_messages("kubernetes rollout stuck", include_archived=True))
+    assert [message.id for message in archived][:1] == [created[0].id]
+
+    exported = [orjson.loads(line) for line in ExportService().export_thread(thread_id)]
+    assert [row["content"] for row in exported if row["type"] == "message"] == [
+        "kubernetes rollout stuck", "helm chart values"
+    ]
+
+    thread = asyncio.run(threads.update_thread_status(thread_id, ThreadStatus.ACTIVE))
+    assert thread.status == ThreadStatus.ACTIVE
+    assert not cold_tier.exists(str(thread_id))
+    assert [m["id"] for m in repository.get_thread_messages(str(thread_id))] == [str(m.id) for m in created]
+    hot = asyncio.run(messages.get_similar_messages("kubernetes rollout stuck", limit=1))
+    assert [message.id for message in hot] == [created[0].id]
+
+def test_canonicals_of_other_threads_stay_hot(tiers):
+    """Test a canonical message that an active thread's duplicate points at is not moved"""
+    repository, cold_tier, messages, threads = tiers
+    archived_id, (canonical, other) = _thread(repository, messages, "invoice was charged twice", "refund issued")
+    _, (duplicate,) = _thread(repository, messages, "invoice was charged twice")
+    assert duplicate.duplicate_of == canonical.id
+
+    asyncio.run(threads.update_thread_status(archived_id, ThreadStatus.ARCHIVED))
+    assert [m["id"] for m in repository.get_thread_messages(str(archived_id))] == [str(canonical.id)]
+    assert repository.get_message(str(duplicate.id), True)["embedding"] is not None
+
+    asyncio.run(threads.update_thread_status(archived_id, ThreadStatus.ACTIVE))
+    assert {m["id"] for m in repository.get_thread_messages(str(archived_id))} == {
+        str(canonical.id), str(other.id)
+    }
+
+def test_messages_appended_during_archive_stay_hot(tiers, monkeypatch):
+    """Test archiving only drops what reached the segment and bumps the cached version"""
+    repository, cold_tier, messages, threads = tiers
+    thread_id, (archived,) = _thread(repository, messages, "printer is offline")
+    write = cold_tier.write
+
+    def write_then_append(segment_id, lines):
+        size = write(segment_id, lines)
+        repository.create_message(
+            str(uuid4()), "still offline", "user", str(thread_id), [1.0] * 64, "hash", 0, [0, 0, 0, 0]
+        )
+        return size
+
+    monkeypatch.setattr(cold_tier, "write", write_then_append)
+    asyncio.run(threads.update_thread_status(thread_id, ThreadStatus.ARCHIVED))
+    assert [m["content"] for m in repository.get_thread_messages(str(thread_id))] == ["still offline"]
+    assert [row["id"] for row in cold_tier.messages(str(thread_id))] == [str(archived.id)]
+    assert get_thread_versions().get(thread_id) == repository.get_thread_version(str(thread_id))["version"]
+
+def test_archived_threads_still_have_messages_and_analytics(tiers):
+    """Test summaries and analytics read an archived thread's segment alongside hot storage"""
+    repository, cold_tier, messages, threads = tiers
+    thread_id, _ = _thread(repository, messages, "printer offline", "restart the spooler")
+    asyncio.run(threads.update_thread_status(thread_id, ThreadStatus.ARCHIVED))
+    asyncio.run(messages.create_message(MessageCreate(thread_id=thread_id, content="that fixed it", role="assistant")))
+
+    archived = asyncio.run(threads._get_thread_messages(thread_id))
+    assert [message.content for message in archived] == [
+        "printer offline", "restart the spooler", "that fixed it"
+    ]
+    analytics = asyncio.run(threads.get_thread_analytics(thread_id))
+    assert (analytics["message_count"], analytics["user_messages"], analytics["assistant_messages"]) == (3, 2, 1)